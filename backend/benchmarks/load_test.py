@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Load test for the backend API
+
+Seeds a throwaway database with users, clients, projects, messages,
+files and bookings, then drives the main routes concurrently and
+reports throughput, p50/p95/p99 latency, errors and peak RSS:
+
+- login          POST /api/auth/login
+- share          GET  /api/projects/share/{share_link}
+- dashboard      GET  /api/dashboard/stats
+- projects       GET  /api/projects
+- message_post   POST /api/messages
+
+By default the app runs in-process over an ASGI transport against
+MONGO_URL (backend .env); the database is dropped afterwards. --mongomock
+uses an in-memory stand-in instead, which measures the app layer only
+and skips the share page (mongomock lacks $lookup sub-pipelines).
+Rate limits are switched off for the in-process app.
+
+Results are written as JSON. With --baseline the run is compared to an
+earlier result file and exits 1 when a scenario's p95 grew or its
+throughput dropped by more than --tolerance.
+
+    python benchmarks/load_test.py --scale 1 --requests 500 --concurrency 20 --output results.json
+    python benchmarks/load_test.py --baseline results.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+load_dotenv(ROOT_DIR / '.env')
+
+PASSWORD = "load-test-password"
+SCENARIOS = ["login", "share", "dashboard", "projects", "message_post"]
+MONGOMOCK_UNSUPPORTED = {"share"}
+
+
+# ============================================
+# Seeding
+# ============================================
+async def seed(db, scale: int) -> dict:
+    """Per scale unit: 50 users, 20 clients, 100 projects, 5k messages, 500 files, 200 bookings"""
+    from passwords import hash_password
+
+    now = datetime.now(timezone.utc)
+    hashed = hash_password(PASSWORD)
+    admin_email = "admin@example.com"
+    users = [{"id": str(uuid.uuid4()), "email": admin_email, "name": "Admin", "role": "admin",
+              "hashed_password": hashed, "created_at": now}]
+    users += [{"id": str(uuid.uuid4()), "email": f"user{i}@example.com", "name": f"User {i}", "role": "client",
+               "hashed_password": hashed, "created_at": now} for i in range(50 * scale)]
+    await db.users.insert_many(users)
+
+    clients = [{"id": str(uuid.uuid4()), "name": f"Client {i}", "email": f"client{i}@example.com",
+                "company": f"Company {i}", "created_at": now - timedelta(minutes=i)} for i in range(20 * scale)]
+    await db.clients.insert_many(clients)
+
+    projects = [{
+        "id": str(uuid.uuid4()), "client_id": random.choice(clients)["id"], "title": f"Project {i}",
+        "description": "Storefront redesign with checkout and bookings " * 4,
+        "start_date": now, "deadline": now + timedelta(days=60), "progress": random.randint(0, 100),
+        "status": random.choice(["not_started", "in_progress", "review", "completed"]),
+        "total_price": float(random.randint(500, 10000)), "amount_paid": float(random.randint(0, 500)),
+        "google_sheet_link": None, "share_link": str(uuid.uuid4()), "is_portfolio": i % 10 == 0,
+        "milestones": [], "created_at": now - timedelta(minutes=i),
+    } for i in range(100 * scale)]
+    await db.projects.insert_many(projects)
+
+    for start in range(0, 5000 * scale, 5000):
+        await db.messages.insert_many([{
+            "id": str(uuid.uuid4()), "project_id": random.choice(projects)["id"], "sender_name": "Admin",
+            "sender_role": "admin", "message": f"Progress update {start + i}", "created_at": now + timedelta(seconds=i),
+        } for i in range(5000)])
+    await db.files.insert_many([{
+        "id": str(uuid.uuid4()), "project_id": random.choice(projects)["id"], "filename": f"file{i}.png",
+        "file_url": f"https://example.com/file{i}.png", "file_type": "image/png", "category": "general",
+        "uploaded_by": "Admin", "created_at": now + timedelta(seconds=i),
+    } for i in range(500 * scale)])
+    await db.bookings.insert_many([{
+        "id": str(uuid.uuid4()), "name": f"Lead {i}", "email": f"lead{i}@example.com",
+        "project_idea": "Online shop", "status": random.choice(["pending", "accepted"]),
+        "created_at": now - timedelta(minutes=i),
+    } for i in range(200 * scale)])
+
+    return {
+        "admin_email": admin_email,
+        "user_emails": [u["email"] for u in users],
+        "share_links": [p["share_link"] for p in projects],
+        "project_ids": [p["id"] for p in projects],
+    }
+
+
+# ============================================
+# Driving requests
+# ============================================
+def percentile(samples: list, pct: float) -> float:
+    """Nearest-rank percentile of a sorted list"""
+    if not samples:
+        return 0.0
+    index = max(0, min(len(samples) - 1, int(round(pct / 100 * len(samples))) - 1))
+    return samples[index]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run_scenario(http, make_request, total: int, concurrency: int) -> dict:
+    latencies = []
+    errors = 0
+    counter = itertools.count()
+
+    async def worker():
+        nonlocal errors
+        while True:
+            i = next(counter)
+            if i >= total:
+                return
+            method, url, kwargs = make_request(i)
+            start = time.perf_counter()
+            try:
+                response = await http.request(method, url, **kwargs)
+                failed = response.status_code >= 400
+            except Exception:
+                failed = True
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def scenario_requests(seeded: dict, token: str) -> dict:
+    auth = {"Authorization": f"Bearer {token}"}
+    return {
+        "login": lambda i: ("POST", "/api/auth/login",
+                            {"json": {"email": random.choice(seeded["user_emails"]), "password": PASSWORD}}),
+        "share": lambda i: ("GET", f"/api/projects/share/{random.choice(seeded['share_links'])}", {}),
+        "dashboard": lambda i: ("GET", "/api/dashboard/stats", {"headers": auth}),
+        "projects": lambda i: ("GET", "/api/projects", {"headers": auth}),
+        "message_post": lambda i: ("POST", "/api/messages", {
+            "headers": auth,
+            "json": {"project_id": random.choice(seeded["project_ids"]), "message": f"Load test message {i}"},
+        }),
+    }
+
+
+# ============================================
+# Baseline comparison
+# ============================================
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Scenarios whose p95 or throughput regressed by more than `tolerance`"""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        if current["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']} -> {current['p95_ms']} ms")
+        if current["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {before['throughput_rps']} -> {current['throughput_rps']} rps")
+    return regressions
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+# ============================================
+# Entry point
+# ============================================
+def load_app(db_name: str, mongomock: bool):
+    """Import server against a throwaway database, returns (server module, db)"""
+    os.environ['DB_NAME'] = db_name
+    os.environ['RATE_LIMIT_ENABLED'] = 'false'
+    if mongomock:
+        import motor.motor_asyncio
+        from mongomock_motor import AsyncMongoMockClient
+        os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+        motor.motor_asyncio.AsyncIOMotorClient = AsyncMongoMockClient
+    import server
+    return server, server.db
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=1, help="multiplier for the seeded volumes")
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--mongomock", action="store_true", help="in-memory stand-in instead of MONGO_URL")
+    parser.add_argument("--output", default="load_test_results.json")
+    parser.add_argument("--baseline", help="earlier result file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression")
+    args = parser.parse_args()
+
+    import httpx
+    from indexes import ensure_indexes
+
+    db_name = f"{os.environ.get('DB_NAME', 'projectveo')}_load_{uuid.uuid4().hex[:8]}"
+    server, db = load_app(db_name, args.mongomock)
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    if args.mongomock:
+        scenarios = [s for s in scenarios if s not in MONGOMOCK_UNSUPPORTED]
+
+    # ASGITransport runs no lifespan, the connection is opened here
+    await server.mongo.open()
+    transport = httpx.ASGITransport(app=server.app)
+    try:
+        if not args.mongomock:
+            await ensure_indexes(db)
+        seeded = await seed(db, args.scale)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60) as http:
+            login = await http.post("/api/auth/login", json={"email": seeded["admin_email"], "password": PASSWORD})
+            login.raise_for_status()
+            requests = scenario_requests(seeded, login.json()["access_token"])
+
+            results = {
+                "meta": {
+                    "revision": git_revision(),
+                    "at": datetime.now(timezone.utc).isoformat(),
+                    "scale": args.scale,
+                    "requests": args.requests,
+                    "concurrency": args.concurrency,
+                    "backend": "mongomock" if args.mongomock else "mongodb",
+                },
+                "scenarios": {},
+            }
+            print(f"{'scenario':<14}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}{'rss MB':>9}")
+            for name in scenarios:
+                r = await run_scenario(http, requests[name], args.requests, args.concurrency)
+                results["scenarios"][name] = r
+                print(f"{name:<14}{r['throughput_rps']:>10.1f}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}"
+                      f"{r['p99_ms']:>10.2f}{r['errors']:>8}{r['peak_rss_mb']:>9.1f}")
+    finally:
+        if not args.mongomock:
+            await server.mongo.client.drop_database(db_name)
+        server.password_hasher.shutdown()
+        server.mongo.close()
+
+    Path(args.output).write_text(json.dumps(results, indent=2))
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ Regressions against {args.baseline} (tolerance {args.tolerance:.0%}):")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print(f"\n✅ No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Login throughput benchmark: inline bcrypt vs the password worker pool
+
+Simulates N concurrent logins (one bcrypt verify each) while a probe
+coroutine measures how long the event loop is stalled, which is what
+every other request (e.g. share-link page loads) would wait.
+
+    python benchmarks/login_throughput.py --logins 64 --concurrency 16
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from passwords import PasswordHasher, hash_password, verify_password  # noqa: E402
+
+
+async def probe(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Return the worst observed event loop delay in milliseconds"""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst * 1000
+
+
+async def run(verify, logins: int, concurrency: int, hashed: str) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with semaphore:
+            assert await verify("correct horse", hashed)
+
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    return {
+        "logins_per_sec": logins / elapsed,
+        "elapsed_s": elapsed,
+        "max_loop_stall_ms": await probe_task,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--executor", choices=["thread", "process"], default="thread")
+    args = parser.parse_args()
+
+    hashed = hash_password("correct horse", args.rounds)
+
+    async def inline_verify(plain, hashed_password):
+        return verify_password(plain, hashed_password)
+
+    hasher = PasswordHasher(executor=args.executor, workers=args.workers, rounds=args.rounds)
+    results = {
+        "inline": await run(inline_verify, args.logins, args.concurrency, hashed),
+        f"pool ({args.executor} x{args.workers})": await run(hasher.verify, args.logins, args.concurrency, hashed),
+    }
+    hasher.shutdown()
+
+    print(f"{args.logins} logins, concurrency {args.concurrency}, bcrypt cost {args.rounds}\n")
+    print(f"{'mode':<22}{'logins/s':>10}{'elapsed s':>12}{'max loop stall ms':>20}")
+    for mode, r in results.items():
+        print(f"{mode:<22}{r['logins_per_sec']:>10.1f}{r['elapsed_s']:>12.2f}{r['max_loop_stall_ms']:>20.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Search latency benchmark
+
+Seeds a throwaway database with --docs documents spread over projects,
+messages, bookings and clients, builds the text indexes and times a set
+of queries through search.search(), with and without filters.
+Needs MONGO_URL (backend .env); the database is dropped afterwards.
+
+    python benchmarks/search.py --docs 100000 --runs 50
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+load_dotenv(ROOT_DIR / '.env')
+
+from codec import get_database  # noqa: E402
+from indexes import ensure_indexes  # noqa: E402
+from search import SearchParams, search  # noqa: E402
+
+WORDS = ("website redesign checkout mobile booking portal analytics dashboard payment invoice "
+         "landing ecommerce inventory chat upload deadline milestone review launch api").split()
+QUERIES = ["checkout", "mobile booking", "invoice payment", "analytics dashboard", "launch"]
+STATUSES = ["planning", "in_progress", "review", "completed"]
+
+
+def sentence(n: int) -> str:
+    return " ".join(random.choices(WORDS, k=n))
+
+
+async def seed(db, docs: int) -> list:
+    now = datetime.now(timezone.utc)
+    client_ids = [str(uuid.uuid4()) for _ in range(max(1, docs // 100))]
+    project_ids = [str(uuid.uuid4()) for _ in range(max(1, docs // 10))]
+    await db.clients.insert_many([
+        {"id": cid, "name": f"Client {sentence(2)}", "company": sentence(2), "email": f"{i}@example.com",
+         "created_at": now - timedelta(minutes=i)}
+        for i, cid in enumerate(client_ids)
+    ])
+    await db.projects.insert_many([
+        {"id": pid, "client_id": random.choice(client_ids), "title": sentence(4), "description": sentence(40),
+         "status": random.choice(STATUSES), "share_link": str(uuid.uuid4()), "created_at": now - timedelta(minutes=i)}
+        for i, pid in enumerate(project_ids)
+    ])
+    remaining = docs - len(client_ids) - len(project_ids)
+    bookings = remaining // 10
+    for start in range(0, remaining - bookings, 10000):
+        await db.messages.insert_many([
+            {"id": str(uuid.uuid4()), "project_id": random.choice(project_ids), "sender_name": "Admin",
+             "sender_role": "admin", "message": sentence(25), "created_at": now - timedelta(seconds=start + i)}
+            for i in range(min(10000, remaining - bookings - start))
+        ])
+    await db.bookings.insert_many([
+        {"id": str(uuid.uuid4()), "name": "Lead", "email": "lead@example.com", "project_idea": sentence(30),
+         "status": "pending", "created_at": now - timedelta(minutes=i)}
+        for i in range(max(1, bookings))
+    ])
+    return client_ids
+
+
+def params(q: str, **filters) -> SearchParams:
+    return SearchParams(q=q, types=None, client_id=filters.get("client_id"), status=filters.get("status"),
+                        date_from=None, date_to=None, limit=20, after=None)
+
+
+async def time_it(db, make_params, runs: int) -> dict:
+    samples = []
+    for i in range(runs):
+        p = make_params(QUERIES[i % len(QUERIES)])
+        start = time.perf_counter()
+        await search(db, p)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {"p50": statistics.median(samples), "p95": samples[int(len(samples) * 0.95) - 1]}
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = get_database(client, f"{os.environ.get('DB_NAME', 'projectveo')}_bench_{uuid.uuid4().hex[:8]}")
+    try:
+        client_ids = await seed(db, args.docs)
+        await ensure_indexes(db)
+        await search(db, params("warmup"))
+
+        cases = {
+            "no filters": lambda q: params(q),
+            "status filter": lambda q: params(q, status="in_progress"),
+            "client filter": lambda q: params(q, client_id=random.choice(client_ids)),
+        }
+        print(f"{args.docs} documents")
+        print(f"{'case':<18}{'p50 ms':>10}{'p95 ms':>10}")
+        for label, make_params in cases.items():
+            r = await time_it(db, make_params, args.runs)
+            print(f"{label:<18}{r['p50']:>10.2f}{r['p95']:>10.2f}")
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+List response serialisation microbenchmark
+
+Times turning one page of database documents into response bytes for
+the get_projects, get_messages and get_bookings payloads, at 10, 1k and
+10k items:
+
+- validated: what FastAPI does with response_model=Page[Model]
+  (validate every item, dump to JSON-compatible data, json.dumps)
+- fast: serialisation.page_response (fill defaults, orjson)
+
+No database is needed, the documents are built in memory.
+
+    python benchmarks/serialisation.py --runs 20
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'projectveo_bench')
+
+from pagination import Page  # noqa: E402
+from serialisation import page_response  # noqa: E402
+from server import Booking, Message, Project  # noqa: E402
+
+SIZES = (10, 1000, 10000)
+
+
+def project_doc(i: int, now: datetime) -> dict:
+    return {
+        "id": str(uuid.uuid4()), "client_id": str(uuid.uuid4()), "title": f"Project {i}",
+        "description": "Redesign of the storefront and checkout " * 5,
+        "start_date": now, "deadline": now + timedelta(days=30), "progress": i % 100,
+        "status": "in_progress", "total_price": 1500.0, "amount_paid": 500.0, "google_sheet_link": None,
+        "share_link": str(uuid.uuid4()), "is_portfolio": False,
+        "milestones": [{"id": str(uuid.uuid4()), "title": f"Milestone {m}", "completed": m % 2 == 0} for m in range(3)],
+        "created_at": now + timedelta(seconds=i),
+    }
+
+
+def message_doc(i: int, now: datetime) -> dict:
+    return {
+        "id": str(uuid.uuid4()), "project_id": str(uuid.uuid4()), "sender_name": "Admin", "sender_role": "admin",
+        "message": f"Update {i}: deployed the latest build to staging.", "created_at": now + timedelta(seconds=i),
+    }
+
+
+def booking_doc(i: int, now: datetime) -> dict:
+    return {
+        "id": str(uuid.uuid4()), "name": f"Lead {i}", "email": f"lead{i}@example.com", "phone": None,
+        "project_idea": "An online shop with bookings and payments", "budget_range": "1k-5k",
+        "deadline": "2 months", "website_type": "ecommerce", "status": "pending",
+        "created_at": now + timedelta(seconds=i),
+    }
+
+
+PAYLOADS = {
+    "get_projects": (Project, project_doc),
+    "get_messages": (Message, message_doc),
+    "get_bookings": (Booking, booking_doc),
+}
+
+
+def validated(model, page: dict) -> bytes:
+    content = Page[model].model_validate(page).model_dump(mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast(model, page: dict) -> bytes:
+    return page_response(model, page).body
+
+
+def time_it(fn, model, docs: list, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        page = {"items": [dict(d) for d in docs], "next_cursor": None}
+        start = time.perf_counter()
+        fn(model, page)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    now = datetime.now(timezone.utc)
+    print(f"{'payload':<14}{'items':>7}{'validated ms':>15}{'fast ms':>10}{'speedup':>10}")
+    for name, (model, make_doc) in PAYLOADS.items():
+        for size in SIZES:
+            docs = [make_doc(i, now) for i in range(size)]
+            slow_ms = time_it(validated, model, docs, args.runs)
+            fast_ms = time_it(fast, model, docs, args.runs)
+            print(f"{name:<14}{size:>7}{slow_ms:>15.3f}{fast_ms:>10.3f}{slow_ms / fast_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
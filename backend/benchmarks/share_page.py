@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Share page latency benchmark: five sequential queries vs one aggregation
+
+Seeds a throwaway database with one project with a small history and
+one with a large history, then times both ways of building the page.
+Needs MONGO_URL (backend .env); the database is dropped afterwards.
+
+    python benchmarks/share_page.py --large 5000 --runs 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+load_dotenv(ROOT_DIR / '.env')
+
+from codec import get_database  # noqa: E402
+from indexes import ensure_indexes  # noqa: E402
+from share_page import load_share_page  # noqa: E402
+
+
+async def load_share_page_sequential(db, share_link: str):
+    """The pre-aggregation implementation, kept here as the baseline"""
+    project = await db.projects.find_one({"share_link": share_link}, {"_id": 0})
+    client = await db.clients.find_one({"id": project["client_id"]}, {"_id": 0})
+    messages = await db.messages.find({"project_id": project["id"]}, {"_id": 0}).sort("created_at", 1).to_list(1000)
+    files = await db.files.find({"project_id": project["id"]}, {"_id": 0}).to_list(1000)
+    srs_docs = await db.srs_documents.find({"project_id": project["id"]}, {"_id": 0}).to_list(1000)
+    return {"project": project, "client": client, "messages": messages, "files": files, "srs_documents": srs_docs}
+
+
+async def seed_project(db, messages: int, files: int) -> str:
+    now = datetime.now(timezone.utc)
+    client_id, project_id, share_link = str(uuid.uuid4()), str(uuid.uuid4()), str(uuid.uuid4())
+    await db.clients.insert_one({"id": client_id, "name": "Bench Client", "email": "bench@example.com",
+                                 "created_at": now})
+    await db.projects.insert_one({
+        "id": project_id, "client_id": client_id, "title": "Bench", "description": "x" * 500,
+        "start_date": now, "deadline": now + timedelta(days=30),
+        "share_link": share_link, "milestones": [], "created_at": now,
+    })
+    if messages:
+        await db.messages.insert_many([
+            {"id": str(uuid.uuid4()), "project_id": project_id, "sender_name": "Admin", "sender_role": "admin",
+             "message": f"Update {i} " + "y" * 200, "created_at": now + timedelta(seconds=i)}
+            for i in range(messages)
+        ])
+    if files:
+        await db.files.insert_many([
+            {"id": str(uuid.uuid4()), "project_id": project_id, "filename": f"f{i}.png",
+             "file_url": f"https://example.com/{i}.png", "file_type": "image/png", "uploaded_by": "Admin",
+             "created_at": now + timedelta(seconds=i)}
+            for i in range(files)
+        ])
+    return share_link
+
+
+async def time_it(fn, db, share_link: str, runs: int) -> dict:
+    await fn(db, share_link)  # warm up
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await fn(db, share_link)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {"p50": statistics.median(samples), "p95": samples[int(len(samples) * 0.95) - 1]}
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--small", type=int, default=20, help="messages in the small project")
+    parser.add_argument("--large", type=int, default=5000, help="messages in the large project")
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = get_database(client, f"{os.environ.get('DB_NAME', 'projectveo')}_bench_{uuid.uuid4().hex[:8]}")
+    try:
+        await ensure_indexes(db)
+        histories = {
+            f"small ({args.small} msgs)": await seed_project(db, args.small, 5),
+            f"large ({args.large} msgs)": await seed_project(db, args.large, 200),
+        }
+        print(f"{'history':<22}{'mode':<14}{'p50 ms':>10}{'p95 ms':>10}")
+        for label, share_link in histories.items():
+            for mode, fn in (("sequential", load_share_page_sequential), ("aggregation", load_share_page)):
+                r = await time_it(fn, db, share_link, args.runs)
+                print(f"{label:<22}{mode:<14}{r['p50']:>10.2f}{r['p95']:>10.2f}")
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Upload memory benchmark against a local storage stand-in
+
+Streams files of increasing size through SupabaseStreamingUploader into
+an in-process stand-in for the Supabase resumable endpoint, and reports
+the peak Python heap for each size next to the old read-everything path.
+The streaming column should stay flat at roughly one chunk.
+
+    python benchmarks/upload_memory.py --sizes 8 64 256
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+import httpx
+from starlette.datastructures import UploadFile
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from uploads import UPLOAD_CHUNK_BYTES, SupabaseStreamingUploader  # noqa: E402
+
+MB = 1024 * 1024
+
+
+class StandInStorage(httpx.AsyncBaseTransport):
+    """
+    Minimal TUS server: tracks offsets, discards the bytes
+    - A transport rather than httpx.MockTransport, which buffers every body
+    """
+
+    def __init__(self):
+        self.uploads = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method == "POST":
+            upload_id = str(len(self.uploads))
+            self.uploads[upload_id] = [0, int(request.headers["Upload-Length"])]
+            return httpx.Response(201, headers={"Location": f"/storage/v1/upload/resumable/{upload_id}"})
+        upload_id = request.url.path.rsplit("/", 1)[-1]
+        offset, length = self.uploads[upload_id]
+        if request.method == "HEAD":
+            return httpx.Response(200, headers={"Upload-Offset": str(offset), "Upload-Length": str(length)})
+        if int(request.headers["Upload-Offset"]) != offset:
+            return httpx.Response(409)
+        async for part in request.stream:
+            offset += len(part)
+        self.uploads[upload_id][0] = offset
+        return httpx.Response(204, headers={"Upload-Offset": str(offset)})
+
+
+def make_upload(size_mb: int) -> UploadFile:
+    spool = tempfile.SpooledTemporaryFile(max_size=MB)
+    block = b"\0" * MB
+    for _ in range(size_mb):
+        spool.write(block)
+    spool.seek(0)
+    return UploadFile(spool, size=size_mb * MB, filename="asset.bin")
+
+
+async def measure(coro_factory) -> float:
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    await coro_factory()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / MB
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[8, 64, 256], help="file sizes in MB")
+    args = parser.parse_args()
+
+    storage = StandInStorage()
+    uploader = SupabaseStreamingUploader("http://storage.local", "key", "project-files",
+                                         transport=storage)
+
+    print(f"chunk size {UPLOAD_CHUNK_BYTES / MB:.0f} MB\n")
+    print(f"{'file MB':>8}{'read() peak MB':>18}{'streaming peak MB':>20}")
+    for size_mb in args.sizes:
+        buffered = make_upload(size_mb)
+        read_all_peak = await measure(lambda: buffered.read())
+        await buffered.close()
+
+        streamed = make_upload(size_mb)
+        streaming_peak = await measure(lambda: uploader.upload("bench/asset.bin", streamed, "application/octet-stream"))
+        await streamed.close()
+        print(f"{size_mb:>8}{read_all_peak:>18.1f}{streaming_peak:>20.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
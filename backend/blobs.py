@@ -0,0 +1,130 @@
+"""
+Content-addressed upload storage
+
+Uploads are hashed (SHA-256) while they are staged and stored once per
+content under "blobs/<sha256>/<generation>". File and SRS records keep
+the hash in `content_hash` and share the object, and the `blobs`
+collection counts the references:
+
+    {_id: <sha256>, storage_path, size, content_type,
+     refs, status: pending | stored | failed, created_at, updated_at}
+
+- acquire() takes a reference, creating the blob when the content is new;
+  only then does the caller need to upload it
+- release() drops references; a blob left with none gets a "blob.remove"
+  job, which deletes it only if nothing re-acquired it in the meantime
+- A blob created again after its removal gets a new generation, so a
+  late "storage.remove" (or an upload finishing after the removal)
+  only ever deletes the object of the generation it belongs to; mark()
+  matches the generation for the same reason
+
+Records uploaded before this have no content_hash and own their object,
+blobs created before generations keep their "blobs/<sha256>" path.
+"""
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Iterable, Optional, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+BLOB_PREFIX = "blobs"
+# Collections whose records reference blobs
+BLOB_REFERENCES = ("files", "srs_documents")
+
+logger = logging.getLogger(__name__)
+
+
+def blob_path(content_hash: str, generation: str) -> str:
+    return f"{BLOB_PREFIX}/{content_hash}/{generation}"
+
+
+def blob_hash(storage_path: str) -> Optional[str]:
+    """Content hash of a blob's storage path, None for other paths"""
+    parts = storage_path.split("/")
+    if parts[0] != BLOB_PREFIX or len(parts) not in (2, 3):
+        return None
+    return parts[1]
+
+
+class BlobStore:
+    def __init__(self, db, job_queue):
+        self.db = db
+        self.job_queue = job_queue
+        job_queue.handler("blob.remove", concurrency=2)(self._remove)
+
+    @property
+    def collection(self):
+        return self.db.blobs
+
+    async def acquire(self, content_hash: str, size: int, content_type: str) -> Tuple[dict, bool]:
+        """
+        Take a reference to the blob of `content_hash`
+        - Returns (blob, upload), upload is True when the caller must store
+          the content: the blob is new or its last upload failed
+        """
+        now = datetime.now(timezone.utc)
+        storage_path = blob_path(content_hash, uuid.uuid4().hex)
+        for attempt in range(2):
+            try:
+                before = await self.collection.find_one_and_update(
+                    {"_id": content_hash},
+                    {
+                        "$inc": {"refs": 1},
+                        "$set": {"updated_at": now},
+                        "$setOnInsert": {
+                            "storage_path": storage_path,
+                            "size": size,
+                            "content_type": content_type,
+                            "status": "pending",
+                            "created_at": now,
+                        },
+                    },
+                    upsert=True,
+                    return_document=ReturnDocument.BEFORE,
+                )
+                break
+            except DuplicateKeyError:
+                # Two first uploads of the same content raced, the loser retries as an update
+                if attempt:
+                    raise
+        if before is None:
+            return {"_id": content_hash, "storage_path": storage_path, "status": "pending"}, True
+        if before["status"] == "failed":
+            retried = await self.collection.update_one(
+                {"_id": content_hash, "status": "failed"}, {"$set": {"status": "pending", "updated_at": now}}
+            )
+            return {**before, "status": "pending"}, retried.modified_count == 1
+        return before, False
+
+    async def release(self, content_hashes: Iterable[str]):
+        """Drop one reference per hash (repeat a hash to drop several)"""
+        for content_hash in content_hashes:
+            blob = await self.collection.find_one_and_update(
+                {"_id": content_hash},
+                {"$inc": {"refs": -1}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+                {"refs": 1},
+                return_document=ReturnDocument.AFTER,
+            )
+            if blob is not None and blob["refs"] <= 0:
+                await self.job_queue.enqueue("blob.remove", {"content_hash": content_hash})
+
+    async def mark(self, content_hash: str, storage_path: str, status: str) -> Optional[dict]:
+        """Record the upload outcome, None when this generation of the blob was removed meanwhile"""
+        return await self.collection.find_one_and_update(
+            {"_id": content_hash, "storage_path": storage_path},
+            {"$set": {"status": status, "updated_at": datetime.now(timezone.utc)}},
+            {"storage_path": 1},
+        )
+
+    async def _remove(self, payload: dict):
+        # Only while still unreferenced, an acquire() since the release keeps the blob
+        blob = await self.collection.find_one_and_delete(
+            {"_id": payload["content_hash"], "refs": {"$lte": 0}}, {"storage_path": 1}
+        )
+        if blob is None:
+            return None
+        await self.job_queue.enqueue("storage.remove", {"paths": [blob["storage_path"]]})
+        logger.info(f"Blob {payload['content_hash']} has no references left, removing {blob['storage_path']}")
+        return {"removed": blob["storage_path"]}
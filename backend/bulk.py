@@ -0,0 +1,245 @@
+"""
+Bulk import and export of collection records as NDJSON or CSV
+
+Imports read records from a stream, validate each one against the
+collection's model and write them in batches of BULK_BATCH_SIZE with a
+single unordered insert_many (mode "insert") or bulk_write of upserts
+keyed by id (mode "upsert"). A bad record never stops the batch: it is
+reported by row number together with the reason, either its validation
+error or the write error (e.g. a duplicate id or email).
+
+Exports stream the collection through a cursor, one encoded record at a
+time, so memory stays constant whatever the collection size.
+
+Formats:
+- ndjson: one JSON object per line
+- csv: a header row with the model's fields, nested values (milestones)
+  as JSON; empty cells count as missing so model defaults apply
+
+Configuration (backend .env):
+- BULK_BATCH_SIZE: records per database round trip
+- BULK_MAX_REPORTED_ERRORS: row errors listed in a report, the count of
+  failed rows is always complete
+"""
+import codecs
+import csv
+import io
+import json
+import os
+from typing import AsyncIterator, Awaitable, Callable, Iterable, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError
+
+from serialisation import apply_defaults, dumps, model_projection
+
+BULK_BATCH_SIZE = int(os.environ.get('BULK_BATCH_SIZE', '1000'))
+BULK_MAX_REPORTED_ERRORS = int(os.environ.get('BULK_MAX_REPORTED_ERRORS', '1000'))
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+IMPORT_MODES = ("insert", "upsert")
+
+
+class BulkImportReport:
+    def __init__(self):
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    def fail(self, row: int, error: str):
+        self.failed += 1
+        if len(self.errors) < BULK_MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": error})
+
+    def to_dict(self) -> dict:
+        return {"inserted": self.inserted, "updated": self.updated, "failed": self.failed, "errors": self.errors}
+
+
+# ============================================
+# Reading records
+# ============================================
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into decoded lines, line endings kept"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        lines = pending.splitlines(keepends=True)
+        # The last piece may be an incomplete line
+        pending = lines.pop() if lines and not lines[-1].endswith(("\n", "\r")) else ""
+        for line in lines:
+            yield line
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def _csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, str]]:
+    """Group lines into CSV records, a quoted field may span several lines"""
+    record, row = "", 0
+    async for line in lines:
+        record += line
+        # Quotes are doubled inside quoted fields, so an odd count means the record continues
+        if record.count('"') % 2:
+            continue
+        row += 1
+        if record.strip():
+            yield row, record
+        record = ""
+    if record.strip():
+        yield row + 1, record
+
+
+def _csv_value(value: str):
+    if value == "":
+        return None
+    if value[0] in "[{":
+        try:
+            return json.loads(value)
+        except ValueError:
+            pass
+    return value
+
+
+async def read_records(lines: AsyncIterator[str], fmt: str) -> AsyncIterator[Tuple[int, object]]:
+    """
+    Yields (row number, record) pairs
+    - The record is the reason as a str when the row cannot be parsed
+    """
+    if fmt == "ndjson":
+        row = 0
+        async for line in lines:
+            row += 1
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield row, f"Invalid JSON: {e}"
+                continue
+            yield row, record if isinstance(record, dict) else "Expected a JSON object"
+        return
+
+    header = None
+    async for row, raw in _csv_records(lines):
+        try:
+            values = next(csv.reader([raw]))
+        except csv.Error as e:
+            yield row, f"Invalid CSV: {e}"
+            continue
+        if header is None:
+            header = values
+            continue
+        if len(values) != len(header):
+            yield row, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        record = {name: _csv_value(value) for name, value in zip(header, values)}
+        yield row, {name: value for name, value in record.items() if value is not None}
+
+
+# ============================================
+# Import
+# ============================================
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'record'}: {e['msg']}" for e in error.errors()
+    )
+
+
+async def _write_batch(
+    collection, batch: List[Tuple[int, dict]], mode: str, report: BulkImportReport, prepare, written
+):
+    docs = [doc for _, doc in batch]
+    if prepare is not None:
+        await prepare(docs)
+    try:
+        if mode == "upsert":
+            result = await collection.bulk_write(
+                [ReplaceOne({"id": doc["id"]}, doc, upsert=True) for doc in docs], ordered=False
+            )
+            report.inserted += result.upserted_count
+            report.updated += result.matched_count
+        else:
+            # insert_many adds _id to the dicts, the report only needs the ids
+            result = await collection.insert_many(docs, ordered=False)
+            report.inserted += len(result.inserted_ids)
+        ids = [doc["id"] for doc in docs]
+    except BulkWriteError as e:
+        details = e.details
+        failed = {error["index"]: error["errmsg"] for error in details.get("writeErrors", [])}
+        report.inserted += details.get("nInserted", 0) + details.get("nUpserted", 0)
+        report.updated += details.get("nMatched", 0)
+        ids = []
+        for index, (row, doc) in enumerate(batch):
+            if index in failed:
+                report.fail(row, failed[index])
+            else:
+                ids.append(doc["id"])
+    if written is not None and ids:
+        written(ids)
+
+
+async def import_records(
+    collection, model: Type[BaseModel], records: AsyncIterator[Tuple[int, object]], mode: str = "insert",
+    prepare: Optional[Callable[[List[dict]], Awaitable[None]]] = None,
+    written: Optional[Callable[[List[str]], None]] = None,
+) -> BulkImportReport:
+    """
+    Validate and write `records` (from read_records) in batches
+    - `prepare` is awaited with each batch of documents before it is written
+    - `written` is called with the ids each batch wrote, which are not kept,
+      so memory stays bounded by the batch size whatever the import size
+    """
+    report = BulkImportReport()
+    batch: List[Tuple[int, dict]] = []
+    async for row, record in records:
+        if isinstance(record, str):
+            report.fail(row, record)
+            continue
+        try:
+            doc = model.model_validate(record).model_dump()
+        except ValidationError as e:
+            report.fail(row, _validation_message(e))
+            continue
+        batch.append((row, doc))
+        if len(batch) >= BULK_BATCH_SIZE:
+            await _write_batch(collection, batch, mode, report, prepare, written)
+            batch = []
+    if batch:
+        await _write_batch(collection, batch, mode, report, prepare, written)
+    return report
+
+
+# ============================================
+# Export
+# ============================================
+def _csv_line(values: Iterable) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow(values)
+    return buffer.getvalue()
+
+
+def _csv_cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    # Numbers, booleans, dates and nested values use their JSON form
+    encoded = dumps(value).decode("utf-8")
+    return encoded[1:-1] if encoded.startswith('"') else encoded
+
+
+async def export_records(collection, model: Type[BaseModel], fmt: str, query: dict = None) -> AsyncIterator[bytes]:
+    """Encoded records of `collection`, in insertion order"""
+    fields = list(model.model_fields)
+    if fmt == "csv":
+        yield _csv_line(fields).encode("utf-8")
+    cursor = collection.find(query or {}, model_projection(model), batch_size=BULK_BATCH_SIZE).sort("_id", 1)
+    async for doc in cursor:
+        apply_defaults(model, [doc])
+        if fmt == "csv":
+            yield _csv_line(_csv_cell(doc.get(name)) for name in fields).encode("utf-8")
+        else:
+            yield dumps(doc) + b"\n"
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Bulk import and export of clients, projects and bookings
+
+Talks to MongoDB directly (MONGO_URL / DB_NAME from backend .env) with
+the same validation and batching as POST /api/import/{collection} and
+GET /api/export/{collection}. The format follows the file extension
+(.ndjson or .csv) unless --format is given; "-" reads stdin or writes
+stdout.
+
+    python bulk_data.py import clients clients.ndjson [--mode upsert]
+    python bulk_data.py export projects projects.csv
+
+A running API keeps cached share pages and portfolio responses for up
+to RESPONSE_CACHE_TTL_SECONDS after an import from here.
+"""
+import argparse
+import asyncio
+import sys
+
+from bulk import FORMATS, IMPORT_MODES, export_records, read_records
+from server import BULK_MODELS, bulk_import, db, mongo
+
+
+def detect_format(path: str, fmt: str) -> str:
+    if fmt:
+        return fmt
+    for name in FORMATS:
+        if path.endswith(f".{name}"):
+            return name
+    sys.exit(f"Cannot tell the format of {path}, pass --format")
+
+
+async def file_lines(handle):
+    for line in handle:
+        yield line
+
+
+async def run_import(collection: str, path: str, fmt: str, mode: str):
+    handle = sys.stdin if path == "-" else open(path, encoding="utf-8-sig", newline="")
+    try:
+        report = await bulk_import(collection, read_records(file_lines(handle), fmt), mode)
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+    print(f"✅ {report['inserted']} inserted, {report['updated']} updated, {report['failed']} failed")
+    for error in report["errors"]:
+        print(f"   row {error['row']}: {error['error']}")
+    if report["failed"] > len(report["errors"]):
+        print(f"   ... {report['failed'] - len(report['errors'])} more")
+
+
+async def run_export(collection: str, path: str, fmt: str):
+    handle = sys.stdout.buffer if path == "-" else open(path, "wb")
+    count = 0
+    try:
+        async for chunk in export_records(db[collection], BULK_MODELS[collection], fmt):
+            handle.write(chunk)
+            count += 1
+    finally:
+        if path != "-":
+            handle.close()
+    if fmt == "csv":
+        count -= 1
+    print(f"✅ Exported {count} {collection} to {path}", file=sys.stderr)
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("collection", choices=sorted(BULK_MODELS))
+    parser.add_argument("path", help='file to read or write, "-" for stdin/stdout')
+    parser.add_argument("--format", choices=sorted(FORMATS))
+    parser.add_argument("--mode", choices=IMPORT_MODES, default="insert",
+                        help="upsert replaces records with the same id")
+    args = parser.parse_args()
+
+    fmt = detect_format(args.path, args.format)
+    await mongo.open()
+    try:
+        if args.action == "import":
+            await run_import(args.collection, args.path, fmt, args.mode)
+        else:
+            await run_export(args.collection, args.path, fmt)
+    finally:
+        mongo.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
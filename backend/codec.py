@@ -0,0 +1,26 @@
+"""
+Storage codec for ProjectVeo
+
+Timestamps are stored as native BSON dates. The database handle is
+opened with CODEC_OPTIONS so the driver decodes them straight into
+timezone-aware UTC datetimes; handlers never convert dates themselves.
+"""
+
+from bson.codec_options import CodecOptions
+
+CODEC_OPTIONS = CodecOptions(tz_aware=True)
+
+# Every datetime field per collection, used by migrate_dates.py
+DATE_FIELDS = {
+    "users": ["created_at"],
+    "clients": ["created_at"],
+    "projects": ["created_at", "start_date", "deadline"],
+    "messages": ["created_at"],
+    "files": ["created_at"],
+    "srs_documents": ["created_at"],
+    "bookings": ["created_at"],
+}
+
+
+def get_database(client, name: str, **options):
+    return client.get_database(name, codec_options=CODEC_OPTIONS, **options)
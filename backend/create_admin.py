@@ -50,7 +50,7 @@ async def create_admin_user():
             "name": admin_name,
             "role": "admin",
             "hashed_password": hashed_password,
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "created_at": datetime.now(timezone.utc)
         }
         
         await db.users.insert_one(admin_user)
@@ -0,0 +1,133 @@
+"""
+Dashboard statistics for ProjectVeo
+
+Counters and revenue sums are computed inside Mongo with a single
+$group over projects (plus two indexed counts run concurrently), so the
+cost no longer includes shipping project documents to Python.
+
+With DASHBOARD_STATS_INCREMENTAL=true the result is also kept in one
+document of the `stats` collection, adjusted with $inc on every
+client/project/booking write, which makes the dashboard an O(1) read.
+"""
+import asyncio
+import os
+from typing import Optional
+
+ACTIVE_STATUSES = ["designing", "development", "testing", "revision"]
+DASHBOARD_STATS_INCREMENTAL = os.environ.get('DASHBOARD_STATS_INCREMENTAL', 'false').lower() == 'true'
+STATS_DOC_ID = "dashboard"
+
+COUNTERS = [
+    "total_clients",
+    "total_projects",
+    "active_projects",
+    "completed_projects",
+    "pending_bookings",
+    "total_revenue",
+    "total_paid",
+]
+
+
+def _public(stats: dict) -> dict:
+    return {
+        "total_clients": stats["total_clients"],
+        "total_projects": stats["total_projects"],
+        "active_projects": stats["active_projects"],
+        "completed_projects": stats["completed_projects"],
+        "pending_bookings": stats["pending_bookings"],
+        "total_revenue": stats["total_revenue"],
+        "pending_payments": stats["total_revenue"] - stats["total_paid"],
+    }
+
+
+async def compute_dashboard_stats(db) -> dict:
+    """Raw counters computed from scratch by the database"""
+    pipeline = [
+        {
+            "$group": {
+                "_id": None,
+                "total_projects": {"$sum": 1},
+                "active_projects": {"$sum": {"$cond": [{"$in": ["$status", ACTIVE_STATUSES]}, 1, 0]}},
+                "completed_projects": {"$sum": {"$cond": [{"$eq": ["$status", "completed"]}, 1, 0]}},
+                "total_revenue": {"$sum": {"$ifNull": ["$total_price", 0]}},
+                "total_paid": {"$sum": {"$ifNull": ["$amount_paid", 0]}},
+            }
+        }
+    ]
+    projects, total_clients, pending_bookings = await asyncio.gather(
+        db.projects.aggregate(pipeline).to_list(1),
+        db.clients.count_documents({}),
+        db.bookings.count_documents({"status": "pending"}),
+    )
+    stats = {counter: 0 for counter in COUNTERS}
+    if projects:
+        stats.update({k: v for k, v in projects[0].items() if k != "_id"})
+    stats["total_clients"] = total_clients
+    stats["pending_bookings"] = pending_bookings
+    return stats
+
+
+async def rebuild_dashboard_stats(db) -> dict:
+    stats = await compute_dashboard_stats(db)
+    await db.stats.replace_one({"_id": STATS_DOC_ID}, stats, upsert=True)
+    return stats
+
+
+async def load_dashboard_stats(db) -> dict:
+    if DASHBOARD_STATS_INCREMENTAL:
+        stats = await db.stats.find_one({"_id": STATS_DOC_ID})
+        if stats is None:
+            stats = await rebuild_dashboard_stats(db)
+        return _public(stats)
+    return _public(await compute_dashboard_stats(db))
+
+
+# ============================================
+# Incremental maintenance, called from write handlers
+# ============================================
+def _project_counters(project: Optional[dict]) -> dict:
+    if not project:
+        return {}
+    status = project.get("status")
+    return {
+        "total_projects": 1,
+        "active_projects": 1 if status in ACTIVE_STATUSES else 0,
+        "completed_projects": 1 if status == "completed" else 0,
+        "total_revenue": project.get("total_price") or 0,
+        "total_paid": project.get("amount_paid") or 0,
+    }
+
+
+def _booking_counters(booking: Optional[dict]) -> dict:
+    if not booking:
+        return {}
+    return {"pending_bookings": 1 if booking.get("status") == "pending" else 0}
+
+
+async def _apply(db, before: dict, after: dict):
+    if not DASHBOARD_STATS_INCREMENTAL:
+        return
+    inc = {k: after.get(k, 0) - before.get(k, 0) for k in set(before) | set(after)}
+    inc = {k: v for k, v in inc.items() if v}
+    if inc:
+        # Only adjust an existing document, a missing one is rebuilt on the next read
+        await db.stats.update_one({"_id": STATS_DOC_ID}, {"$inc": inc})
+
+
+async def record_client_change(db, delta: int):
+    await _apply(db, {}, {"total_clients": delta})
+
+
+async def record_project_change(db, before: Optional[dict], after: Optional[dict]):
+    """Pass the project as it was before and after the write (None if absent)"""
+    await _apply(db, _project_counters(before), _project_counters(after))
+
+
+async def record_booking_change(db, before: Optional[dict], after: Optional[dict]):
+    await _apply(db, _booking_counters(before), _booking_counters(after))
+
+
+async def invalidate_dashboard_stats(db):
+    """For bulk writes that skip the record_* calls, the next read rebuilds the document"""
+    if DASHBOARD_STATS_INCREMENTAL:
+        await db.stats.delete_one({"_id": STATS_DOC_ID})
@@ -0,0 +1,142 @@
+"""
+MongoDB connection management for ProjectVeo
+
+One MongoConnection per process owns the Motor client. The client is
+created by open(), which the app's lifespan (or a script's main) calls
+inside the running event loop, and closed by close() on shutdown.
+`db` and `public_db` are DatabaseHandles, which can be handed to
+components at import time and resolve to the open client's databases on
+use; using one before open() raises RuntimeError.
+
+Two database handles share the pool:
+- `db` for everything, using MONGO_READ_PREFERENCE
+- `public_db` for read-heavy public endpoints (portfolio, share page,
+  messages, files, SRS), using MONGO_PUBLIC_READ_PREFERENCE, so they can
+  be served from secondaries while writes and admin reads stay on the
+  primary. Secondary reads may lag the primary slightly.
+
+Configuration (backend .env):
+- MONGO_MAX_POOL_SIZE / MONGO_MIN_POOL_SIZE: connections per server
+- MONGO_MAX_IDLE_TIME_MS: close connections idle for longer than this
+- MONGO_WAIT_QUEUE_TIMEOUT_MS: fail an operation that waited this long
+  for a free connection
+- MONGO_SERVER_SELECTION_TIMEOUT_MS: how long to look for a usable server
+- MONGO_READ_PREFERENCE / MONGO_PUBLIC_READ_PREFERENCE: primary,
+  primaryPreferred, secondary, secondaryPreferred or nearest
+- MONGO_READ_CONCERN: local, available, majority, ... (server default if unset)
+
+Pool and timeout settings left unset keep the value from MONGO_URL, or
+the driver default (maxPoolSize 100, minPoolSize 0, no idle or wait
+queue limit, 30s server selection).
+"""
+import logging
+import os
+from typing import Iterable
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReadPreference
+from pymongo.read_concern import ReadConcern
+
+from codec import get_database
+from metrics import MONGO_POOL_MAX_SIZE, MongoPoolMetrics
+
+# Environment variable -> MongoClient option
+POOL_OPTIONS = {
+    "MONGO_MAX_POOL_SIZE": "maxPoolSize",
+    "MONGO_MIN_POOL_SIZE": "minPoolSize",
+    "MONGO_MAX_IDLE_TIME_MS": "maxIdleTimeMS",
+    "MONGO_WAIT_QUEUE_TIMEOUT_MS": "waitQueueTimeoutMS",
+    "MONGO_SERVER_SELECTION_TIMEOUT_MS": "serverSelectionTimeoutMS",
+}
+MONGO_READ_PREFERENCE = os.environ.get('MONGO_READ_PREFERENCE', 'primary')
+MONGO_PUBLIC_READ_PREFERENCE = os.environ.get('MONGO_PUBLIC_READ_PREFERENCE', MONGO_READ_PREFERENCE)
+MONGO_READ_CONCERN = os.environ.get('MONGO_READ_CONCERN', '')
+
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+logger = logging.getLogger(__name__)
+
+
+def read_preference(name: str):
+    if name not in READ_PREFERENCES:
+        raise ValueError(f"Unknown read preference: {name}")
+    return READ_PREFERENCES[name]
+
+
+def client_options() -> dict:
+    """Pool and timeout settings given in the environment, they take precedence over MONGO_URL"""
+    return {option: int(os.environ[env]) for env, option in POOL_OPTIONS.items() if os.environ.get(env)}
+
+
+class DatabaseHandle:
+    """One of the connection's databases, forwarding attribute and item access to it once open"""
+
+    def __init__(self, connection: "MongoConnection", kind: str):
+        self._connection = connection
+        self._kind = kind
+
+    def get(self):
+        database = self._connection.databases.get(self._kind)
+        if database is None:
+            raise RuntimeError("MongoDB is not open, call MongoConnection.open() first")
+        return database
+
+    def __getattr__(self, name: str):
+        return getattr(self.get(), name)
+
+    def __getitem__(self, name: str):
+        return self.get()[name]
+
+
+class MongoConnection:
+    def __init__(self, url: str, db_name: str, event_listeners: Iterable = ()):
+        self.url = url
+        self.db_name = db_name
+        self.event_listeners = list(event_listeners)
+        self.client = None
+        self.databases = {}
+        self.db = DatabaseHandle(self, "db")
+        self.public_db = DatabaseHandle(self, "public_db")
+
+    def _connect(self):
+        self.client = AsyncIOMotorClient(
+            self.url, event_listeners=[*self.event_listeners, MongoPoolMetrics()], **client_options()
+        )
+        read_concern = ReadConcern(MONGO_READ_CONCERN) if MONGO_READ_CONCERN else None
+        self.databases = {
+            "db": get_database(
+                self.client, self.db_name,
+                read_preference=read_preference(MONGO_READ_PREFERENCE), read_concern=read_concern,
+            ),
+            "public_db": get_database(
+                self.client, self.db_name,
+                read_preference=read_preference(MONGO_PUBLIC_READ_PREFERENCE), read_concern=read_concern,
+            ),
+        }
+        MONGO_POOL_MAX_SIZE.set(self.client.options.pool_options.max_pool_size)
+
+    async def open(self):
+        """Create the client and check the deployment answers, failures to answer are logged rather than raised"""
+        if self.client is None:
+            self._connect()
+        try:
+            await self.client.admin.command("ping")
+            pool = self.client.options.pool_options
+            logger.info(
+                f"Connected to MongoDB (maxPoolSize={pool.max_pool_size}, minPoolSize={pool.min_pool_size}, "
+                f"readPreference={MONGO_READ_PREFERENCE}, public readPreference={MONGO_PUBLIC_READ_PREFERENCE})"
+            )
+        except Exception as e:
+            logger.error(f"MongoDB is not reachable: {e}")
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+            self.databases = {}
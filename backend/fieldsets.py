@@ -0,0 +1,91 @@
+"""
+Sparse fieldsets for list endpoints
+
+Callers pick the fields they need, either with a named view
+(?view=summary) or an explicit list (?fields=title,status,deadline).
+The choice becomes a slim copy of the response model, built once per
+field set, and the route reads and encodes through it:
+
+- model_projection(slim) fetches only those fields from MongoDB
+- page_response(slim, page) encodes only those fields
+
+`id` and `created_at` are always included, the pagination cursor is
+built from them. Without view/fields the full model is used.
+"""
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Optional, Type
+
+from fastapi import HTTPException, Query
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, create_model
+
+from pagination import Page
+from serialisation import FAST_SERIALISATION, page_response
+
+REQUIRED_FIELDS = ("id", "created_at")
+DETAIL_VIEW = "detail"
+
+
+class FieldsetParams:
+    """Query parameters selecting a view or field list"""
+
+    def __init__(
+        self,
+        view: Optional[str] = Query(None, description="Named set of fields, e.g. summary or detail"),
+        fields: Optional[str] = Query(None, description="Comma-separated fields, overrides view"),
+    ):
+        self.view = view
+        self.fields = fields
+
+
+class Fieldsets:
+    """Named views of one model"""
+
+    def __init__(self, model: Type[BaseModel], views: Dict[str, Iterable[str]], hidden: Iterable[str] = ()):
+        self.model = model
+        # Fields that can never be requested, e.g. secrets on public endpoints
+        self.hidden = frozenset(hidden)
+        self.views = {name: self._checked(fields) for name, fields in views.items()}
+
+    def _checked(self, fields: Iterable[str]) -> FrozenSet[str]:
+        selected = frozenset(fields) | frozenset(REQUIRED_FIELDS)
+        unknown = selected - set(self.model.model_fields)
+        if unknown:
+            raise ValueError(f"{self.model.__name__} has no fields {', '.join(sorted(unknown))}")
+        return selected - self.hidden
+
+    def select(self, params: FieldsetParams) -> Type[BaseModel]:
+        """Model to read and respond with, raises 400 for unknown views or fields"""
+        if params.fields:
+            requested = [f.strip() for f in params.fields.split(",") if f.strip()]
+            unknown = set(requested) - set(self.model.model_fields) | (set(requested) & self.hidden)
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+            selected = self._checked(requested)
+        elif params.view and params.view != DETAIL_VIEW:
+            if params.view not in self.views:
+                views = ", ".join(sorted([*self.views, DETAIL_VIEW]))
+                raise HTTPException(status_code=400, detail=f"Unknown view: {params.view} (expected {views})")
+            selected = self.views[params.view]
+        else:
+            selected = frozenset(self.model.model_fields) - self.hidden
+        if selected == frozenset(self.model.model_fields):
+            return self.model
+        return slim_model(self.model, selected)
+
+
+@lru_cache(maxsize=256)
+def slim_model(model: Type[BaseModel], fields: FrozenSet[str]) -> Type[BaseModel]:
+    """Copy of `model` with only `fields`, in the model's field order"""
+    definitions = {
+        name: (field.annotation, field) for name, field in model.model_fields.items() if name in fields
+    }
+    return create_model(f"{model.__name__}Fields", __config__=model.model_config, **definitions)
+
+
+def fieldset_response(model: Type[BaseModel], page: dict):
+    """page_response for a model that may be slim"""
+    if FAST_SERIALISATION:
+        return page_response(model, page)
+    # The route's response_model is the full model, validate against the slim one instead
+    return JSONResponse(Page[model].model_validate(page).model_dump(mode="json"))
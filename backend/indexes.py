@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Index management for ProjectVeo
+
+Declares every index the API relies on and builds them idempotently.
+Runs at server startup and can be run by hand:
+
+    python indexes.py            # build missing indexes
+    python indexes.py --report   # list queries that still scan a collection
+"""
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from dotenv import load_dotenv
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+
+from job_queue import JOB_RETENTION_DAYS
+from sync import SYNC_TOMBSTONE_TTL_DAYS
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# Index declarations, one list per collection
+# ============================================
+def text_index(weights: Dict[str, int]) -> IndexModel:
+    """Text index for search.py, one per collection is all MongoDB allows"""
+    return IndexModel(
+        [(field, TEXT) for field in weights], name="search_text", weights=weights,
+        default_language="english", language_override="search_language",
+    )
+
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "clients": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("created_at", ASCENDING), ("id", ASCENDING)], name="created_at_id"),
+        text_index({"name": 5, "company": 3}),
+    ],
+    "projects": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("share_link", ASCENDING)], name="share_link_unique", unique=True),
+        IndexModel([("is_portfolio", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)], name="is_portfolio_created_at_id"),
+        IndexModel([("status", ASCENDING)], name="status"),
+        IndexModel([("created_at", ASCENDING), ("id", ASCENDING)], name="created_at_id"),
+        IndexModel([("client_id", ASCENDING), ("status", ASCENDING)], name="client_id_status"),
+        IndexModel([("revision", ASCENDING)], name="revision"),
+        text_index({"title": 5, "description": 1}),
+    ],
+    "messages": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("project_id", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)], name="project_id_created_at_id"),
+        IndexModel([("revision", ASCENDING)], name="revision"),
+        text_index({"message": 1}),
+    ],
+    "files": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("project_id", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)], name="project_id_created_at_id"),
+        IndexModel([("content_hash", ASCENDING), ("storage_status", ASCENDING)], name="content_hash_storage_status"),
+        IndexModel([("revision", ASCENDING)], name="revision"),
+    ],
+    "srs_documents": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("project_id", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)], name="project_id_created_at_id"),
+        IndexModel([("content_hash", ASCENDING), ("storage_status", ASCENDING)], name="content_hash_storage_status"),
+        IndexModel([("revision", ASCENDING)], name="revision"),
+    ],
+    "project_deletions": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("status", ASCENDING)], name="status"),
+    ],
+    "rate_limits": [
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "jobs": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("type", ASCENDING), ("status", ASCENDING), ("run_at", ASCENDING)], name="type_status_run_at"),
+        # Only completed and dead jobs have finished_at
+        IndexModel([("finished_at", ASCENDING)], name="finished_at_ttl",
+                   expireAfterSeconds=JOB_RETENTION_DAYS * 24 * 3600),
+    ],
+    "bookings": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("status", ASCENDING)], name="status"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id_desc"),
+        IndexModel([("revision", ASCENDING)], name="revision"),
+        text_index({"project_idea": 1}),
+    ],
+    "sync_tombstones": [
+        IndexModel([("revision", ASCENDING)], name="revision"),
+        IndexModel([("updated_at", ASCENDING)], name="updated_at_ttl",
+                   expireAfterSeconds=SYNC_TOMBSTONE_TTL_DAYS * 24 * 3600),
+    ],
+}
+
+# Query shapes issued by server.py: (collection, filter, sort)
+QUERY_SHAPES: List[Tuple[str, dict, list]] = [
+    ("users", {"id": ""}, []),
+    ("users", {"email": ""}, []),
+    ("clients", {"id": ""}, []),
+    ("projects", {"id": ""}, []),
+    ("projects", {"share_link": ""}, []),
+    ("projects", {"is_portfolio": True}, []),
+    ("projects", {"status": "completed"}, []),
+    ("projects", {"client_id": "", "status": "active"}, []),
+    ("messages", {"project_id": ""}, [("created_at", ASCENDING), ("id", ASCENDING)]),
+    ("files", {"project_id": ""}, []),
+    ("files", {"id": ""}, []),
+    ("files", {"content_hash": "", "storage_status": "pending"}, []),
+    ("srs_documents", {"project_id": ""}, []),
+    ("srs_documents", {"id": ""}, []),
+    ("srs_documents", {"content_hash": "", "storage_status": "pending"}, []),
+    ("jobs", {"type": "", "status": "queued", "run_at": {"$lte": 0}}, [("run_at", ASCENDING)]),
+    ("bookings", {"id": ""}, []),
+    ("bookings", {"status": "pending"}, []),
+    ("bookings", {}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    *((collection, {"revision": {"$gt": 0}}, [("revision", ASCENDING)])
+      for collection in ("projects", "messages", "files", "srs_documents", "bookings")),
+    ("sync_tombstones", {"revision": {"$gt": 0}, "collection": {"$in": []}}, [("revision", ASCENDING)]),
+]
+
+
+async def ensure_indexes(db) -> Dict[str, List[str]]:
+    """
+    Create every declared index that does not exist yet
+    - Safe to call on every startup, existing indexes are left alone
+    - Each index is created on its own, so a failing one (e.g. duplicate
+      emails) is logged and does not hold back the others
+    """
+    created: Dict[str, List[str]] = {}
+    for collection, models in INDEXES.items():
+        existing = await db[collection].index_information()
+        for model in models:
+            name = model.document["name"]
+            if name in existing:
+                continue
+            try:
+                await db[collection].create_indexes([model])
+            except OperationFailure as e:
+                logger.error(f"Index creation failed on {collection}.{name}: {e}")
+                continue
+            created.setdefault(collection, []).append(name)
+        if collection in created:
+            logger.info(f"Created indexes on {collection}: {', '.join(created[collection])}")
+    return created
+
+
+def _plan_stages(plan: dict) -> List[str]:
+    stages = [plan.get("stage", "")]
+    if "inputStage" in plan:
+        stages += _plan_stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        stages += _plan_stages(child)
+    return stages
+
+
+async def find_unindexed_queries(db) -> List[Tuple[str, dict, list]]:
+    """
+    Explain every known query shape and return those whose winning
+    plan still contains a COLLSCAN
+    """
+    unindexed = []
+    for collection, query, sort in QUERY_SHAPES:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+        if "COLLSCAN" in _plan_stages(plan):
+            unindexed.append((collection, query, sort))
+    return unindexed
+
+
+async def main(report: bool = False):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    ROOT_DIR = Path(__file__).parent
+    load_dotenv(ROOT_DIR / '.env')
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+
+    created = await ensure_indexes(db)
+    if created:
+        for collection, names in created.items():
+            print(f"✅ {collection}: {', '.join(names)}")
+    else:
+        print("✅ All indexes already exist")
+
+    if report:
+        unindexed = await find_unindexed_queries(db)
+        if unindexed:
+            print("\n⚠️  Queries running without an index:")
+            for collection, query, sort in unindexed:
+                print(f"   {collection}: filter={list(query)} sort={sort}")
+        else:
+            print("\n✅ Every known query is covered by an index")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(report="--report" in sys.argv))
@@ -0,0 +1,280 @@
+"""
+Background job queue for ProjectVeo
+
+Slow side effects (storage transfers, notifications, cascade deletes)
+are recorded as jobs in the `jobs` collection and executed by async
+workers, either inside the API process or in a separate one started
+with `python worker.py`. Only Mongo is needed.
+
+- Handlers are registered per job type with a per-process concurrency
+  limit and a maximum number of attempts
+- Failed jobs are retried with exponential backoff, then marked "dead"
+- Running jobs hold a lease (JOB_LEASE_SECONDS) that a heartbeat keeps
+  extending while the handler runs; a job whose worker died is picked up
+  again once its lease expires
+- stop() waits up to JOB_SHUTDOWN_SECONDS for running jobs, jobs still
+  running then are cancelled and queued again without using an attempt
+- Completed and dead jobs get `finished_at` and are removed by a TTL
+  index after JOB_RETENTION_DAYS (see indexes.py)
+"""
+import asyncio
+import logging
+import os
+import random
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+JOB_LEASE_SECONDS = float(os.environ.get('JOB_LEASE_SECONDS', '300'))
+JOB_POLL_SECONDS = float(os.environ.get('JOB_POLL_SECONDS', '5'))
+JOB_RETRY_BASE_SECONDS = float(os.environ.get('JOB_RETRY_BASE_SECONDS', '2'))
+JOB_RETRY_MAX_SECONDS = float(os.environ.get('JOB_RETRY_MAX_SECONDS', '600'))
+JOB_SHUTDOWN_SECONDS = float(os.environ.get('JOB_SHUTDOWN_SECONDS', '30'))
+JOB_RETENTION_DAYS = int(os.environ.get('JOB_RETENTION_DAYS', '7'))
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[dict], Awaitable[Optional[dict]]]
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(JOB_RETRY_MAX_SECONDS, JOB_RETRY_BASE_SECONDS * 2 ** attempts))
+
+
+class JobType:
+    def __init__(self, name: str, handler: JobHandler, concurrency: int, max_attempts: int,
+                 on_dead: Optional[Callable[[dict, str], Awaitable[None]]] = None):
+        self.name = name
+        self.handler = handler
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.on_dead = on_dead
+
+
+class JobQueue:
+    def __init__(self, db):
+        self.db = db
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._types: Dict[str, JobType] = {}
+        self._wakeup: Dict[str, asyncio.Event] = {}
+        self._workers: Set[asyncio.Task] = set()
+        # Handler runs in flight, drained by stop()
+        self._jobs: Set[asyncio.Task] = set()
+        self._running = False
+
+    def handler(self, name: str, concurrency: int = 2, max_attempts: int = 5, on_dead=None):
+        """
+        Decorator registering the coroutine that runs jobs of type `name`
+        - `on_dead(payload, error)` is awaited once the last attempt failed
+        """
+        def register(fn: JobHandler) -> JobHandler:
+            self._types[name] = JobType(name, fn, concurrency, max_attempts, on_dead)
+            return fn
+        return register
+
+    async def enqueue(self, name: str, payload: dict, delay: float = 0, job_id: Optional[str] = None) -> dict:
+        """
+        Queue a job
+        - With a fixed `job_id` the job is queued only if no job with that id
+          exists yet (finished ones are kept for JOB_RETENTION_DAYS)
+        """
+        if name not in self._types:
+            raise ValueError(f"Unknown job type: {name}")
+        job = {
+            "id": job_id or str(uuid.uuid4()),
+            "type": name,
+            "payload": payload,
+            "status": "queued",
+            "attempts": 0,
+            "max_attempts": self._types[name].max_attempts,
+            "run_at": _now() + timedelta(seconds=delay),
+            "locked_by": None,
+            "locked_until": None,
+            "error": None,
+            "result": None,
+            "created_at": _now(),
+            "updated_at": _now(),
+        }
+        if job_id is None:
+            await self.db.jobs.insert_one(dict(job))
+        else:
+            try:
+                result = await self.db.jobs.update_one({"id": job_id}, {"$setOnInsert": job}, upsert=True)
+            except DuplicateKeyError:
+                # Raced with another process queuing the same id
+                return await self.get(job_id)
+            if result.upserted_id is None:
+                return await self.get(job_id)
+        if name in self._wakeup:
+            self._wakeup[name].set()
+        return job
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await self.db.jobs.find_one({"id": job_id}, {"_id": 0})
+
+    async def retry(self, job_id: str) -> bool:
+        """Queue a dead job again with fresh attempts"""
+        job = await self.db.jobs.find_one_and_update(
+            {"id": job_id, "status": "dead"},
+            {
+                "$set": {"status": "queued", "attempts": 0, "run_at": _now(), "error": None, "updated_at": _now()},
+                "$unset": {"finished_at": ""},
+            },
+            {"type": 1},
+        )
+        if job is None:
+            return False
+        if job["type"] in self._wakeup:
+            self._wakeup[job["type"]].set()
+        return True
+
+    async def _claim(self, name: str) -> Optional[dict]:
+        now = _now()
+        return await self.db.jobs.find_one_and_update(
+            {
+                "type": name,
+                "$or": [
+                    {"status": "queued", "run_at": {"$lte": now}},
+                    {"status": "running", "locked_until": {"$lt": now}},
+                ],
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "locked_by": self.worker_id,
+                    "locked_until": now + timedelta(seconds=JOB_LEASE_SECONDS),
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            projection={"_id": 0},
+            sort=[("run_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _finish(self, job: dict, update: dict, inc: Optional[dict] = None):
+        now = _now()
+        if update["status"] in ("completed", "dead"):
+            update = {**update, "finished_at": now}
+        change = {"$set": {**update, "locked_by": None, "locked_until": None, "updated_at": now}}
+        if inc:
+            change["$inc"] = inc
+        await self.db.jobs.update_one({"id": job["id"], "locked_by": self.worker_id}, change)
+
+    async def _heartbeat(self, job: dict):
+        """Extend the lease while the handler runs, so a long job is not claimed twice"""
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            try:
+                result = await self.db.jobs.update_one(
+                    {"id": job["id"], "locked_by": self.worker_id},
+                    {"$set": {"locked_until": _now() + timedelta(seconds=JOB_LEASE_SECONDS), "updated_at": _now()}},
+                )
+                if result.matched_count == 0:
+                    logger.warning(f"Job {job['type']} {job['id']} lost its lease while running")
+                    return
+            except Exception as e:
+                logger.error(f"Extending the lease of job {job['type']} {job['id']} failed: {e}")
+
+    async def _execute(self, job_type: JobType, job: dict):
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            result = await job_type.handler(job["payload"])
+            await self._finish(job, {"status": "completed", "result": result, "error": None})
+        except asyncio.CancelledError:
+            # Shutdown, hand the job back without counting the attempt
+            logger.warning(f"Job {job['type']} {job['id']} interrupted by shutdown, queued again")
+            await self._finish(job, {"status": "queued", "run_at": _now()}, inc={"attempts": -1})
+            raise
+        except Exception as e:
+            if job["attempts"] >= job["max_attempts"]:
+                logger.error(f"Job {job['type']} {job['id']} failed permanently: {e}")
+                await self._finish(job, {"status": "dead", "error": str(e)})
+                if job_type.on_dead is not None:
+                    try:
+                        await job_type.on_dead(job["payload"], str(e))
+                    except Exception as hook_error:
+                        logger.error(f"Dead-job hook for {job['type']} failed: {hook_error}")
+            else:
+                delay = retry_delay(job["attempts"])
+                logger.warning(f"Job {job['type']} {job['id']} failed (attempt {job['attempts']}), retrying in {delay:.0f}s: {e}")
+                await self._finish(job, {"status": "queued", "error": str(e), "run_at": _now() + timedelta(seconds=delay)})
+        finally:
+            heartbeat.cancel()
+
+    async def _work(self, job_type: JobType):
+        semaphore = asyncio.Semaphore(job_type.concurrency)
+        wakeup = self._wakeup[job_type.name]
+        while self._running:
+            await semaphore.acquire()
+            try:
+                job = await self._claim(job_type.name)
+            except Exception as e:
+                logger.error(f"Claiming {job_type.name} jobs failed: {e}")
+                job = None
+            if job is None:
+                semaphore.release()
+                wakeup.clear()
+                try:
+                    await asyncio.wait_for(wakeup.wait(), JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            async def run(job=job):
+                try:
+                    await self._execute(job_type, job)
+                finally:
+                    semaphore.release()
+
+            task = asyncio.create_task(run())
+            self._jobs.add(task)
+            task.add_done_callback(self._jobs.discard)
+
+    def start(self):
+        """Start one worker loop per registered job type in the running event loop"""
+        if self._running:
+            return
+        self._running = True
+        for name, job_type in self._types.items():
+            self._wakeup[name] = asyncio.Event()
+            task = asyncio.create_task(self._work(job_type))
+            self._workers.add(task)
+            task.add_done_callback(self._workers.discard)
+
+    async def stop(self, timeout: float = JOB_SHUTDOWN_SECONDS):
+        """Stop claiming jobs, then give running ones `timeout` seconds to finish"""
+        self._running = False
+        for task in list(self._workers):
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        if not self._jobs:
+            return
+        logger.info(f"Waiting for {len(self._jobs)} running jobs")
+        _, pending = await asyncio.wait(list(self._jobs), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    async def run_forever(self):
+        self.start()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await self.stop()
+
+    async def stats(self) -> dict:
+        pipeline = [{"$group": {"_id": {"type": "$type", "status": "$status"}, "count": {"$sum": 1}}}]
+        stats: Dict[str, Dict[str, int]] = {}
+        async for row in self.db.jobs.aggregate(pipeline):
+            stats.setdefault(row["_id"]["type"], {})[row["_id"]["status"]] = row["count"]
+        return stats
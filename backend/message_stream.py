@@ -0,0 +1,202 @@
+"""
+Real-time project message delivery
+
+create_message publishes every new message to a broker, and
+GET /api/messages/{project_id}/stream pushes them to browsers as
+server-sent events. Reconnecting clients send the last event id they
+saw (EventSource does this automatically via Last-Event-ID) and only
+receive the messages created after it. A fresh connect replays the last
+MESSAGE_STREAM_REPLAY_SECONDS of messages, covering those created while
+the page was loading its message list; clients drop repeats by id.
+
+Brokers (MESSAGE_BROKER in backend .env):
+- "memory" (default): in-process fan-out, correct for a single worker
+- "changestream": tails db.messages with a Mongo change stream, so every
+  worker sees every message; requires a replica set
+"""
+import asyncio
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, Optional, Set
+
+from fastapi.encoders import jsonable_encoder
+
+MESSAGE_BROKER = os.environ.get('MESSAGE_BROKER', 'memory')
+MESSAGE_STREAM_HEARTBEAT_SECONDS = float(os.environ.get('MESSAGE_STREAM_HEARTBEAT_SECONDS', '15'))
+MESSAGE_STREAM_QUEUE_SIZE = int(os.environ.get('MESSAGE_STREAM_QUEUE_SIZE', '100'))
+MESSAGE_STREAM_REPLAY_SECONDS = float(os.environ.get('MESSAGE_STREAM_REPLAY_SECONDS', '30'))
+
+logger = logging.getLogger(__name__)
+
+
+class MessageBroker(ABC):
+    """Interface every fan-out backend implements"""
+
+    @abstractmethod
+    async def publish(self, project_id: str, message: dict) -> None:
+        ...
+
+    @abstractmethod
+    def subscribe(self, project_id: str) -> "Subscription":
+        ...
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class Subscription:
+    """
+    Bounded queue of messages for one connected client
+    - A client that falls MESSAGE_STREAM_QUEUE_SIZE behind is dropped and
+      resumes from its last event id when it reconnects
+    """
+
+    def __init__(self, broker: "InMemoryBroker", project_id: str):
+        self.broker = broker
+        self.project_id = project_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=MESSAGE_STREAM_QUEUE_SIZE)
+        self.overflowed = False
+
+    def put(self, message: dict):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout: float) -> Optional[dict]:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker._unsubscribe(self)
+
+
+class InMemoryBroker(MessageBroker):
+    def __init__(self):
+        self._subscriptions: Dict[str, Set[Subscription]] = {}
+
+    async def publish(self, project_id: str, message: dict) -> None:
+        self._deliver(project_id, message)
+
+    def _deliver(self, project_id: str, message: dict):
+        for subscription in self._subscriptions.get(project_id, ()):
+            subscription.put(message)
+
+    def subscribe(self, project_id: str) -> Subscription:
+        subscription = Subscription(self, project_id)
+        self._subscriptions.setdefault(project_id, set()).add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscriptions.get(subscription.project_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscriptions[subscription.project_id]
+
+    def subscriber_count(self) -> int:
+        return sum(len(s) for s in self._subscriptions.values())
+
+
+class ChangeStreamBroker(InMemoryBroker):
+    """
+    Fans out inserts seen on a Mongo change stream instead of local publishes
+    - One change stream per worker, shared by all of its subscribers
+    - Started with the app rather than on first use, so inserts made before
+      the first subscriber of a worker are not skipped
+    - Resumes from the last seen resume token after a stream error
+    """
+
+    def __init__(self, db):
+        super().__init__()
+        self.db = db
+        self._task: Optional[asyncio.Task] = None
+
+    async def publish(self, project_id: str, message: dict) -> None:
+        # The insert itself reaches every worker through the change stream
+        pass
+
+    async def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._watch())
+
+    async def _watch(self):
+        pipeline = [{"$match": {"operationType": "insert"}}]
+        resume_token = None
+        while True:
+            try:
+                async with self.db.messages.watch(pipeline, resume_after=resume_token) as stream:
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        message = change["fullDocument"]
+                        message.pop("_id", None)
+                        self._deliver(message["project_id"], message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Message change stream failed, retrying: {e}")
+                await asyncio.sleep(1)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+
+
+def create_broker(db) -> MessageBroker:
+    if MESSAGE_BROKER == "changestream":
+        return ChangeStreamBroker(db)
+    return InMemoryBroker()
+
+
+def format_event(message: dict) -> str:
+    data = json.dumps(jsonable_encoder(message), separators=(",", ":"))
+    return f"id: {message['id']}\nevent: message\ndata: {data}\n\n"
+
+
+async def message_events(db, broker: MessageBroker, project_id: str,
+                         last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    Server-sent event stream for one project
+    - Subscribes before reading the backlog so nothing falls in between
+    - Backlog is every message after last_event_id, or the last
+      MESSAGE_STREAM_REPLAY_SECONDS of messages on a fresh connect (or when
+      last_event_id is unknown)
+    """
+    since = datetime.now(timezone.utc) - timedelta(seconds=MESSAGE_STREAM_REPLAY_SECONDS)
+    subscription = broker.subscribe(project_id)
+    sent: Set[str] = set()
+    try:
+        yield "retry: 3000\n\n"
+        query = {"project_id": project_id, "created_at": {"$gte": since}}
+        if last_event_id:
+            last = await db.messages.find_one({"id": last_event_id, "project_id": project_id},
+                                              {"_id": 0, "created_at": 1, "id": 1})
+            if last is not None:
+                query = {
+                    "project_id": project_id,
+                    "$or": [
+                        {"created_at": {"$gt": last["created_at"]}},
+                        {"created_at": last["created_at"], "id": {"$gt": last["id"]}},
+                    ],
+                }
+        cursor = db.messages.find(query, {"_id": 0}).sort([("created_at", 1), ("id", 1)])
+        async for message in cursor:
+            sent.add(message["id"])
+            yield format_event(message)
+
+        while not subscription.overflowed:
+            message = await subscription.get(MESSAGE_STREAM_HEARTBEAT_SECONDS)
+            if message is None:
+                yield ": keep-alive\n\n"
+            elif message["id"] not in sent:
+                yield format_event(message)
+    finally:
+        subscription.close()
@@ -0,0 +1,353 @@
+"""
+Prometheus metrics for ProjectVeo
+
+A small in-process registry rendered in the Prometheus text format on
+GET /metrics, with no client library needed:
+
+- http_request_duration_seconds and http_requests_in_flight, recorded by
+  MetricsMiddleware per route template ("/api/projects/{project_id}")
+- mongodb_command_duration_seconds per collection and command, fed by
+  pymongo command monitoring (MongoCommandMetrics)
+- mongodb_pool_* gauges and check-out wait times per server, fed by
+  pymongo connection pool monitoring (MongoPoolMetrics)
+- supabase_request_duration_seconds and password_hash_duration_seconds,
+  recorded with `observe()` around the calls
+
+Recording is a dict lookup and a few additions under a lock, cheap
+enough to leave on. Each worker process keeps its own registry.
+
+Configuration (backend .env):
+- METRICS_ENABLED: "false" turns off recording and the endpoint
+"""
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from pymongo import monitoring
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        ...
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(lines + self.samples())
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {v}" for k, v in values]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (+Inf last), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = [(k, list(counts), total) for k, (counts, total) in self._values.items()]
+        lines = []
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_label = f'le="{le}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, bucket_label)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]):
+        """`collector()` runs before each scrape, e.g. to set gauges from a stats() dict"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        return "\n".join(m.render() for m in self._metrics) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUEST_DURATION = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route", "status"],
+))
+HTTP_REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served",
+))
+MONGO_COMMAND_DURATION = registry.register(Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency by collection and command",
+    ["collection", "command", "outcome"],
+))
+MONGO_POOL_MAX_SIZE = registry.register(Gauge(
+    "mongodb_pool_max_size", "Configured maxPoolSize per server",
+))
+MONGO_POOL_CONNECTIONS = registry.register(Gauge(
+    "mongodb_pool_connections", "Open connections per server",
+    ["address"],
+))
+MONGO_POOL_CHECKED_OUT = registry.register(Gauge(
+    "mongodb_pool_checked_out", "Connections in use per server, saturation is this over mongodb_pool_max_size",
+    ["address"],
+))
+MONGO_POOL_WAITING = registry.register(Gauge(
+    "mongodb_pool_waiting", "Operations waiting for a connection per server",
+    ["address"],
+))
+MONGO_POOL_CHECKOUT_DURATION = registry.register(Histogram(
+    "mongodb_pool_checkout_duration_seconds", "Time to obtain a connection from the pool",
+    ["address"],
+))
+MONGO_POOL_CHECKOUT_FAILURES = registry.register(Counter(
+    "mongodb_pool_checkout_failures_total", "Failed connection check-outs by reason",
+    ["address", "reason"],
+))
+SUPABASE_REQUEST_DURATION = registry.register(Histogram(
+    "supabase_request_duration_seconds", "Supabase Storage call latency by operation",
+    ["operation", "outcome"], buckets=SLOW_BUCKETS,
+))
+PASSWORD_HASH_DURATION = registry.register(Histogram(
+    "password_hash_duration_seconds", "bcrypt time per call, excluding the wait for a worker",
+    ["operation"],
+))
+PASSWORD_HASH_QUEUE_DEPTH = registry.register(Gauge(
+    "password_hash_queue_depth", "bcrypt calls waiting for a worker",
+))
+RATE_LIMITED_REQUESTS = registry.register(Counter(
+    "rate_limited_requests_total", "Requests rejected with 429 by route",
+    ["route"],
+))
+
+
+@contextmanager
+def observe(histogram: Histogram, **labels):
+    """Time the block into `histogram`, adding outcome="error" on exceptions when it has that label"""
+    if not METRICS_ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        if "outcome" in histogram.labelnames:
+            labels["outcome"] = outcome
+        histogram.observe(time.perf_counter() - started, **labels)
+
+
+# ============================================
+# HTTP
+# ============================================
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency per route template
+    - Requests that match no route share route="unmatched" to keep
+      label cardinality bounded
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status["code"],
+            )
+
+
+# ============================================
+# MongoDB command monitoring
+# ============================================
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Pass to the client as event_listeners=[MongoCommandMetrics()]"""
+
+    def __init__(self):
+        self._collections: Dict[tuple, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(event) -> tuple:
+        return (event.connection_id, event.request_id)
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = ""
+        with self._lock:
+            self._collections[self._key(event)] = collection
+
+    def _finish(self, event, outcome: str):
+        with self._lock:
+            collection = self._collections.pop(self._key(event), "")
+        if METRICS_ENABLED:
+            MONGO_COMMAND_DURATION.observe(
+                event.duration_micros / 1e6, collection=collection, command=event.command_name, outcome=outcome
+            )
+
+    def succeeded(self, event):
+        self._finish(event, "ok")
+
+    def failed(self, event):
+        self._finish(event, "error")
+
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """Pass to the client as event_listeners=[MongoPoolMetrics()]"""
+
+    @staticmethod
+    def _address(event) -> str:
+        host, port = event.address
+        return f"{host}:{port}"
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        address = self._address(event)
+        MONGO_POOL_CONNECTIONS.set(0, address=address)
+        MONGO_POOL_CHECKED_OUT.set(0, address=address)
+        MONGO_POOL_WAITING.set(0, address=address)
+
+    def connection_created(self, event):
+        MONGO_POOL_CONNECTIONS.inc(address=self._address(event))
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        MONGO_POOL_CONNECTIONS.dec(address=self._address(event))
+
+    def connection_check_out_started(self, event):
+        MONGO_POOL_WAITING.inc(address=self._address(event))
+
+    def connection_check_out_failed(self, event):
+        address = self._address(event)
+        MONGO_POOL_WAITING.dec(address=address)
+        MONGO_POOL_CHECKOUT_FAILURES.inc(address=address, reason=event.reason)
+
+    def connection_checked_out(self, event):
+        address = self._address(event)
+        MONGO_POOL_WAITING.dec(address=address)
+        MONGO_POOL_CHECKED_OUT.inc(address=address)
+        if event.duration is not None:
+            MONGO_POOL_CHECKOUT_DURATION.observe(event.duration, address=address)
+
+    def connection_checked_in(self, event):
+        MONGO_POOL_CHECKED_OUT.dec(address=self._address(event))
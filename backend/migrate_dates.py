@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Convert ISO-string timestamps to native BSON dates
+
+Older records stored created_at / start_date / deadline as ISO strings.
+This walks every collection in DATE_FIELDS in batches and rewrites the
+string values as dates. It is safe to run while the API is serving
+traffic and safe to re-run: only fields that are still strings match.
+Values that are not ISO dates are left unchanged and listed with their
+record ids at the end, to be fixed by hand.
+
+Keyset pages compare created_at with $gt/$lt, which never matches across
+BSON types, so a collection mixing string and date values silently drops
+records. The API runs migrate_dates() at startup for that reason, but
+running this script before deploying is a required step: it keeps the
+startup pass to a quick check and reports the values it cannot parse.
+
+    python migrate_dates.py [--batch-size 500] [--dry-run]
+"""
+import argparse
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Tuple
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+from codec import DATE_FIELDS, get_database
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logger = logging.getLogger(__name__)
+
+
+def parse_date(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+async def migrate_collection(db, collection: str, fields: list, batch_size: int, dry_run: bool) -> Tuple[int, list]:
+    """
+    Convert the string dates of one collection
+    - Returns (converted, unparseable), unparseable lists (id, field, value)
+      for values left as they are
+    """
+    query = {"$or": [{field: {"$type": "string"}} for field in fields]}
+    if dry_run:
+        return await db[collection].count_documents(query), []
+
+    projection = {"id": 1, **{field: 1 for field in fields}}
+    converted = 0
+    unparseable = []
+    last_id = None
+
+    while True:
+        # Walks by _id, documents left unconverted still match the query
+        batch_query = query if last_id is None else {"$and": [query, {"_id": {"$gt": last_id}}]}
+        docs = await db[collection].find(batch_query, projection).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not docs:
+            break
+        last_id = docs[-1]["_id"]
+
+        ops = []
+        for doc in docs:
+            update = {}
+            for field in fields:
+                value = doc.get(field)
+                if isinstance(value, str):
+                    try:
+                        update[field] = parse_date(value)
+                    except ValueError:
+                        # Left for a human, None would break the required date fields
+                        unparseable.append((doc.get("id", doc["_id"]), field, value))
+            if update:
+                # Match on the original string values so a concurrent write is never overwritten
+                match = {"_id": doc["_id"], **{f: doc[f] for f in update}}
+                ops.append(UpdateOne(match, {"$set": update}))
+
+        if ops:
+            result = await db[collection].bulk_write(ops, ordered=False)
+            converted += result.modified_count
+        logger.info(f"{collection}: {converted} converted")
+
+    return converted, unparseable
+
+
+async def migrate_dates(db, batch_size: int = 500, dry_run: bool = False) -> Dict[str, Tuple[int, list]]:
+    """
+    Convert the string dates of every collection in DATE_FIELDS
+    - Returns {collection: (converted, unparseable)}
+    """
+    results = {}
+    for collection, fields in DATE_FIELDS.items():
+        results[collection] = await migrate_collection(db, collection, fields, batch_size, dry_run)
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="only count the documents to convert")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="   %(message)s")
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = get_database(client, os.environ['DB_NAME'])
+
+    results = await migrate_dates(db, args.batch_size, args.dry_run)
+    for collection, (count, unparseable) in results.items():
+        verb = "to convert" if args.dry_run else "converted"
+        print(f"✅ {collection}: {count} documents {verb}")
+        if unparseable:
+            print(f"⚠️  {collection}: {len(unparseable)} values could not be parsed and were left unchanged:")
+            for record_id, field, value in unparseable:
+                print(f"   {record_id}: {field}={value!r}")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
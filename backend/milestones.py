@@ -0,0 +1,109 @@
+"""
+Milestone updates for projects
+
+Each change is one find_one_and_update with an update pipeline. The
+pipeline edits the embedded `milestones` array and recomputes
+`progress` (the share of completed milestones, 0-100) from the edited
+array in the same write, so concurrent edits of different milestones
+never overwrite each other and progress always matches the milestones.
+Projects without milestones keep whatever progress was set by hand:
+project_update() builds the pipeline PUT /projects/{id} writes with, so
+a progress set there only sticks while the project has no milestones.
+Deleting the last milestone keeps the progress derived before it, which
+can then be set by hand again.
+Fields in `stamp` (the sync revision, see sync.py) are set by the same
+write.
+
+Every async function returns {"milestones": [...], "progress": int} as it is
+after the write, or None when the project (or milestone) does not exist.
+"""
+from typing import List, Optional
+
+from pymongo import ReturnDocument
+
+RESULT_PROJECTION = {"_id": 0, "milestones": 1, "progress": 1}
+
+_MILESTONES = {"$ifNull": ["$milestones", []]}
+
+
+def _progress_stage() -> dict:
+    completed = {"$size": {"$filter": {"input": _MILESTONES, "as": "m", "cond": "$$m.completed"}}}
+    total = {"$size": _MILESTONES}
+    return {"$set": {"progress": {"$cond": [
+        {"$gt": [total, 0]},
+        # Rounded half up to a whole percentage
+        {"$toInt": {"$floor": {"$add": [{"$divide": [{"$multiply": [completed, 100]}, total]}, 0.5]}}},
+        # Without milestones: set by hand, or as left by the last one deleted
+        "$progress",
+    ]}}}
+
+
+def project_update(fields: dict) -> list:
+    """Update pipeline setting `fields` on a project without overriding derived progress"""
+    return [{"$set": {name: {"$literal": value} for name, value in fields.items()}}, _progress_stage()]
+
+
+async def _update(collection, query: dict, milestones: dict, stamp: Optional[dict]) -> Optional[dict]:
+    fields = {name: {"$literal": value} for name, value in (stamp or {}).items()}
+    return await collection.find_one_and_update(
+        query,
+        [{"$set": {"milestones": milestones, **fields}}, _progress_stage()],
+        RESULT_PROJECTION,
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def add_milestone(collection, project_id: str, milestone: dict, stamp: Optional[dict] = None) -> Optional[dict]:
+    return await _update(
+        collection, {"id": project_id}, {"$concatArrays": [_MILESTONES, {"$literal": [milestone]}]}, stamp
+    )
+
+
+async def update_milestone(
+    collection, project_id: str, milestone_id: str, changes: dict, stamp: Optional[dict] = None
+) -> Optional[dict]:
+    """Apply `changes` (title and/or completed) to one milestone"""
+    return await _update(
+        collection,
+        {"id": project_id, "milestones.id": milestone_id},
+        {"$map": {"input": _MILESTONES, "as": "m", "in": {"$cond": [
+            {"$eq": ["$$m.id", milestone_id]},
+            {"$mergeObjects": ["$$m", {"$literal": changes}]},
+            "$$m",
+        ]}}},
+        stamp,
+    )
+
+
+async def delete_milestone(
+    collection, project_id: str, milestone_id: str, stamp: Optional[dict] = None
+) -> Optional[dict]:
+    return await _update(
+        collection,
+        {"id": project_id, "milestones.id": milestone_id},
+        {"$filter": {"input": _MILESTONES, "as": "m", "cond": {"$ne": ["$$m.id", milestone_id]}}},
+        stamp,
+    )
+
+
+async def reorder_milestones(
+    collection, project_id: str, milestone_ids: List[str], stamp: Optional[dict] = None
+) -> Optional[dict]:
+    """
+    Put the milestones in the order of `milestone_ids`
+    - Matches only while the ids are exactly the project's milestones, so a
+      concurrent add or delete makes the reorder fail instead of losing it
+    """
+    if len(set(milestone_ids)) != len(milestone_ids):
+        return None
+    query = {"id": project_id, "milestones": {"$size": len(milestone_ids)}}
+    if milestone_ids:
+        query["milestones.id"] = {"$all": milestone_ids}
+    return await _update(
+        collection,
+        query,
+        {"$map": {"input": {"$literal": milestone_ids}, "as": "id", "in": {"$arrayElemAt": [
+            {"$filter": {"input": _MILESTONES, "as": "m", "cond": {"$eq": ["$$m.id", "$$id"]}}}, 0
+        ]}}},
+        stamp,
+    )
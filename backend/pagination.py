@@ -0,0 +1,96 @@
+"""
+Keyset (cursor) pagination for ProjectVeo list endpoints
+
+Pages are ordered by (created_at, id) and continue from an opaque
+cursor rather than an offset, so every page costs one indexed range
+scan of `limit` documents no matter how large the collection grows.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Generic, List, Optional, TypeVar
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+from pymongo import ASCENDING, DESCENDING
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+
+class PageParams:
+    """Query parameters shared by every paginated endpoint"""
+
+    def __init__(
+        self,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        after: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    ):
+        self.limit = limit
+        self.after = after
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and "$date" in value:
+        return datetime.fromisoformat(value["$date"])
+    return value
+
+
+def encode_cursor(doc: dict) -> str:
+    raw = json.dumps([_encode_value(doc.get("created_at")), doc["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, doc_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return _decode_value(created_at), doc_id
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+async def paginate(collection, query: dict, params: PageParams, projection: Optional[dict] = None,
+                   descending: bool = False) -> dict:
+    """
+    Fetch one page of `collection` matching `query`
+    - Returns {"items": [...], "next_cursor": str | None}
+    - next_cursor is None on the last page
+    """
+    op = "$lt" if descending else "$gt"
+    if params.after:
+        created_at, doc_id = decode_cursor(params.after)
+        query = {
+            "$and": [
+                query,
+                {"$or": [
+                    {"created_at": {op: created_at}},
+                    {"created_at": created_at, "id": {op: doc_id}},
+                ]},
+            ]
+        }
+
+    direction = DESCENDING if descending else ASCENDING
+    cursor = collection.find(query, projection if projection is not None else {"_id": 0})
+    cursor = cursor.sort([("created_at", direction), ("id", direction)]).limit(params.limit + 1)
+    docs = await cursor.to_list(params.limit + 1)
+
+    next_cursor = None
+    if len(docs) > params.limit:
+        docs = docs[:params.limit]
+        next_cursor = encode_cursor(docs[-1])
+    return {"items": docs, "next_cursor": next_cursor}
@@ -0,0 +1,148 @@
+"""
+Password hashing for ProjectVeo
+
+bcrypt takes 100-300 ms per call, so hashing and verification run in a
+bounded worker pool instead of on the event loop.
+
+Configuration (backend .env):
+- BCRYPT_ROUNDS: cost factor for new hashes, existing hashes with a
+  different cost are rehashed transparently on the next login
+- PASSWORD_HASH_EXECUTOR: "thread" (default) or "process"
+- PASSWORD_HASH_WORKERS: pool size, also the concurrency limit
+"""
+import asyncio
+import logging
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+import bcrypt
+
+from metrics import PASSWORD_HASH_DURATION, observe
+
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+PASSWORD_HASH_EXECUTOR = os.environ.get('PASSWORD_HASH_EXECUTOR', 'thread')
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+
+# ============================================
+# Direct bcrypt helper functions
+# ============================================
+def hash_password(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    """
+    Hash a password using bcrypt
+    - Automatically handles 72 byte limit
+    - Returns string hash
+    """
+    password_bytes = password.encode('utf-8')
+    salt = bcrypt.gensalt(rounds=rounds)
+    hashed = bcrypt.hashpw(password_bytes, salt)
+    return hashed.decode('utf-8')
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password against its hash
+    - Returns True if matches, False otherwise
+    """
+    try:
+        plain_bytes = plain_password.encode('utf-8')
+        hashed_bytes = hashed_password.encode('utf-8')
+        return bcrypt.checkpw(plain_bytes, hashed_bytes)
+    except Exception as e:
+        logging.error(f"Password verification error: {e}")
+        return False
+
+
+def hash_rounds(hashed_password: str) -> Optional[int]:
+    """Cost factor encoded in a bcrypt hash ($2b$12$...), None if unparseable"""
+    parts = hashed_password.split('$')
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def needs_rehash(hashed_password: str, rounds: int = BCRYPT_ROUNDS) -> bool:
+    return hash_rounds(hashed_password) != rounds
+
+
+# ============================================
+# Bounded worker pool
+# ============================================
+class PasswordHasher:
+    """
+    Runs bcrypt in an executor with at most `workers` calls in flight
+    - Extra callers wait on a semaphore, which is the queue depth reported
+    - Process pools sidestep the GIL entirely, thread pools are cheaper
+      to start and sufficient because bcrypt releases the GIL
+    """
+
+    def __init__(self, executor: str = PASSWORD_HASH_EXECUTOR, workers: int = PASSWORD_HASH_WORKERS,
+                 rounds: int = BCRYPT_ROUNDS):
+        self.executor_kind = executor
+        self.workers = max(1, workers)
+        self.rounds = rounds
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.completed = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def _run(self, operation: str, fn, *args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        started = False
+        try:
+            async with self._semaphore:
+                self.queued -= 1
+                started = True
+                self.in_flight += 1
+                try:
+                    loop = asyncio.get_running_loop()
+                    with observe(PASSWORD_HASH_DURATION, operation=operation):
+                        return await loop.run_in_executor(self._get_executor(), fn, *args)
+                finally:
+                    self.in_flight -= 1
+                    self.completed += 1
+        finally:
+            if not started:
+                self.queued -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", hash_password, password, self.rounds)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run("verify", verify_password, plain_password, hashed_password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        return needs_rehash(hashed_password, self.rounds)
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.executor_kind,
+            "workers": self.workers,
+            "rounds": self.rounds,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queued,
+            "max_queue_depth": self.max_queued,
+            "completed": self.completed,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
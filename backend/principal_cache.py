@@ -0,0 +1,111 @@
+"""
+Principal cache for ProjectVeo
+
+Caches the user record resolved from a JWT subject so that
+get_current_user does not hit Mongo on every authenticated request.
+
+The in-process backend is the default. When running several uvicorn
+workers, install a shared backend with set_principal_cache(); it only
+has to implement the PrincipalCache interface below.
+"""
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.environ.get('PRINCIPAL_CACHE_TTL_SECONDS', '60'))
+PRINCIPAL_CACHE_MAX_SIZE = int(os.environ.get('PRINCIPAL_CACHE_MAX_SIZE', '10000'))
+
+
+class PrincipalCache(ABC):
+    """Interface every principal cache backend implements"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @abstractmethod
+    async def get(self, subject: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def set(self, subject: str, user: dict) -> None:
+        ...
+
+    @abstractmethod
+    async def invalidate(self, subject: str) -> None:
+        ...
+
+    @abstractmethod
+    async def clear(self) -> None:
+        ...
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+class InMemoryPrincipalCache(PrincipalCache):
+    """
+    Per-process cache with TTL expiry and LRU eviction
+    - Entries expire ttl seconds after they were stored
+    - Least recently used entry is dropped once max_size is reached
+    """
+
+    def __init__(self, ttl: float = PRINCIPAL_CACHE_TTL_SECONDS, max_size: int = PRINCIPAL_CACHE_MAX_SIZE):
+        super().__init__()
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def get(self, subject: str) -> Optional[dict]:
+        entry = self._entries.get(subject)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            del self._entries[subject]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(subject)
+        self.hits += 1
+        return user
+
+    async def set(self, subject: str, user: dict) -> None:
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        self._entries[subject] = (time.monotonic() + self.ttl, user)
+        self._entries.move_to_end(subject)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def invalidate(self, subject: str) -> None:
+        self._entries.pop(subject, None)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["size"] = len(self._entries)
+        return stats
+
+
+principal_cache: PrincipalCache = InMemoryPrincipalCache()
+
+
+def get_principal_cache() -> PrincipalCache:
+    return principal_cache
+
+
+def set_principal_cache(cache: PrincipalCache) -> None:
+    """Replace the active backend, e.g. with a shared cache for multi-worker setups"""
+    global principal_cache
+    principal_cache = cache
@@ -0,0 +1,294 @@
+"""
+Request profiling and slow query logging
+
+Profiling is off for normal traffic. A request is traced when it is
+sampled (PROFILE_SAMPLE_RATE) or when an admin sends the X-Profile
+header. A trace breaks the request down into:
+
+- dependencies: time in get_current_user (and anything else wrapped in
+  `span("dependencies")`)
+- handler: time inside the endpoint function, of which `mongo` is spent
+  waiting on MongoDB
+- serialisation: what the route spent outside the dependencies and the
+  handler, i.e. request validation and response model serialisation
+
+Finished traces are kept in memory for GET /api/profiling/traces, and
+admins also get them back in a Server-Timing header. Mongo time is summed
+over commands, so it can exceed the handler time when calls overlap.
+
+Independently of profiling, every MongoDB command slower than
+MONGO_SLOW_QUERY_MS is logged with its collection and filter and kept
+for GET /api/profiling/slow-queries.
+
+Configuration (backend .env):
+- PROFILE_SAMPLE_RATE: fraction of requests traced, 0 disables sampling
+- PROFILE_MAX_TRACES: traces and slow queries kept in memory
+- MONGO_SLOW_QUERY_MS: slow query threshold in milliseconds
+"""
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from fastapi.routing import APIRoute
+from pymongo import monitoring
+
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_MAX_TRACES = int(os.environ.get('PROFILE_MAX_TRACES', '200'))
+MONGO_SLOW_QUERY_MS = float(os.environ.get('MONGO_SLOW_QUERY_MS', '100'))
+
+PROFILE_HEADER = b"x-profile"
+MAX_MONGO_CALLS_PER_TRACE = 50
+
+logger = logging.getLogger(__name__)
+
+recent_traces: deque = deque(maxlen=PROFILE_MAX_TRACES)
+recent_slow_queries: deque = deque(maxlen=PROFILE_MAX_TRACES)
+
+
+class Trace:
+    def __init__(self, method: str, path: str, reason: str):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.reason = reason
+        self.route: Optional[str] = None
+        self.status: Optional[int] = None
+        self.is_admin = False
+        self.started_at = datetime.now(timezone.utc)
+        self.timings: Dict[str, float] = {"route": 0.0, "dependencies": 0.0, "handler": 0.0, "mongo": 0.0}
+        self.mongo_calls: List[dict] = []
+        self.mongo_count = 0
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float):
+        with self._lock:
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def add_mongo(self, collection: str, command: str, seconds: float):
+        with self._lock:
+            self.timings["mongo"] += seconds
+            self.mongo_count += 1
+            if len(self.mongo_calls) < MAX_MONGO_CALLS_PER_TRACE:
+                self.mongo_calls.append({"collection": collection, "command": command, "ms": round(seconds * 1000, 3)})
+
+    def breakdown(self) -> Dict[str, float]:
+        t = self.timings
+        return {
+            "dependencies_ms": round(t["dependencies"] * 1000, 3),
+            "handler_ms": round(t["handler"] * 1000, 3),
+            "mongo_ms": round(t["mongo"] * 1000, 3),
+            "serialisation_ms": round(max(0.0, t["route"] - t["dependencies"] - t["handler"]) * 1000, 3),
+        }
+
+    def server_timing(self, total: float) -> str:
+        parts = [f"{name.replace('_ms', '')};dur={value}" for name, value in self.breakdown().items()]
+        return ", ".join(parts + [f"total;dur={round(total * 1000, 3)}"])
+
+    def to_dict(self, total: float) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "reason": self.reason,
+            "started_at": self.started_at.isoformat(),
+            "total_ms": round(total * 1000, 3),
+            "breakdown": self.breakdown(),
+            "mongo_calls": self.mongo_count,
+            "mongo": self.mongo_calls,
+        }
+
+
+current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+
+@contextmanager
+def span(name: str):
+    """Add the time spent in the block to `name` on the current trace, if any"""
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - started)
+
+
+def mark_principal(role: str):
+    """Called once the caller is known, header-requested traces are only kept for admins"""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.is_admin = role == "admin"
+
+
+# ============================================
+# Route and endpoint timing
+# ============================================
+def _timed_endpoint(endpoint: Callable) -> Callable:
+    @functools.wraps(endpoint)
+    async def timed(*args, **kwargs):
+        with span("handler"):
+            return await endpoint(*args, **kwargs)
+    return timed
+
+
+class ProfiledRoute(APIRoute):
+    """APIRoute recording route and handler time on the current trace"""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        if inspect.iscoroutinefunction(endpoint):
+            endpoint = _timed_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        route_path = self.path
+
+        async def profiled_handler(request):
+            trace = current_trace.get()
+            if trace is None:
+                return await handler(request)
+            trace.route = route_path
+            with span("route"):
+                return await handler(request)
+
+        return profiled_handler
+
+
+# ============================================
+# Middleware
+# ============================================
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware starting a trace for sampled requests and
+    requests carrying X-Profile, and recording it when the response ends
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        requested = any(name == PROFILE_HEADER for name, _ in scope["headers"])
+        sampled = PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+        if not requested and not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(scope["method"], scope["path"], "sampled" if sampled else "header")
+        token = current_trace.set(trace)
+        started = time.perf_counter()
+
+        def keep() -> bool:
+            return sampled or trace.is_admin
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                trace.status = message["status"]
+                # Timings are only exposed to admins, sampled public requests are just recorded
+                if trace.is_admin:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", trace.server_timing(time.perf_counter() - started).encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_trace.reset(token)
+            if keep():
+                recent_traces.append(trace.to_dict(time.perf_counter() - started))
+
+
+# ============================================
+# MongoDB command monitoring
+# ============================================
+def _command_filter(command_name: str, command) -> object:
+    if command_name == "find" and "filter" in command:
+        return command["filter"]
+    if command_name in ("count", "distinct", "findAndModify"):
+        return command.get("query")
+    if command_name == "aggregate":
+        return command.get("pipeline")
+    if command_name == "update":
+        return [u.get("q") for u in command.get("updates", [])]
+    if command_name == "delete":
+        return [d.get("q") for d in command.get("deletes", [])]
+    return None
+
+
+def _collection(command_name: str, command) -> str:
+    if command_name == "getMore":
+        return command.get("collection", "")
+    collection = command.get(command_name)
+    return collection if isinstance(collection, str) else ""
+
+
+class MongoProfiler(monitoring.CommandListener):
+    """
+    Adds command timings to the current trace and logs slow commands
+    - Motor runs commands on executor threads with the caller's context,
+      so the trace of the issuing request is visible here
+    """
+
+    def __init__(self, slow_ms: float = MONGO_SLOW_QUERY_MS):
+        self.slow_ms = slow_ms
+        self._started: Dict[tuple, tuple] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(event) -> tuple:
+        return (event.connection_id, event.request_id)
+
+    def started(self, event):
+        with self._lock:
+            self._started[self._key(event)] = (_collection(event.command_name, event.command), event.command)
+
+    def _finish(self, event, failure: Optional[object] = None):
+        with self._lock:
+            collection, command = self._started.pop(self._key(event), ("", None))
+        seconds = event.duration_micros / 1e6
+        trace = current_trace.get()
+        if trace is not None:
+            trace.add_mongo(collection, event.command_name, seconds)
+        if seconds * 1000 >= self.slow_ms:
+            self._record_slow(collection, event.command_name, command, seconds, failure)
+
+    def _record_slow(self, collection: str, command_name: str, command, seconds: float, failure):
+        query_filter = _command_filter(command_name, command) if command is not None else None
+        entry = {
+            "collection": collection,
+            "command": command_name,
+            "ms": round(seconds * 1000, 3),
+            "filter": json.dumps(query_filter, default=str)[:1000],
+            "failed": failure is not None,
+            "at": datetime.now(timezone.utc).isoformat(),
+        }
+        trace = current_trace.get()
+        if trace is not None:
+            entry["trace_id"] = trace.id
+        recent_slow_queries.append(entry)
+        logger.warning(f"Slow MongoDB {command_name} on {collection} took {entry['ms']} ms, filter={entry['filter']}")
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event, event.failure)
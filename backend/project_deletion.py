@@ -0,0 +1,172 @@
+"""
+Background cascade delete for projects
+
+DELETE /api/projects/{id} removes the project document and hands the
+rest to a "project.delete" job on the job queue: messages, files and SRS
+documents are deleted in batches, then every storage object under
+"{project_id}/" is removed in bulk. Files and SRS documents stored as
+shared blobs release their reference instead (see blobs.py). The record in `project_deletions`
+holds the current phase and counters, so progress can be polled and a
+retried or interrupted job resumes from its phase. Every step is
+idempotent.
+
+- The record stays "running" while attempts are retried and becomes
+  "failed" once the job is dead; retry() (POST
+  /api/projects/deletions/{id}/retry) queues a failed deletion again
+- resume() runs at startup and queues every unfinished deletion whose
+  job went missing. Each deletion has one job id, so nothing runs twice
+"""
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+PROJECT_DELETE_BATCH_SIZE = int(os.environ.get('PROJECT_DELETE_BATCH_SIZE', '500'))
+STORAGE_REMOVE_BATCH_SIZE = 100
+
+PHASES = ["project", "messages", "files", "srs_documents", "storage", "done"]
+
+logger = logging.getLogger(__name__)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class ProjectDeletionRunner:
+    def __init__(self, db, job_queue, storage=None, blob_store=None, on_project_deleted=None):
+        self.db = db
+        self.job_queue = job_queue
+        self.storage = storage
+        self.blob_store = blob_store
+        self.on_project_deleted = on_project_deleted
+        job_queue.handler("project.delete", concurrency=2, max_attempts=10, on_dead=self._failed)(self._run_job)
+
+    async def start(self, project_id: str) -> dict:
+        """Record a deletion, delete the project document and queue the rest"""
+        job = {
+            "id": str(uuid.uuid4()),
+            "project_id": project_id,
+            "status": "pending",
+            "phase": PHASES[0],
+            "deleted": {"messages": 0, "files": 0, "srs_documents": 0, "storage_objects": 0},
+            "error": None,
+            "created_at": _now(),
+            "updated_at": _now(),
+        }
+        await self.db.project_deletions.insert_one(dict(job))
+        job = await self._delete_project(job)
+        await self._queue(job["id"])
+        return job
+
+    async def _queue(self, deletion_id: str):
+        job_id = f"project.delete:{deletion_id}"
+        queued = await self.job_queue.enqueue("project.delete", {"deletion_id": deletion_id}, job_id=job_id)
+        if queued is not None and queued["status"] == "dead":
+            await self.job_queue.retry(job_id)
+
+    async def retry(self, deletion_id: str) -> Optional[dict]:
+        """Queue a failed (or stuck) deletion again, completed ones are returned as they are"""
+        job = await self.get(deletion_id)
+        if job is None or job["status"] == "completed":
+            return job
+        await self.db.project_deletions.update_one(
+            {"id": deletion_id}, {"$set": {"status": "pending", "error": None, "updated_at": _now()}}
+        )
+        await self._queue(deletion_id)
+        return await self.get(deletion_id)
+
+    async def resume(self) -> int:
+        """Queue the unfinished deletions, for jobs lost before they were queued or after they expired"""
+        count = 0
+        async for job in self.db.project_deletions.find({"status": {"$in": ["pending", "running"]}}, {"id": 1}):
+            await self._queue(job["id"])
+            count += 1
+        if count:
+            logger.info(f"Resuming {count} unfinished project deletions")
+        return count
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await self.db.project_deletions.find_one({"id": job_id}, {"_id": 0})
+
+    async def _run_job(self, payload: dict):
+        job = await self.get(payload["deletion_id"])
+        if job is None or job["status"] == "completed":
+            return None
+        await self.db.project_deletions.update_one(
+            {"id": job["id"]}, {"$set": {"status": "running", "error": None, "updated_at": _now()}}
+        )
+        await self._run(job)
+        return {"deleted": job["deleted"]}
+
+    async def _advance(self, job: dict, phase: str) -> dict:
+        job["phase"] = phase
+        job["status"] = "completed" if phase == "done" else "running"
+        await self.db.project_deletions.update_one(
+            {"id": job["id"]}, {"$set": {"phase": phase, "status": job["status"], "updated_at": _now()}}
+        )
+        return job
+
+    async def _count(self, job: dict, key: str, count: int):
+        job["deleted"][key] += count
+        await self.db.project_deletions.update_one(
+            {"id": job["id"]}, {"$inc": {f"deleted.{key}": count}, "$set": {"updated_at": _now()}}
+        )
+
+    async def _delete_project(self, job: dict) -> dict:
+        project = await self.db.projects.find_one_and_delete(
+            {"id": job["project_id"]}, {"_id": 0, "status": 1, "total_price": 1, "amount_paid": 1}
+        )
+        if project is not None and self.on_project_deleted is not None:
+            await self.on_project_deleted(job["project_id"], project)
+        return await self._advance(job, "messages")
+
+    async def _delete_batches(self, job: dict, collection: str):
+        while True:
+            docs = await self.db[collection].find(
+                {"project_id": job["project_id"]}, {"_id": 1, "content_hash": 1}
+            ).limit(PROJECT_DELETE_BATCH_SIZE).to_list(PROJECT_DELETE_BATCH_SIZE)
+            if not docs:
+                return
+            result = await self.db[collection].delete_many({"_id": {"$in": [d["_id"] for d in docs]}})
+            # After the delete, so a retried batch never releases twice (a crash here leaks a reference)
+            content_hashes = [d["content_hash"] for d in docs if d.get("content_hash")]
+            if content_hashes and self.blob_store is not None:
+                await self.blob_store.release(content_hashes)
+            await self._count(job, collection, result.deleted_count)
+
+    async def _delete_storage(self, job: dict):
+        if self.storage is None:
+            return
+        paths = await self.storage.list(job["project_id"])
+        for i in range(0, len(paths), STORAGE_REMOVE_BATCH_SIZE):
+            batch = paths[i:i + STORAGE_REMOVE_BATCH_SIZE]
+            await self.storage.remove(batch)
+            await self._count(job, "storage_objects", len(batch))
+
+    async def _run(self, job: dict):
+        """Continue from the recorded phase, failures are recorded and re-raised for a retry"""
+        try:
+            if job["phase"] == "project":
+                job = await self._delete_project(job)
+            for collection in ("messages", "files", "srs_documents"):
+                if job["phase"] == collection:
+                    await self._delete_batches(job, collection)
+                    job = await self._advance(job, PHASES[PHASES.index(collection) + 1])
+            if job["phase"] == "storage":
+                await self._delete_storage(job)
+                job = await self._advance(job, "done")
+            logger.info(f"Project {job['project_id']} deleted: {job['deleted']}")
+        except Exception as e:
+            # Still running, the job queue retries it; _failed() marks it once it gives up
+            logger.error(f"Deletion of project {job['project_id']} failed in phase {job['phase']}: {e}")
+            await self.db.project_deletions.update_one(
+                {"id": job["id"]}, {"$set": {"error": str(e), "updated_at": _now()}}
+            )
+            raise
+
+    async def _failed(self, payload: dict, error: str):
+        await self.db.project_deletions.update_one(
+            {"id": payload["deletion_id"]}, {"$set": {"status": "failed", "error": error, "updated_at": _now()}}
+        )
@@ -0,0 +1,169 @@
+"""
+Rate limiting for unauthenticated write endpoints
+
+Token buckets keyed by route and client IP. A bucket holds up to
+`capacity` tokens and refills continuously; each request takes one,
+and an empty bucket answers 429 with a Retry-After header.
+
+Backends (RATE_LIMIT_BACKEND):
+- memory (default): per-process dict, no I/O; with several workers each
+  one enforces the limit on its own
+- mongo: one document per bucket in `rate_limits`, updated with a single
+  atomic pipeline update so concurrent workers share the limit exactly
+
+Configuration (backend .env):
+- RATE_LIMIT_ENABLED: "false" disables every limit
+- RATE_LIMIT_REGISTER / RATE_LIMIT_LOGIN / RATE_LIMIT_BOOKINGS:
+  "<requests>/<second|minute|hour>"
+- RATE_LIMIT_TRUST_PROXY: take the client IP from X-Forwarded-For, only
+  behind a proxy that sets it
+- RATE_LIMIT_TRUSTED_HOPS: number of proxies in front of the API that
+  append to X-Forwarded-For (default 1). The client IP is the entry that
+  many places from the right, the one the outermost trusted proxy added;
+  anything left of it is whatever the client sent and is ignored
+"""
+import math
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Tuple
+
+from fastapi import HTTPException, Request
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from metrics import RATE_LIMITED_REQUESTS
+
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+RATE_LIMIT_TRUST_PROXY = os.environ.get('RATE_LIMIT_TRUST_PROXY', 'false').lower() == 'true'
+RATE_LIMIT_TRUSTED_HOPS = int(os.environ.get('RATE_LIMIT_TRUSTED_HOPS', '1'))
+RATE_LIMIT_MAX_KEYS = int(os.environ.get('RATE_LIMIT_MAX_KEYS', '100000'))
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+
+class Limit:
+    def __init__(self, capacity: int, period_seconds: float):
+        self.capacity = capacity
+        self.refill_rate = capacity / period_seconds
+        # A full bucket is back after one period, after that the document is useless
+        self.ttl = period_seconds
+
+    @classmethod
+    def parse(cls, value: str) -> "Limit":
+        """Parse "10/minute": 10 requests per minute, in bursts of up to 10"""
+        count, _, period = value.partition("/")
+        if period not in PERIODS:
+            raise ValueError(f"Invalid rate limit: {value}")
+        return cls(int(count), PERIODS[period])
+
+
+class RateLimiter(ABC):
+    """Interface every backend implements"""
+
+    @abstractmethod
+    async def hit(self, key: str, limit: Limit) -> Tuple[bool, float]:
+        """Take a token, returns (allowed, seconds until the next token)"""
+
+
+class InMemoryRateLimiter(RateLimiter):
+    """
+    Buckets in an LRU dict
+    - hit() never awaits, so it is atomic on the event loop without a lock
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def hit(self, key: str, limit: Limit) -> Tuple[bool, float]:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(key, (limit.capacity, now))
+        tokens = min(limit.capacity, tokens + (now - updated_at) * limit.refill_rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (1 - tokens) / limit.refill_rate
+
+
+class MongoRateLimiter(RateLimiter):
+    """Buckets in `rate_limits`, refilled and decremented in one update"""
+
+    def __init__(self, db):
+        self.db = db
+
+    @property
+    def collection(self):
+        return self.db.rate_limits
+
+    @staticmethod
+    def _pipeline(limit: Limit, now: datetime) -> list:
+        elapsed = {"$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]}
+        refilled = {"$add": [{"$ifNull": ["$tokens", limit.capacity]}, {"$multiply": [elapsed, limit.refill_rate]}]}
+        return [
+            {"$set": {"tokens": {"$min": [limit.capacity, refilled]}}},
+            {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+            {"$set": {
+                "tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                "updated_at": now,
+                "expires_at": now + timedelta(seconds=limit.ttl),
+            }},
+        ]
+
+    async def hit(self, key: str, limit: Limit) -> Tuple[bool, float]:
+        now = datetime.now(timezone.utc)
+        for attempt in range(2):
+            try:
+                bucket = await self.collection.find_one_and_update(
+                    {"_id": key}, self._pipeline(limit, now),
+                    upsert=True, return_document=ReturnDocument.AFTER,
+                )
+                break
+            except DuplicateKeyError:
+                # Two first requests raced to create the bucket, the loser retries as an update
+                if attempt:
+                    raise
+        if bucket["allowed"]:
+            return True, 0.0
+        return False, (1 - bucket["tokens"]) / limit.refill_rate
+
+
+def create_rate_limiter(db) -> RateLimiter:
+    if RATE_LIMIT_BACKEND == "mongo":
+        return MongoRateLimiter(db)
+    return InMemoryRateLimiter()
+
+
+def client_ip(request: Request, trusted_hops: int = RATE_LIMIT_TRUSTED_HOPS) -> str:
+    if RATE_LIMIT_TRUST_PROXY and trusted_hops > 0:
+        # Every header line counts, a client can send its own X-Forwarded-For
+        forwarded = [
+            entry.strip() for value in request.headers.getlist("x-forwarded-for") for entry in value.split(",")
+        ]
+        forwarded = [entry for entry in forwarded if entry]
+        # The leftmost entries are the client's to choose, only trust what our proxies appended
+        if len(forwarded) >= trusted_hops:
+            return forwarded[-trusted_hops]
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit(limiter: RateLimiter, route: str, limit: Limit):
+    """FastAPI dependency taking one token from the (route, client IP) bucket"""
+    async def dependency(request: Request):
+        if not RATE_LIMIT_ENABLED:
+            return
+        allowed, retry_after = await limiter.hit(f"{route}:{client_ip(request)}", limit)
+        if not allowed:
+            RATE_LIMITED_REQUESTS.inc(route=route)
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, please try again later",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+    return dependency
@@ -0,0 +1,169 @@
+"""
+HTTP response caching for public read endpoints
+
+Serialised response bodies are kept in a server-side cache together with
+a strong ETag. Repeat requests are answered from the cache without a
+database query or serialisation, and requests whose If-None-Match
+matches get an empty 304.
+
+Entries carry tags (e.g. "project:<id>", "portfolio") and write handlers
+invalidate by tag. A response loaded while one of its tags was
+invalidated is served but not stored, it may predate the write. Invalidation only reaches the local process, so with
+several workers RESPONSE_CACHE_TTL_SECONDS bounds how stale another
+worker's copy can be.
+"""
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Set
+
+from fastapi import Request, Response
+
+from serialisation import dumps
+
+RESPONSE_CACHE_TTL_SECONDS = float(os.environ.get('RESPONSE_CACHE_TTL_SECONDS', '30'))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', '5000'))
+
+# Share pages and project files are only reachable through an unguessable
+# link, so browsers may keep them but shared proxies may not
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+PUBLIC_CACHE_CONTROL = "public, max-age=60"
+
+
+class CachedResponse:
+    __slots__ = ("body", "etag", "tags", "expires_at")
+
+    def __init__(self, body: bytes, etag: str, tags: Set[str], expires_at: float):
+        self.body = body
+        self.etag = etag
+        self.tags = tags
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """In-process TTL/LRU cache of serialised responses with tag invalidation"""
+
+    def __init__(self, ttl: float = RESPONSE_CACHE_TTL_SECONDS, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        # Generation of each tag's last invalidation, bounded like the entries
+        self.generation = 0
+        self._invalidated: "OrderedDict[str, int]" = OrderedDict()
+        self._forgotten = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at < time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def invalidated_since(self, tags: Iterable[str], generation: int) -> bool:
+        """Whether any of `tags` was invalidated after `generation` was read"""
+        if generation < self._forgotten:
+            return True
+        return any(self._invalidated.get(tag, 0) > generation for tag in tags)
+
+    def set(self, key: str, body: bytes, tags: Iterable[str], generation: Optional[int] = None) -> CachedResponse:
+        """
+        Store a response
+        - `generation` is self.generation from before the data was loaded,
+          the entry is not stored if a tag was invalidated since
+        """
+        entry = CachedResponse(body, make_etag(body), set(tags), time.monotonic() + self.ttl)
+        if self.ttl <= 0:
+            return entry
+        if generation is not None and self.invalidated_since(entry.tags, generation):
+            return entry
+        self._remove(key)
+        self._entries[key] = entry
+        for tag in entry.tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+        return entry
+
+    def invalidate(self, *tags: str):
+        self.generation += 1
+        for tag in tags:
+            self._invalidated[tag] = self.generation
+            self._invalidated.move_to_end(tag)
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+        while len(self._invalidated) > self.max_entries:
+            # Loads older than a forgotten invalidation are treated as stale
+            _, self._forgotten = self._invalidated.popitem(last=False)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+response_cache = ResponseCache()
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def cache_key(request: Request) -> str:
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    return f"{request.url.path}?{query}"
+
+
+async def cached_json_response(
+    request: Request,
+    loader: Callable[[], Awaitable[object]],
+    tags: Callable[[object], Iterable[str]],
+    cache_control: str = PRIVATE_CACHE_CONTROL,
+) -> Response:
+    """
+    Serve `loader()` as JSON through the response cache
+    - `tags` receives the loaded data and names what invalidates the entry
+    - A loader raising HTTPException (e.g. 404) is not cached
+    """
+    key = cache_key(request)
+    entry = response_cache.get(key)
+    if entry is None:
+        # Read before loading, a write invalidating meanwhile keeps the result out of the cache
+        generation = response_cache.generation
+        data = await loader()
+        body = dumps(data)
+        entry = response_cache.set(key, body, tags(data), generation)
+
+    headers = {"ETag": entry.etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
@@ -0,0 +1,185 @@
+"""
+Full-text search over projects, messages, bookings and clients
+
+Backed by one MongoDB text index per collection (see indexes.py), which
+the server keeps current on every write, so there is no separate index
+to rebuild. A search runs one aggregation per collection in parallel and
+merges the results by text score.
+
+Paging uses a keyset cursor over (score desc, type, id) instead of an
+offset, so later pages cost the same as the first.
+
+Filters:
+- client_id / status narrow projects and the messages of those projects;
+  bookings (no client) are left out, and clients are left out when
+  filtering by project status
+- date_from / date_to apply to created_at everywhere
+"""
+import asyncio
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+SNIPPET_LENGTH = 200
+
+
+def _text(field: str) -> dict:
+    return {"$ifNull": [f"${field}", ""]}
+
+
+# Collection -> fields projected into a SearchResult
+SEARCH_TARGETS = {
+    "bookings": {"title": _text("name"), "snippet": _text("project_idea"), "project_id": None},
+    "clients": {"title": _text("name"), "snippet": _text("company"), "project_id": None},
+    "messages": {"title": _text("sender_name"), "snippet": _text("message"), "project_id": "$project_id"},
+    "projects": {"title": _text("title"), "snippet": _text("description"), "project_id": "$id"},
+}
+SEARCH_TYPES = sorted(SEARCH_TARGETS)
+
+
+class SearchResult(BaseModel):
+    type: str
+    id: str
+    score: float
+    title: str
+    snippet: str
+    project_id: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+class SearchParams:
+    """Query parameters of GET /api/search"""
+
+    def __init__(
+        self,
+        q: str = Query(..., min_length=1, max_length=200),
+        types: Optional[str] = Query(None, description=f"Comma-separated subset of {', '.join(SEARCH_TYPES)}"),
+        client_id: Optional[str] = None,
+        status: Optional[str] = Query(None, description="Project status"),
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_SEARCH_LIMIT),
+        after: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    ):
+        self.q = q
+        self.types = SEARCH_TYPES if not types else [t.strip() for t in types.split(",") if t.strip()]
+        unknown = set(self.types) - set(SEARCH_TYPES)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown search types: {', '.join(sorted(unknown))}")
+        self.client_id = client_id
+        self.status = status
+        self.date_from = date_from
+        self.date_to = date_to
+        self.limit = limit
+        self.after = after
+
+
+def encode_search_cursor(result: dict) -> str:
+    raw = json.dumps([result["score"], result["type"], result["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        score, result_type, result_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return float(score), str(result_type), str(result_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid search cursor")
+
+
+def _keyset(collection: str, after: tuple) -> dict:
+    """Results of `collection` that sort after the cursor in (score desc, type, id) order"""
+    score, result_type, result_id = after
+    if collection > result_type:
+        return {"score": {"$lte": score}}
+    if collection < result_type:
+        return {"score": {"$lt": score}}
+    return {"$or": [{"score": {"$lt": score}}, {"score": score, "id": {"$gt": result_id}}]}
+
+
+async def _filters(db, params: SearchParams) -> dict:
+    """Per-collection filters, collections that cannot match are left out"""
+    created_at = {}
+    if params.date_from:
+        created_at["$gte"] = params.date_from
+    if params.date_to:
+        created_at["$lte"] = params.date_to
+    base = {"created_at": created_at} if created_at else {}
+
+    if not params.client_id and not params.status:
+        return {collection: dict(base) for collection in params.types}
+
+    project_filter = dict(base)
+    if params.client_id:
+        project_filter["client_id"] = params.client_id
+    if params.status:
+        project_filter["status"] = params.status
+
+    filters = {}
+    if "projects" in params.types:
+        filters["projects"] = project_filter
+    if "messages" in params.types:
+        project_scope = {k: v for k, v in project_filter.items() if k != "created_at"}
+        project_ids = await db.projects.distinct("id", project_scope)
+        filters["messages"] = {**base, "project_id": {"$in": project_ids}}
+    if "clients" in params.types and params.client_id and not params.status:
+        filters["clients"] = {**base, "id": params.client_id}
+    return filters
+
+
+def _pipeline(collection: str, params: SearchParams, match: dict, after: Optional[tuple]) -> list:
+    fields = SEARCH_TARGETS[collection]
+    pipeline = [
+        {"$match": {"$text": {"$search": params.q}, **match}},
+        {"$addFields": {"score": {"$meta": "textScore"}}},
+    ]
+    if after:
+        pipeline.append({"$match": _keyset(collection, after)})
+    pipeline += [
+        {"$sort": {"score": -1, "id": 1}},
+        {"$limit": params.limit + 1},
+        {"$project": {
+            "_id": 0,
+            "type": {"$literal": collection},
+            "id": 1,
+            "score": 1,
+            "created_at": 1,
+            "title": fields["title"],
+            "snippet": {"$substrCP": [fields["snippet"], 0, SNIPPET_LENGTH]},
+            "project_id": fields["project_id"] or {"$literal": None},
+        }},
+    ]
+    return pipeline
+
+
+async def search(db, params: SearchParams) -> dict:
+    """
+    Ranked search across the requested collections
+    - Returns {"items": [...], "next_cursor": str | None}
+    """
+    after = decode_search_cursor(params.after) if params.after else None
+    filters = await _filters(db, params)
+
+    async def run(collection: str) -> List[dict]:
+        pipeline = _pipeline(collection, params, filters[collection], after)
+        return await db[collection].aggregate(pipeline).to_list(params.limit + 1)
+
+    per_collection = await asyncio.gather(*(run(collection) for collection in filters))
+    results = sorted(
+        (r for rows in per_collection for r in rows),
+        key=lambda r: (-r["score"], r["type"], r["id"]),
+    )
+
+    next_cursor = None
+    if len(results) > params.limit:
+        results = results[:params.limit]
+        next_cursor = encode_search_cursor(results[-1])
+    return {"items": results, "next_cursor": next_cursor}
@@ -0,0 +1,99 @@
+"""
+Fast JSON responses for list endpoints
+
+Documents read back from MongoDB were validated when they were written,
+so list handlers skip FastAPI's response_model round trip (validate
+every item, run default factories, jsonable_encoder, json.dumps) and
+encode the page straight to bytes with orjson:
+
+- `model_projection(Model)` fetches only the model's fields, which is
+  what response_model filtering did
+- `page_response(Model, page)` fills in plain defaults that older
+  documents may lack, turns ints stored in float fields into floats
+  (`0` -> `0.0`, as validation would) and returns a FastJSONResponse
+
+The response_model stays on the route for the OpenAPI schema.
+FAST_SERIALISATION=false falls back to the validated path.
+"""
+import json
+import os
+from functools import lru_cache
+from typing import Any, List, Tuple, Type, Union, get_args, get_origin
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+FAST_SERIALISATION = os.environ.get('FAST_SERIALISATION', 'true').lower() == 'true'
+
+
+def _default(obj: Any):
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    return jsonable_encoder(obj)
+
+
+def dumps(content: Any) -> bytes:
+    """JSON bytes with the same datetime format as Pydantic ("...Z" for UTC)"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
+    return json.dumps(jsonable_encoder(content), separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+@lru_cache(maxsize=None)
+def model_projection(model: Type[BaseModel]) -> dict:
+    return {"_id": 0, **{name: 1 for name in model.model_fields}}
+
+
+@lru_cache(maxsize=None)
+def _static_defaults(model: Type[BaseModel]) -> Tuple[Tuple[str, Any], ...]:
+    return tuple(
+        (name, field.default) for name, field in model.model_fields.items()
+        if not field.is_required() and field.default_factory is None
+    )
+
+
+@lru_cache(maxsize=None)
+def _float_fields(model: Type[BaseModel]) -> Tuple[str, ...]:
+    """Fields annotated float or Optional[float]"""
+    names = []
+    for name, field in model.model_fields.items():
+        annotation = field.annotation
+        if get_origin(annotation) is Union:
+            annotation = next((arg for arg in get_args(annotation) if arg is not type(None)), None)
+        if annotation is float:
+            names.append(name)
+    return tuple(names)
+
+
+def apply_defaults(model: Type[BaseModel], docs: List[dict]) -> List[dict]:
+    defaults = _static_defaults(model)
+    float_fields = _float_fields(model)
+    for doc in docs:
+        for name, default in defaults:
+            if name not in doc:
+                doc[name] = default
+        for name in float_fields:
+            value = doc.get(name)
+            # Mongo keeps 0 as an int, validation would have returned 0.0
+            if type(value) is int:
+                doc[name] = float(value)
+    return docs
+
+
+def page_response(model: Type[BaseModel], page: dict):
+    """Serve a paginate() result of trusted `model` documents"""
+    if not FAST_SERIALISATION:
+        return page
+    apply_defaults(model, page["items"])
+    return FastJSONResponse(page)
@@ -1,30 +1,102 @@
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Header, Query, Request
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateOne
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional
+from typing import Awaitable, Callable, List, Optional
 import uuid
 from datetime import datetime, timezone, timedelta
 import jwt
 from supabase import create_client, Client
 import base64
 import json
-import bcrypt  # Direct bcrypt import
+import httpx
+from contextlib import asynccontextmanager
+from indexes import ensure_indexes, find_unindexed_queries
+from principal_cache import get_principal_cache
+from passwords import password_hasher
+from pagination import Page, PageParams, paginate
+from share_page import load_share_page
+from search import SearchParams, SearchResult, search
+from migrate_dates import migrate_dates
+from bulk import FORMATS as BULK_FORMATS, IMPORT_MODES, export_records, import_records, iter_lines, read_records
+from serialisation import FastJSONResponse, apply_defaults, model_projection, page_response
+from fieldsets import Fieldsets, FieldsetParams, fieldset_response
+from milestones import add_milestone, delete_milestone, project_update, reorder_milestones, update_milestone
+from sync import DeltaSync, SyncParams
+from rate_limit import Limit, create_rate_limiter, rate_limit
+from database import MongoConnection
+from uploads import UploadLimitMiddleware, check_upload_size, upload_size, stage_upload, open_staged, discard_staged
+from storage import LocalStorage, create_storage
+from message_stream import create_broker, message_events
+from project_deletion import ProjectDeletionRunner
+from blobs import BLOB_REFERENCES, BlobStore, blob_hash
+from job_queue import JobQueue
+from profiling import (
+    MongoProfiler, ProfiledRoute, ProfilingMiddleware, mark_principal, recent_slow_queries, recent_traces, span
+)
+from metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE, METRICS_ENABLED, PASSWORD_HASH_QUEUE_DEPTH,
+    MetricsMiddleware, MongoCommandMetrics, registry as metrics_registry
+)
+from response_cache import PUBLIC_CACHE_CONTROL, cached_json_response, response_cache
+from dashboard_stats import (
+    invalidate_dashboard_stats,
+    load_dashboard_stats,
+    record_booking_change,
+    record_client_change,
+    record_project_change,
+)
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+mongo = MongoConnection(
+    os.environ['MONGO_URL'], os.environ['DB_NAME'], event_listeners=[MongoCommandMetrics(), MongoProfiler()]
+)
+db = mongo.db
+# Read-heavy public endpoints, may be served by secondaries (MONGO_PUBLIC_READ_PREFERENCE)
+public_db = mongo.public_db
+message_broker = create_broker(db)
+
+# "inline" runs job workers inside the API process, "external" leaves them to worker.py
+JOB_QUEUE_WORKER = os.environ.get('JOB_QUEUE_WORKER', 'inline')
+job_queue = JobQueue(db)
+
+rate_limiter = create_rate_limiter(db)
+REGISTER_LIMIT = Limit.parse(os.environ.get('RATE_LIMIT_REGISTER', '5/minute'))
+LOGIN_LIMIT = Limit.parse(os.environ.get('RATE_LIMIT_LOGIN', '20/minute'))
+BOOKINGS_LIMIT = Limit.parse(os.environ.get('RATE_LIMIT_BOOKINGS', '10/minute'))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await mongo.open()
+    # Before the first request so no insert predates the change stream
+    await message_broker.start()
+    await create_db_indexes()
+    # Keyset pages compare created_at across BSON types, legacy string
+    # dates must be converted before the first page is served
+    await convert_legacy_dates()
+    # One backfill job however many processes start
+    await job_queue.enqueue("sync.backfill", {}, job_id="sync.backfill")
+    await project_deletions.resume()
+    if JOB_QUEUE_WORKER == "inline":
+        job_queue.start()
+    try:
+        yield
+    finally:
+        await job_queue.stop()
+        await message_broker.close()
+        password_hasher.shutdown()
+        mongo.close()
 
-app = FastAPI()
-api_router = APIRouter(prefix="/api")
+app = FastAPI(lifespan=lifespan)
+api_router = APIRouter(prefix="/api", route_class=ProfiledRoute)
 
 
 from fastapi import Response
@@ -33,6 +105,14 @@ from fastapi import Response
 def health():
     return {"status": "running"}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics disabled")
+    return Response(content=metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+metrics_registry.add_collector(lambda: PASSWORD_HASH_QUEUE_DEPTH.set(password_hasher.queued))
+
 
 # @app.get("/")
 # def health():
@@ -61,41 +141,119 @@ if supabase_url and supabase_key:
     except Exception as e:
         logging.warning(f"Supabase initialization failed: {e}")
 
+# Uploads go to Supabase when it is configured, to STORAGE_LOCAL_DIR otherwise (see storage.py)
+storage = create_storage(supabase, supabase_url, supabase_key, supabase_bucket)
+logging.info(f"Storing uploads with the {storage.name} storage backend")
+
+async def on_project_deleted(project_id: str, project: dict):
+    await record_project_change(db, project, None)
+    await delta_sync.deleted("projects", [project_id])
+    response_cache.invalidate(f"project:{project_id}", "portfolio")
+
+blob_store = BlobStore(db, job_queue)
+project_deletions = ProjectDeletionRunner(
+    db, job_queue, storage, blob_store=blob_store, on_project_deleted=on_project_deleted
+)
+
 # ============================================
-# ✅ NEW: Direct bcrypt helper functions
+# Background jobs
 # ============================================
-def hash_password(password: str) -> str:
-    """
-    Hash a password using bcrypt
-    - Automatically handles 72 byte limit
-    - Returns string hash
-    """
-    # Convert password to bytes
-    password_bytes = password.encode('utf-8')
-    
-    # Generate salt and hash
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt)
-    
-    # Return as string
-    return hashed.decode('utf-8')
+BOOKING_WEBHOOK_URL = os.environ.get('BOOKING_WEBHOOK_URL', '')
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+async def store_record_upload(
+    collection: str, file: UploadFile, staged_path: str, content_hash: str,
+    build_record: Callable[[str], Awaitable[BaseModel]],
+) -> BaseModel:
     """
-    Verify a password against its hash
-    - Returns True if matches, False otherwise
+    Take a reference to the blob of a staged upload and insert its record
+    - `build_record(storage_path)` makes the record once the blob's path is known
+    - The upload job is queued after the insert, so it finds the record whenever it finishes
+    - Content that is already stored is not uploaded again
     """
+    content_type = file.content_type or "application/octet-stream"
+    blob, upload = await blob_store.acquire(content_hash, upload_size(file), content_type)
     try:
-        # Convert to bytes
-        plain_bytes = plain_password.encode('utf-8')
-        hashed_bytes = hashed_password.encode('utf-8')
-        
-        # Verify
-        return bcrypt.checkpw(plain_bytes, hashed_bytes)
-    except Exception as e:
-        logging.error(f"Password verification error: {e}")
-        return False
-# ============================================
+        record = await build_record(blob["storage_path"])
+        await db[collection].insert_one(record.model_dump())
+    except Exception:
+        await blob_store.release([content_hash])
+        discard_staged(staged_path)
+        raise
+    if upload:
+        await job_queue.enqueue("storage.upload", {
+            "content_hash": content_hash,
+            "storage_path": blob["storage_path"],
+            "staged_path": staged_path,
+            "filename": file.filename,
+            "content_type": content_type,
+        })
+        return record
+    discard_staged(staged_path)
+    # Read after the insert, an upload that finished before it did not see the record
+    current = await db.blobs.find_one({"_id": content_hash, "storage_path": blob["storage_path"]}, {"status": 1})
+    if current is not None and current["status"] == "stored":
+        stamp = await delta_sync.stamp()
+        await db[collection].update_one({"id": record.id}, {"$set": {"storage_status": "stored", **stamp}})
+        record.storage_status = "stored"
+        record.revision, record.updated_at = stamp["revision"], stamp["updated_at"]
+    return record
+
+async def set_blob_records_status(content_hash: str, blob_status: str):
+    """Move the pending records of a blob to `blob_status`"""
+    for collection in BLOB_REFERENCES:
+        query = {"content_hash": content_hash, "storage_status": "pending"}
+        records = await db[collection].find(query, {"_id": 0, "id": 1, "project_id": 1}).to_list(None)
+        if not records:
+            continue
+        # One sync revision per record
+        await delta_sync.stamp_many(records)
+        await db[collection].bulk_write([
+            UpdateOne({**query, "id": r["id"]}, {"$set": {
+                "storage_status": blob_status, "revision": r["revision"], "updated_at": r["updated_at"]
+            }})
+            for r in records
+        ], ordered=False)
+        response_cache.invalidate(*{f"project:{r['project_id']}" for r in records})
+
+async def storage_upload_failed(payload: dict, error: str):
+    if "content_hash" in payload:
+        if await blob_store.mark(payload["content_hash"], payload["storage_path"], "failed") is not None:
+            await set_blob_records_status(payload["content_hash"], "failed")
+    else:
+        # Queued before uploads were content-addressed, the object belongs to one record
+        await db[payload["collection"]].update_one(
+            {"id": payload["record_id"]}, {"$set": {"storage_status": "failed", **await delta_sync.stamp()}}
+        )
+    discard_staged(payload["staged_path"])
+
+@job_queue.handler("storage.upload", concurrency=4, on_dead=storage_upload_failed)
+async def store_upload(payload: dict):
+    file = open_staged(payload["staged_path"], payload["filename"])
+    try:
+        await storage.upload(payload["storage_path"], file, payload["content_type"])
+    finally:
+        await file.close()
+    if "content_hash" not in payload:
+        await db[payload["collection"]].update_one(
+            {"id": payload["record_id"]}, {"$set": {"storage_status": "stored", **await delta_sync.stamp()}}
+        )
+    elif await blob_store.mark(payload["content_hash"], payload["storage_path"], "stored") is None:
+        # Every reference was dropped and the blob removed while the upload ran, the
+        # path is this generation's own so a blob created again is not affected
+        await remove_storage_objects({"paths": [payload["storage_path"]]})
+    else:
+        await set_blob_records_status(payload["content_hash"], "stored")
+    discard_staged(payload["staged_path"])
+
+@job_queue.handler("storage.remove", concurrency=2)
+async def remove_storage_objects(payload: dict):
+    await storage.remove(payload["paths"])
+
+@job_queue.handler("booking.notify", concurrency=2, max_attempts=8)
+async def notify_booking(payload: dict):
+    async with httpx.AsyncClient(timeout=10) as http:
+        response = await http.post(BOOKING_WEBHOOK_URL, json=payload)
+        response.raise_for_status()
 
 class User(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -140,6 +298,21 @@ class Milestone(BaseModel):
     title: str
     completed: bool = False
 
+class MilestoneCreate(BaseModel):
+    title: str
+
+class MilestoneUpdate(BaseModel):
+    title: Optional[str] = None
+    completed: Optional[bool] = None
+
+class MilestoneOrder(BaseModel):
+    milestone_ids: List[str]
+
+class MilestoneState(BaseModel):
+    """Milestones and the progress derived from them, as left by a milestone write"""
+    milestones: List[Milestone]
+    progress: int
+
 class Project(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -156,6 +329,8 @@ class Project(BaseModel):
     share_link: str = Field(default_factory=lambda: str(uuid.uuid4()))
     is_portfolio: bool = False
     milestones: List[Milestone] = []
+    revision: int = 0
+    updated_at: Optional[datetime] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class ProjectCreate(BaseModel):
@@ -178,7 +353,6 @@ class ProjectUpdate(BaseModel):
     amount_paid: Optional[float] = None
     google_sheet_link: Optional[str] = None
     is_portfolio: Optional[bool] = None
-    milestones: Optional[List[Milestone]] = None
 
 class Message(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -187,6 +361,8 @@ class Message(BaseModel):
     sender_name: str
     sender_role: str
     message: str
+    revision: int = 0
+    updated_at: Optional[datetime] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class MessageCreate(BaseModel):
@@ -203,6 +379,11 @@ class FileUpload(BaseModel):
     category: Optional[str] = "general"
     description: Optional[str] = None
     uploaded_by: str
+    storage_path: Optional[str] = None
+    storage_status: str = "stored"
+    content_hash: Optional[str] = None
+    revision: int = 0
+    updated_at: Optional[datetime] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class SRSDocument(BaseModel):
@@ -215,6 +396,12 @@ class SRSDocument(BaseModel):
     uploaded_by: str
     description: Optional[str] = None
     status: str = "pending"
+    filename: Optional[str] = None
+    storage_path: Optional[str] = None
+    storage_status: str = "stored"
+    content_hash: Optional[str] = None
+    revision: int = 0
+    updated_at: Optional[datetime] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class Booking(BaseModel):
@@ -228,6 +415,8 @@ class Booking(BaseModel):
     deadline: Optional[str] = None
     website_type: Optional[str] = None
     status: str = "pending"
+    revision: int = 0
+    updated_at: Optional[datetime] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class BookingCreate(BaseModel):
@@ -239,6 +428,26 @@ class BookingCreate(BaseModel):
     deadline: Optional[str] = None
     website_type: Optional[str] = None
 
+# Named views of the list endpoints (?view=), "detail" is the full model
+PROJECT_VIEWS = {
+    "summary": [
+        "client_id", "title", "status", "progress", "deadline", "total_price", "amount_paid", "is_portfolio"
+    ],
+}
+project_fieldsets = Fieldsets(Project, PROJECT_VIEWS)
+portfolio_fieldsets = Fieldsets(Project, PROJECT_VIEWS, hidden=["share_link"])
+client_fieldsets = Fieldsets(Client, {"summary": ["name", "company"]})
+booking_fieldsets = Fieldsets(Booking, {"summary": ["name", "email", "status", "budget_range"]})
+
+# Collections served by GET /api/sync, every write to them is stamped with delta_sync
+delta_sync = DeltaSync(db, job_queue, {
+    "projects": Project,
+    "messages": Message,
+    "files": FileUpload,
+    "srs_documents": SRSDocument,
+    "bookings": Booking,
+})
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -247,37 +456,49 @@ def create_access_token(data: dict):
     return encoded_jwt
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-        user = await db.users.find_one({"id": user_id}, {"_id": 0})
-        if user is None:
-            raise HTTPException(status_code=401, detail="User not found")
-        return User(**user)
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Token has expired")
-    except jwt.JWTError:
-        raise HTTPException(status_code=401, detail="Could not validate credentials")
+    with span("dependencies"):
+        try:
+            token = credentials.credentials
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            user_id: str = payload.get("sub")
+            if user_id is None:
+                raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+            cache = get_principal_cache()
+            user = await cache.get(user_id)
+            if user is None:
+                user = await db.users.find_one({"id": user_id}, {"_id": 0, "hashed_password": 0})
+                if user is None:
+                    raise HTTPException(status_code=401, detail="User not found")
+                await cache.set(user_id, user)
+            user = User(**user)
+        except jwt.ExpiredSignatureError:
+            raise HTTPException(status_code=401, detail="Token has expired")
+        except jwt.JWTError:
+            raise HTTPException(status_code=401, detail="Could not validate credentials")
+    mark_principal(user.role)
+    return user
 
 async def get_admin_user(current_user: User = Depends(get_current_user)):
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     return current_user
 
+async def invalidate_principal(user_id: str):
+    """Drop a cached principal, call after any write to the user record"""
+    await get_principal_cache().invalidate(user_id)
+
 # ============================================
 # ✅ FIXED: Register with direct bcrypt
 # ============================================
-@api_router.post("/auth/register", response_model=Token)
+@api_router.post("/auth/register", response_model=Token,
+                 dependencies=[Depends(rate_limit(rate_limiter, "register", REGISTER_LIMIT))])
 async def register(user_data: UserCreate):
     existing = await db.users.find_one({"email": user_data.email}, {"_id": 0})
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    # ✅ Use direct bcrypt hash
-    hashed_password = hash_password(user_data.password)
+    # ✅ bcrypt runs in the password worker pool, off the event loop
+    hashed_password = await password_hasher.hash(user_data.password)
     
     user = User(
         email=user_data.email,
@@ -286,7 +507,6 @@ async def register(user_data: UserCreate):
     )
     user_dict = user.model_dump()
     user_dict["hashed_password"] = hashed_password
-    user_dict["created_at"] = user_dict["created_at"].isoformat()
     
     await db.users.insert_one(user_dict)
     
@@ -296,14 +516,22 @@ async def register(user_data: UserCreate):
 # ============================================
 # ✅ FIXED: Login with direct bcrypt
 # ============================================
-@api_router.post("/auth/login", response_model=Token)
+@api_router.post("/auth/login", response_model=Token,
+                 dependencies=[Depends(rate_limit(rate_limiter, "login", LOGIN_LIMIT))])
 async def login(credentials: UserLogin):
     user_doc = await db.users.find_one({"email": credentials.email}, {"_id": 0})
     
-    # ✅ Use direct bcrypt verify
-    if not user_doc or not verify_password(credentials.password, user_doc.get("hashed_password", "")):
+    # ✅ bcrypt runs in the password worker pool, off the event loop
+    hashed_password = user_doc.get("hashed_password", "") if user_doc else ""
+    if not user_doc or not await password_hasher.verify(credentials.password, hashed_password):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
+    # Transparently upgrade hashes made with a different cost factor
+    if password_hasher.needs_rehash(hashed_password):
+        new_hash = await password_hasher.hash(credentials.password)
+        await db.users.update_one({"id": user_doc["id"]}, {"$set": {"hashed_password": new_hash}})
+        await invalidate_principal(user_doc["id"])
+    
     user = User(**user_doc)
     access_token = create_access_token(data={"sub": user.id, "role": user.role})
     return Token(access_token=access_token, token_type="bearer", user=user)
@@ -312,29 +540,60 @@ async def login(credentials: UserLogin):
 async def get_me(current_user: User = Depends(get_current_user)):
     return current_user
 
+@api_router.get("/auth/cache-stats")
+async def get_principal_cache_stats(current_user: User = Depends(get_admin_user)):
+    return get_principal_cache().stats()
+
+@api_router.get("/auth/hash-stats")
+async def get_password_hash_stats(current_user: User = Depends(get_admin_user)):
+    return password_hasher.stats()
+
+@api_router.get("/jobs/stats")
+async def get_job_stats(current_user: User = Depends(get_admin_user)):
+    return await job_queue.stats()
+
+@api_router.get("/jobs/{job_id}")
+async def get_job(job_id: str, current_user: User = Depends(get_admin_user)):
+    job = await job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@api_router.get("/profiling/traces")
+async def get_profiling_traces(limit: int = 50, current_user: User = Depends(get_admin_user)):
+    """Most recent profiled requests first"""
+    return list(recent_traces)[::-1][:limit]
+
+@api_router.get("/profiling/slow-queries")
+async def get_slow_queries(limit: int = 50, current_user: User = Depends(get_admin_user)):
+    return list(recent_slow_queries)[::-1][:limit]
+
+@api_router.get("/cache/stats")
+async def get_response_cache_stats(current_user: User = Depends(get_admin_user)):
+    return response_cache.stats()
+
 @api_router.post("/clients", response_model=Client)
 async def create_client(client_data: ClientCreate, current_user: User = Depends(get_admin_user)):
     client = Client(**client_data.model_dump())
     client_dict = client.model_dump()
-    client_dict["created_at"] = client_dict["created_at"].isoformat()
     await db.clients.insert_one(client_dict)
+    await record_client_change(db, 1)
     return client
 
-@api_router.get("/clients", response_model=List[Client])
-async def get_clients(current_user: User = Depends(get_admin_user)):
-    clients = await db.clients.find({}, {"_id": 0}).to_list(1000)
-    for c in clients:
-        if isinstance(c["created_at"], str):
-            c["created_at"] = datetime.fromisoformat(c["created_at"])
-    return clients
+@api_router.get("/clients", response_model=Page[Client])
+async def get_clients(
+    page: PageParams = Depends(),
+    fieldset: FieldsetParams = Depends(),
+    current_user: User = Depends(get_admin_user)
+):
+    model = client_fieldsets.select(fieldset)
+    return fieldset_response(model, await paginate(db.clients, {}, page, projection=model_projection(model)))
 
 @api_router.get("/clients/{client_id}", response_model=Client)
 async def get_client(client_id: str, current_user: User = Depends(get_admin_user)):
     client = await db.clients.find_one({"id": client_id}, {"_id": 0})
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
-    if isinstance(client["created_at"], str):
-        client["created_at"] = datetime.fromisoformat(client["created_at"])
     return Client(**client)
 
 @api_router.put("/clients/{client_id}", response_model=Client)
@@ -343,9 +602,8 @@ async def update_client(client_id: str, client_data: ClientCreate, current_user:
     result = await db.clients.update_one({"id": client_id}, {"$set": update_data})
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Client not found")
+    response_cache.invalidate(f"client:{client_id}")
     client = await db.clients.find_one({"id": client_id}, {"_id": 0})
-    if isinstance(client["created_at"], str):
-        client["created_at"] = datetime.fromisoformat(client["created_at"])
     return Client(**client)
 
 @api_router.delete("/clients/{client_id}")
@@ -353,110 +611,145 @@ async def delete_client(client_id: str, current_user: User = Depends(get_admin_u
     result = await db.clients.delete_one({"id": client_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Client not found")
+    await record_client_change(db, -1)
+    response_cache.invalidate(f"client:{client_id}")
     return {"message": "Client deleted successfully"}
 
 @api_router.post("/projects", response_model=Project)
 async def create_project(project_data: ProjectCreate, current_user: User = Depends(get_admin_user)):
-    project = Project(**project_data.model_dump())
+    project = Project(**project_data.model_dump(), **await delta_sync.stamp())
     project_dict = project.model_dump()
-    project_dict["created_at"] = project_dict["created_at"].isoformat()
-    project_dict["start_date"] = project_dict["start_date"].isoformat()
-    project_dict["deadline"] = project_dict["deadline"].isoformat()
     await db.projects.insert_one(project_dict)
+    await record_project_change(db, None, project_dict)
+    if project.is_portfolio:
+        response_cache.invalidate("portfolio")
     return project
 
-@api_router.get("/projects", response_model=List[Project])
-async def get_projects(current_user: User = Depends(get_admin_user)):
-    projects = await db.projects.find({}, {"_id": 0}).to_list(1000)
-    for p in projects:
-        if isinstance(p["created_at"], str):
-            p["created_at"] = datetime.fromisoformat(p["created_at"])
-        if isinstance(p["start_date"], str):
-            p["start_date"] = datetime.fromisoformat(p["start_date"])
-        if isinstance(p["deadline"], str):
-            p["deadline"] = datetime.fromisoformat(p["deadline"])
-    return projects
+@api_router.get("/projects", response_model=Page[Project])
+async def get_projects(
+    page: PageParams = Depends(),
+    fieldset: FieldsetParams = Depends(),
+    current_user: User = Depends(get_admin_user)
+):
+    model = project_fieldsets.select(fieldset)
+    return fieldset_response(model, await paginate(db.projects, {}, page, projection=model_projection(model)))
 
 @api_router.get("/projects/portfolio")
-async def get_portfolio_projects():
-    projects = await db.projects.find({"is_portfolio": True}, {"_id": 0, "share_link": 0}).to_list(1000)
-    for p in projects:
-        if isinstance(p["created_at"], str):
-            p["created_at"] = datetime.fromisoformat(p["created_at"])
-        if isinstance(p.get("start_date"), str):
-            p["start_date"] = datetime.fromisoformat(p["start_date"])
-        if isinstance(p.get("deadline"), str):
-            p["deadline"] = datetime.fromisoformat(p["deadline"])
-    return projects
+async def get_portfolio_projects(request: Request, page: PageParams = Depends(), fieldset: FieldsetParams = Depends()):
+    model = portfolio_fieldsets.select(fieldset)
+    return await cached_json_response(
+        request,
+        lambda: paginate(public_db.projects, {"is_portfolio": True}, page, projection=model_projection(model)),
+        tags=lambda result: ["portfolio"],
+        cache_control=PUBLIC_CACHE_CONTROL
+    )
 
 @api_router.get("/projects/{project_id}", response_model=Project)
 async def get_project(project_id: str, current_user: User = Depends(get_admin_user)):
     project = await db.projects.find_one({"id": project_id}, {"_id": 0})
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    if isinstance(project["created_at"], str):
-        project["created_at"] = datetime.fromisoformat(project["created_at"])
-    if isinstance(project["start_date"], str):
-        project["start_date"] = datetime.fromisoformat(project["start_date"])
-    if isinstance(project["deadline"], str):
-        project["deadline"] = datetime.fromisoformat(project["deadline"])
     return Project(**project)
 
 @api_router.get("/projects/share/{share_link}")
-async def get_project_by_share_link(share_link: str):
-    project = await db.projects.find_one({"share_link": share_link}, {"_id": 0})
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    if isinstance(project["created_at"], str):
-        project["created_at"] = datetime.fromisoformat(project["created_at"])
-    if isinstance(project["start_date"], str):
-        project["start_date"] = datetime.fromisoformat(project["start_date"])
-    if isinstance(project["deadline"], str):
-        project["deadline"] = datetime.fromisoformat(project["deadline"])
+async def get_project_by_share_link(share_link: str, request: Request):
+    async def load():
+        page = await load_share_page(public_db, share_link)
+        if not page:
+            raise HTTPException(status_code=404, detail="Project not found")
+        return page
     
-    client = await db.clients.find_one({"id": project["client_id"]}, {"_id": 0})
-    messages = await db.messages.find({"project_id": project["id"]}, {"_id": 0}).sort("created_at", 1).to_list(1000)
-    files = await db.files.find({"project_id": project["id"]}, {"_id": 0}).to_list(1000)
-    srs_docs = await db.srs_documents.find({"project_id": project["id"]}, {"_id": 0}).to_list(1000)
-    
-    return {
-        "project": project,
-        "client": client,
-        "messages": messages,
-        "files": files,
-        "srs_documents": srs_docs
-    }
+    return await cached_json_response(
+        request,
+        load,
+        tags=lambda page: [f"project:{page['project']['id']}", f"client:{page['project']['client_id']}"]
+    )
 
 @api_router.put("/projects/{project_id}", response_model=Project)
 async def update_project(project_id: str, project_data: ProjectUpdate, current_user: User = Depends(get_admin_user)):
-    update_data = project_data.model_dump(exclude_unset=True)
-    if "start_date" in update_data and update_data["start_date"]:
-        update_data["start_date"] = update_data["start_date"].isoformat()
-    if "deadline" in update_data and update_data["deadline"]:
-        update_data["deadline"] = update_data["deadline"].isoformat()
+    update_data = {**project_data.model_dump(exclude_unset=True), **await delta_sync.stamp()}
     
-    result = await db.projects.update_one({"id": project_id}, {"$set": update_data})
-    if result.matched_count == 0:
+    before = await db.projects.find_one_and_update(
+        {"id": project_id}, project_update(update_data), {"_id": 0}, return_document=ReturnDocument.BEFORE
+    )
+    if before is None:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    project = await db.projects.find_one({"id": project_id}, {"_id": 0})
-    if isinstance(project["created_at"], str):
-        project["created_at"] = datetime.fromisoformat(project["created_at"])
-    if isinstance(project["start_date"], str):
-        project["start_date"] = datetime.fromisoformat(project["start_date"])
-    if isinstance(project["deadline"], str):
-        project["deadline"] = datetime.fromisoformat(project["deadline"])
+    project = {**before, **update_data}
+    if before.get("milestones"):
+        # Progress follows the milestones, the one sent was not stored
+        project["progress"] = before.get("progress", 0)
+    await record_project_change(db, before, project)
+    response_cache.invalidate(f"project:{project_id}", "portfolio")
     return Project(**project)
 
-@api_router.delete("/projects/{project_id}")
+def milestone_changed(project_id: str, result: dict) -> MilestoneState:
+    response_cache.invalidate(f"project:{project_id}", "portfolio")
+    return MilestoneState(**result)
+
+@api_router.post("/projects/{project_id}/milestones", response_model=MilestoneState)
+async def create_milestone(project_id: str, milestone_data: MilestoneCreate, current_user: User = Depends(get_admin_user)):
+    milestone = Milestone(**milestone_data.model_dump())
+    result = await add_milestone(db.projects, project_id, milestone.model_dump(), await delta_sync.stamp())
+    if result is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return milestone_changed(project_id, result)
+
+@api_router.put("/projects/{project_id}/milestones/order", response_model=MilestoneState)
+async def order_milestones(project_id: str, order: MilestoneOrder, current_user: User = Depends(get_admin_user)):
+    result = await reorder_milestones(db.projects, project_id, order.milestone_ids, await delta_sync.stamp())
+    if result is None:
+        if not await db.projects.find_one({"id": project_id}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Project not found")
+        raise HTTPException(status_code=409, detail="milestone_ids must list each of the project's milestones once")
+    return milestone_changed(project_id, result)
+
+@api_router.patch("/projects/{project_id}/milestones/{milestone_id}", response_model=MilestoneState)
+async def patch_milestone(
+    project_id: str,
+    milestone_id: str,
+    milestone_data: MilestoneUpdate,
+    current_user: User = Depends(get_admin_user)
+):
+    changes = milestone_data.model_dump(exclude_unset=True, exclude_none=True)
+    if not changes:
+        raise HTTPException(status_code=400, detail="Nothing to update")
+    result = await update_milestone(db.projects, project_id, milestone_id, changes, await delta_sync.stamp())
+    if result is None:
+        raise HTTPException(status_code=404, detail="Milestone not found")
+    return milestone_changed(project_id, result)
+
+@api_router.delete("/projects/{project_id}/milestones/{milestone_id}", response_model=MilestoneState)
+async def remove_milestone(project_id: str, milestone_id: str, current_user: User = Depends(get_admin_user)):
+    result = await delete_milestone(db.projects, project_id, milestone_id, await delta_sync.stamp())
+    if result is None:
+        raise HTTPException(status_code=404, detail="Milestone not found")
+    return milestone_changed(project_id, result)
+
+@api_router.delete("/projects/{project_id}", status_code=202)
 async def delete_project(project_id: str, current_user: User = Depends(get_admin_user)):
-    result = await db.projects.delete_one({"id": project_id})
-    if result.deleted_count == 0:
+    if not await db.projects.find_one({"id": project_id}, {"_id": 1}):
         raise HTTPException(status_code=404, detail="Project not found")
-    await db.messages.delete_many({"project_id": project_id})
-    await db.files.delete_many({"project_id": project_id})
-    await db.srs_documents.delete_many({"project_id": project_id})
-    return {"message": "Project deleted successfully"}
+    # Project is removed now, its messages, files and storage objects in the background
+    job = await project_deletions.start(project_id)
+    return {"message": "Project deleted successfully", "job_id": job["id"]}
+
+@api_router.get("/projects/deletions/{job_id}")
+async def get_project_deletion(job_id: str, current_user: User = Depends(get_admin_user)):
+    job = await project_deletions.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Deletion job not found")
+    return job
+
+@api_router.post("/projects/deletions/{job_id}/retry")
+async def retry_project_deletion(job_id: str, current_user: User = Depends(get_admin_user)):
+    """Run a failed deletion again from the phase it stopped in"""
+    job = await project_deletions.retry(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Deletion job not found")
+    if job["status"] == "completed":
+        raise HTTPException(status_code=409, detail="Deletion already completed")
+    return job
 
 @api_router.post("/messages", response_model=Message)
 async def create_message(message_data: MessageCreate, current_user: User = Depends(get_current_user)):
@@ -464,20 +757,47 @@ async def create_message(message_data: MessageCreate, current_user: User = Depen
         project_id=message_data.project_id,
         message=message_data.message,
         sender_name=current_user.name,
-        sender_role=current_user.role
+        sender_role=current_user.role,
+        **await delta_sync.stamp()
     )
     message_dict = message.model_dump()
-    message_dict["created_at"] = message_dict["created_at"].isoformat()
     await db.messages.insert_one(message_dict)
+    await message_broker.publish(message.project_id, message.model_dump())
+    response_cache.invalidate(f"project:{message.project_id}")
     return message
 
-@api_router.get("/messages/{project_id}", response_model=List[Message])
-async def get_messages(project_id: str):
-    messages = await db.messages.find({"project_id": project_id}, {"_id": 0}).sort("created_at", 1).to_list(1000)
-    for m in messages:
-        if isinstance(m["created_at"], str):
-            m["created_at"] = datetime.fromisoformat(m["created_at"])
-    return messages
+@api_router.get("/messages/{project_id}", response_model=Page[Message])
+async def get_messages(project_id: str, page: PageParams = Depends()):
+    return page_response(
+        Message, await paginate(public_db.messages, {"project_id": project_id}, page, projection=model_projection(Message))
+    )
+
+@api_router.get("/messages/{project_id}/stream")
+async def stream_messages(
+    project_id: str,
+    after: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None)
+):
+    """Server-sent events for new messages, resumes after Last-Event-ID (or ?after=<message id>)"""
+    return StreamingResponse(
+        message_events(db, message_broker, project_id, last_event_id or after),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def download_record(collection: str, record_id: str, filename_of) -> Response:
+    """Attachment response for the stored object of a file or SRS record"""
+    record = await public_db[collection].find_one(
+        {"id": record_id}, {"_id": 0, "file_url": 1, "storage_path": 1, "storage_status": 1, "filename": 1, "title": 1}
+    )
+    if record is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    if record.get("storage_status", "stored") != "stored":
+        raise HTTPException(status_code=409, detail=f"File is {record['storage_status']}, not stored yet")
+    storage_path = record.get("storage_path") or storage.path_from_url(record["file_url"])
+    if not storage_path:
+        raise HTTPException(status_code=404, detail="File not found")
+    return storage.download(storage_path, filename_of(record))
 
 @api_router.post("/upload")
 async def upload_file(
@@ -487,62 +807,80 @@ async def upload_file(
     description: Optional[str] = Form(None),
     current_user: User = Depends(get_current_user)
 ):
-    if not supabase:
-        raise HTTPException(status_code=500, detail="Supabase not configured. Please add SUPABASE_URL and SUPABASE_KEY to backend .env")
+    check_upload_size(file)
     
     try:
-        # Read file content
-        content = await file.read()
-        
-        # Generate unique filename with project folder structure
-        file_extension = file.filename.split('.')[-1] if '.' in file.filename else ''
-        unique_filename = f"{project_id}/{uuid.uuid4()}.{file_extension}"
-        
-        # Upload to Supabase Storage
-        response = supabase.storage.from_(supabase_bucket).upload(
-            path=unique_filename,
-            file=content,
-            file_options={"content-type": file.content_type or "application/octet-stream"}
-        )
-        
-        # Get public URL
-        public_url = supabase.storage.from_(supabase_bucket).get_public_url(unique_filename)
+        # Stored once per content, under the path of its blob
+        staged_path, content_hash = await stage_upload(file)
         
-        # Create file record in database
-        file_upload = FileUpload(
-            project_id=project_id,
-            filename=file.filename,
-            file_url=public_url,
-            file_type=file.content_type or "unknown",
-            category=category,
-            description=description,
-            uploaded_by=current_user.name
-        )
+        async def build_record(storage_path: str) -> FileUpload:
+            # Public URL is known up front, the object lands once the upload job ran
+            return FileUpload(
+                project_id=project_id,
+                filename=file.filename,
+                file_url=storage.public_url(storage_path),
+                file_type=file.content_type or "unknown",
+                category=category,
+                description=description,
+                uploaded_by=current_user.name,
+                storage_path=storage_path,
+                storage_status="pending",
+                content_hash=content_hash,
+                **await delta_sync.stamp()
+            )
         
-        file_dict = file_upload.model_dump()
-        file_dict["created_at"] = file_dict["created_at"].isoformat()
-        await db.files.insert_one(file_dict)
+        file_upload = await store_record_upload("files", file, staged_path, content_hash, build_record)
+        response_cache.invalidate(f"project:{project_id}")
         
         return file_upload
     except Exception as e:
         logging.error(f"Upload failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
-@api_router.get("/files/{project_id}", response_model=List[FileUpload])
-async def get_files(project_id: str):
-    files = await db.files.find({"project_id": project_id}, {"_id": 0}).to_list(1000)
-    for f in files:
-        if isinstance(f["created_at"], str):
-            f["created_at"] = datetime.fromisoformat(f["created_at"])
-    return files
+@api_router.get("/files/{project_id}", response_model=Page[FileUpload])
+async def get_files(project_id: str, request: Request, page: PageParams = Depends()):
+    async def load():
+        result = await paginate(public_db.files, {"project_id": project_id}, page, projection=model_projection(FileUpload))
+        apply_defaults(FileUpload, result["items"])
+        return result
+    
+    return await cached_json_response(request, load, tags=lambda result: [f"project:{project_id}"])
+
+@api_router.get("/files/{file_id}/download")
+async def download_file(file_id: str):
+    """The file as an attachment, Range requests are answered (or redirected to storage that answers them)"""
+    return await download_record("files", file_id, lambda record: record["filename"])
 
 @api_router.delete("/files/{file_id}")
 async def delete_file(file_id: str, current_user: User = Depends(get_admin_user)):
-    result = await db.files.delete_one({"id": file_id})
-    if result.deleted_count == 0:
+    file_doc = await db.files.find_one_and_delete(
+        {"id": file_id}, {"_id": 0, "project_id": 1, "file_url": 1, "storage_path": 1, "content_hash": 1}
+    )
+    if file_doc is None:
         raise HTTPException(status_code=404, detail="File not found")
+    await delta_sync.deleted("files", [file_id])
+    if file_doc.get("content_hash"):
+        # The object goes once no other record references the same content
+        await blob_store.release([file_doc["content_hash"]])
+    else:
+        storage_path = file_doc.get("storage_path") or storage.path_from_url(file_doc["file_url"])
+        if storage_path:
+            await job_queue.enqueue("storage.remove", {"paths": [storage_path]})
+    response_cache.invalidate(f"project:{file_doc['project_id']}")
     return {"message": "File deleted successfully"}
 
+@api_router.get("/storage/{storage_path:path}")
+async def get_storage_object(storage_path: str):
+    """Public URL of objects in local storage, Supabase serves its own"""
+    if not isinstance(storage, LocalStorage):
+        raise HTTPException(status_code=404, detail="File not found")
+    # Blob paths carry no extension, their type was recorded on upload
+    content_hash = blob_hash(storage_path)
+    blob = content_hash and await db.blobs.find_one(
+        {"_id": content_hash, "storage_path": storage_path}, {"_id": 0, "content_type": 1}
+    )
+    return storage.serve(storage_path, media_type=blob["content_type"] if blob else None)
+
 @api_router.post("/srs")
 async def upload_srs(
     file: UploadFile = File(...),
@@ -552,109 +890,180 @@ async def upload_srs(
     description: Optional[str] = Form(None),
     current_user: User = Depends(get_current_user)
 ):
-    if not supabase:
-        raise HTTPException(status_code=500, detail="Supabase not configured. Please add SUPABASE_URL and SUPABASE_KEY to backend .env")
+    check_upload_size(file)
     
     try:
-        # Read file content
-        content = await file.read()
-        
-        # Generate unique filename for SRS documents
-        file_extension = file.filename.split('.')[-1] if '.' in file.filename else ''
-        unique_filename = f"{project_id}/srs/{uuid.uuid4()}.{file_extension}"
-        
-        # Upload to Supabase Storage
-        response = supabase.storage.from_(supabase_bucket).upload(
-            path=unique_filename,
-            file=content,
-            file_options={"content-type": file.content_type or "application/octet-stream"}
-        )
-        
-        # Get public URL
-        public_url = supabase.storage.from_(supabase_bucket).get_public_url(unique_filename)
+        # Stored once per content, under the path of its blob
+        staged_path, content_hash = await stage_upload(file)
         
-        # Create SRS document record
-        srs_doc = SRSDocument(
-            project_id=project_id,
-            title=title,
-            version=version,
-            file_url=public_url,
-            uploaded_by=current_user.name,
-            description=description
-        )
+        async def build_record(storage_path: str) -> SRSDocument:
+            # Public URL is known up front, the object lands once the upload job ran
+            return SRSDocument(
+                project_id=project_id,
+                title=title,
+                version=version,
+                file_url=storage.public_url(storage_path),
+                uploaded_by=current_user.name,
+                description=description,
+                filename=file.filename,
+                storage_path=storage_path,
+                storage_status="pending",
+                content_hash=content_hash,
+                **await delta_sync.stamp()
+            )
         
-        srs_dict = srs_doc.model_dump()
-        srs_dict["created_at"] = srs_dict["created_at"].isoformat()
-        await db.srs_documents.insert_one(srs_dict)
+        srs_doc = await store_record_upload("srs_documents", file, staged_path, content_hash, build_record)
+        response_cache.invalidate(f"project:{project_id}")
         
         return srs_doc
     except Exception as e:
         logging.error(f"Upload failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
-@api_router.get("/srs/{project_id}", response_model=List[SRSDocument])
-async def get_srs_documents(project_id: str):
-    docs = await db.srs_documents.find({"project_id": project_id}, {"_id": 0}).to_list(1000)
-    for d in docs:
-        if isinstance(d["created_at"], str):
-            d["created_at"] = datetime.fromisoformat(d["created_at"])
-    return docs
+@api_router.get("/srs/{project_id}", response_model=Page[SRSDocument])
+async def get_srs_documents(project_id: str, request: Request, page: PageParams = Depends()):
+    async def load():
+        result = await paginate(
+            public_db.srs_documents, {"project_id": project_id}, page, projection=model_projection(SRSDocument)
+        )
+        apply_defaults(SRSDocument, result["items"])
+        return result
+    
+    return await cached_json_response(request, load, tags=lambda result: [f"project:{project_id}"])
+
+@api_router.get("/srs/{srs_id}/download")
+async def download_srs(srs_id: str):
+    return await download_record("srs_documents", srs_id, lambda record: record.get("filename") or record["title"])
 
 @api_router.put("/srs/{srs_id}/status")
 async def update_srs_status(srs_id: str, status: str, current_user: User = Depends(get_admin_user)):
-    result = await db.srs_documents.update_one({"id": srs_id}, {"$set": {"status": status}})
-    if result.matched_count == 0:
+    srs_doc = await db.srs_documents.find_one_and_update(
+        {"id": srs_id}, {"$set": {"status": status, **await delta_sync.stamp()}}, {"_id": 0, "project_id": 1}
+    )
+    if srs_doc is None:
         raise HTTPException(status_code=404, detail="SRS document not found")
+    response_cache.invalidate(f"project:{srs_doc['project_id']}")
     return {"message": "Status updated successfully"}
 
-@api_router.post("/bookings", response_model=Booking)
+@api_router.post("/bookings", response_model=Booking,
+                 dependencies=[Depends(rate_limit(rate_limiter, "bookings", BOOKINGS_LIMIT))])
 async def create_booking(booking_data: BookingCreate):
-    booking = Booking(**booking_data.model_dump())
+    booking = Booking(**booking_data.model_dump(), **await delta_sync.stamp())
     booking_dict = booking.model_dump()
-    booking_dict["created_at"] = booking_dict["created_at"].isoformat()
     await db.bookings.insert_one(booking_dict)
+    await record_booking_change(db, None, booking_dict)
+    if BOOKING_WEBHOOK_URL:
+        await job_queue.enqueue("booking.notify", booking.model_dump(mode="json"))
     return booking
 
-@api_router.get("/bookings", response_model=List[Booking])
-async def get_bookings(current_user: User = Depends(get_admin_user)):
-    bookings = await db.bookings.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    for b in bookings:
-        if isinstance(b["created_at"], str):
-            b["created_at"] = datetime.fromisoformat(b["created_at"])
-    return bookings
+@api_router.get("/bookings", response_model=Page[Booking])
+async def get_bookings(
+    page: PageParams = Depends(),
+    fieldset: FieldsetParams = Depends(),
+    current_user: User = Depends(get_admin_user)
+):
+    model = booking_fieldsets.select(fieldset)
+    return fieldset_response(
+        model, await paginate(db.bookings, {}, page, projection=model_projection(model), descending=True)
+    )
 
 @api_router.put("/bookings/{booking_id}/status")
 async def update_booking_status(booking_id: str, status: str, current_user: User = Depends(get_admin_user)):
-    result = await db.bookings.update_one({"id": booking_id}, {"$set": {"status": status}})
-    if result.matched_count == 0:
+    before = await db.bookings.find_one_and_update(
+        {"id": booking_id}, {"$set": {"status": status, **await delta_sync.stamp()}}, {"_id": 0, "status": 1}
+    )
+    if before is None:
         raise HTTPException(status_code=404, detail="Booking not found")
+    await record_booking_change(db, before, {"status": status})
     return {"message": "Booking status updated successfully"}
 
+@api_router.get("/search", response_model=Page[SearchResult])
+async def search_records(params: SearchParams = Depends(), current_user: User = Depends(get_admin_user)):
+    """Ranked keyword search over projects, messages, bookings and clients"""
+    return await search(db, params)
+
 @api_router.get("/dashboard/stats")
 async def get_dashboard_stats(current_user: User = Depends(get_admin_user)):
-    total_clients = await db.clients.count_documents({})
-    total_projects = await db.projects.count_documents({})
-    active_projects = await db.projects.count_documents({"status": {"$in": ["designing", "development", "testing", "revision"]}})
-    completed_projects = await db.projects.count_documents({"status": "completed"})
-    pending_bookings = await db.bookings.count_documents({"status": "pending"})
-    
-    projects = await db.projects.find({}, {"_id": 0, "total_price": 1, "amount_paid": 1}).to_list(1000)
-    total_revenue = sum(p.get("total_price", 0) for p in projects)
-    total_paid = sum(p.get("amount_paid", 0) for p in projects)
-    pending_payments = total_revenue - total_paid
-    
-    return {
-        "total_clients": total_clients,
-        "total_projects": total_projects,
-        "active_projects": active_projects,
-        "completed_projects": completed_projects,
-        "pending_bookings": pending_bookings,
-        "total_revenue": total_revenue,
-        "pending_payments": pending_payments
-    }
+    return await load_dashboard_stats(db)
+
+# ============================================
+# Delta sync
+# ============================================
+@api_router.get("/sync")
+async def sync_changes(params: SyncParams = Depends(), current_user: User = Depends(get_admin_user)):
+    """
+    Records written and deleted since `since`, across projects, messages, files, SRS documents and bookings
+    - Pass `next` as `since` on the following call, repeat right away while `has_more`
+    - 410 means the token expired, start again without `since`
+    """
+    return FastJSONResponse(await delta_sync.changes(params))
+
+# ============================================
+# Bulk import / export
+# ============================================
+BULK_MODELS = {"clients": Client, "projects": Project, "bookings": Booking}
+# Response cache tag prefix of each collection's records
+BULK_CACHE_TAGS = {"clients": "client", "projects": "project"}
+
+def check_bulk_request(collection: str, fmt: str, mode: str = "insert"):
+    if collection not in BULK_MODELS:
+        raise HTTPException(status_code=404, detail=f"Bulk import/export is not available for {collection}")
+    if fmt not in BULK_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format: {fmt}")
+    if mode not in IMPORT_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown import mode: {mode}")
+
+async def bulk_import(collection: str, records, mode: str = "insert") -> dict:
+    """Import read_records() output into `collection`, shared with bulk_data.py"""
+    # Synced collections get a revision per record, imported values are replaced
+    prepare = delta_sync.stamp_many if collection in delta_sync.models else None
+    prefix = BULK_CACHE_TAGS.get(collection)
+
+    def written(record_ids: List[str]):
+        # Invalidated batch by batch, the ids of a whole import are never held
+        response_cache.invalidate("portfolio", *(f"{prefix}:{record_id}" for record_id in record_ids))
+
+    report = await import_records(
+        db[collection], BULK_MODELS[collection], records, mode, prepare, written if prefix else None
+    )
+    if report.inserted or report.updated:
+        await invalidate_dashboard_stats(db)
+    return report.to_dict()
+
+@api_router.post("/import/{collection}")
+async def import_collection(
+    collection: str,
+    request: Request,
+    fmt: str = Query("ndjson", alias="format"),
+    mode: str = "insert",
+    current_user: User = Depends(get_admin_user)
+):
+    """
+    Streams the request body (NDJSON or CSV) into `collection`
+    - mode=upsert replaces records with the same id instead of reporting duplicates
+    """
+    check_bulk_request(collection, fmt, mode)
+    return await bulk_import(collection, read_records(iter_lines(request.stream()), fmt), mode)
+
+@api_router.get("/export/{collection}")
+async def export_collection(
+    collection: str,
+    fmt: str = Query("ndjson", alias="format"),
+    current_user: User = Depends(get_admin_user)
+):
+    check_bulk_request(collection, fmt)
+    return StreamingResponse(
+        export_records(db[collection], BULK_MODELS[collection], fmt),
+        media_type=BULK_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{collection}.{fmt}"'}
+    )
 
 app.include_router(api_router)
 
+# Oversized uploads are refused before the multipart parser spools them,
+# inside CORS so the browser can read the 413
+app.add_middleware(UploadLimitMiddleware, paths=["/api/upload", "/api/srs"])
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -663,12 +1072,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so latency includes CORS handling
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+async def create_db_indexes():
+    try:
+        await ensure_indexes(db)
+        for collection, query, sort in await find_unindexed_queries(db):
+            logger.warning(f"Query without index on {collection}: filter={list(query)} sort={sort}")
+    except Exception as e:
+        logger.error(f"Index bootstrap failed: {e}")
+
+async def convert_legacy_dates():
+    try:
+        results = await migrate_dates(db)
+    except Exception as e:
+        logger.error(f"Date migration failed: {e}")
+        return
+    for collection, (converted, unparseable) in results.items():
+        if converted:
+            logger.info(f"Converted {converted} string dates in {collection}")
+        for record_id, field, value in unparseable:
+            logger.warning(f"Unparseable date left as a string, keyset pages will skip it: {collection} {record_id} {field}={value!r}")
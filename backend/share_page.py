@@ -0,0 +1,77 @@
+"""
+Public share page assembly
+
+The share page is the highest-traffic route, so the project, its client
+and the capped message/file/SRS lists are fetched with a single
+aggregation ($lookup per sub-collection) instead of five round trips.
+"""
+import os
+from typing import Optional
+
+SHARE_PAGE_LIMITS = {
+    "messages": int(os.environ.get('SHARE_PAGE_MAX_MESSAGES', '200')),
+    "files": int(os.environ.get('SHARE_PAGE_MAX_FILES', '200')),
+    "srs_documents": int(os.environ.get('SHARE_PAGE_MAX_SRS_DOCUMENTS', '100')),
+}
+
+
+def _lookup_by_project(collection: str, limit: int, newest_first: bool) -> dict:
+    direction = -1 if newest_first else 1
+    return {
+        "$lookup": {
+            "from": collection,
+            "let": {"project_id": "$id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$project_id", "$$project_id"]}}},
+                {"$sort": {"created_at": direction, "id": direction}},
+                {"$limit": limit + 1},
+                {"$project": {"_id": 0}},
+            ],
+            "as": collection,
+        }
+    }
+
+
+def share_page_pipeline(share_link: str, limits: dict = SHARE_PAGE_LIMITS) -> list:
+    return [
+        {"$match": {"share_link": share_link}},
+        {"$limit": 1},
+        {"$project": {"_id": 0}},
+        {
+            "$lookup": {
+                "from": "clients",
+                "let": {"client_id": "$client_id"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$id", "$$client_id"]}}},
+                    {"$limit": 1},
+                    {"$project": {"_id": 0}},
+                ],
+                "as": "client",
+            }
+        },
+        # Latest messages win the cap, they are put back in chronological order below
+        _lookup_by_project("messages", limits["messages"], newest_first=True),
+        _lookup_by_project("files", limits["files"], newest_first=False),
+        _lookup_by_project("srs_documents", limits["srs_documents"], newest_first=False),
+    ]
+
+
+async def load_share_page(db, share_link: str, limits: dict = SHARE_PAGE_LIMITS) -> Optional[dict]:
+    """
+    Return the share page payload, None if the link is unknown
+    - Each sub-list is capped to its limit, has_more flags the truncated ones
+    - Older messages can be paged through GET /api/messages/{project_id}
+    """
+    docs = await db.projects.aggregate(share_page_pipeline(share_link, limits)).to_list(1)
+    if not docs:
+        return None
+    project = docs[0]
+
+    client = project.pop("client")
+    page = {"project": project, "client": client[0] if client else None, "has_more": {}}
+    for collection, limit in limits.items():
+        items = project.pop(collection)
+        page["has_more"][collection] = len(items) > limit
+        page[collection] = items[:limit]
+    page["messages"].reverse()
+    return page
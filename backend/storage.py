@@ -0,0 +1,220 @@
+"""
+Object storage for uploads
+
+Everything that stores, removes or serves uploaded objects goes through
+a Storage driver, selected with STORAGE_BACKEND:
+
+- supabase: Supabase Storage. Uploads are streamed with
+  SupabaseStreamingUploader and downloads redirect to the bucket's
+  public URL, which serves Range requests itself
+- local: a directory on this host (STORAGE_LOCAL_DIR), for development,
+  offline runs and load tests. Objects are served by the app with
+  FileResponse, which answers Range requests and hands the file to the
+  server with the ASGI pathsend extension where the server supports it
+  (otherwise it streams in 64 KB chunks)
+
+Without STORAGE_BACKEND the Supabase driver is used when SUPABASE_URL and
+SUPABASE_KEY are set, the local one otherwise.
+
+Configuration (backend .env):
+- STORAGE_LOCAL_DIR: root directory of the local driver
+- STORAGE_PUBLIC_URL: URL the local objects are published under, set it
+  to the backend's absolute URL when the frontend runs on another origin
+"""
+import asyncio
+import os
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List, Optional
+from urllib.parse import quote
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import FileResponse, RedirectResponse, Response
+
+from metrics import SUPABASE_REQUEST_DURATION, observe
+from uploads import UPLOAD_CHUNK_BYTES, SupabaseStreamingUploader, storage_path_from_url
+
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', '')
+STORAGE_LOCAL_DIR = os.environ.get('STORAGE_LOCAL_DIR', str(Path(__file__).parent / 'local_storage'))
+STORAGE_PUBLIC_URL = os.environ.get('STORAGE_PUBLIC_URL', '/api/storage')
+
+LIST_PAGE_SIZE = 1000
+
+
+class Storage(ABC):
+    """Interface every driver implements, paths are relative to the bucket or root"""
+
+    name = ""
+
+    @abstractmethod
+    async def upload(self, path: str, file: UploadFile, content_type: str) -> int:
+        """Store `file` at `path`, returns the number of bytes stored"""
+
+    @abstractmethod
+    async def remove(self, paths: List[str]):
+        ...
+
+    @abstractmethod
+    async def list(self, prefix: str) -> List[str]:
+        """Every object path below `prefix`"""
+
+    @abstractmethod
+    def public_url(self, path: str) -> str:
+        ...
+
+    def path_from_url(self, url: str) -> Optional[str]:
+        """Object path of a public URL, for records stored without `storage_path`"""
+        return None
+
+    @abstractmethod
+    def download(self, path: str, filename: str) -> Response:
+        """Response delivering the object as an attachment named `filename`"""
+
+
+class SupabaseStorage(Storage):
+    name = "supabase"
+
+    def __init__(self, client, supabase_url: str, supabase_key: str, bucket: str):
+        self.client = client
+        self.bucket = bucket
+        self.uploader = SupabaseStreamingUploader(supabase_url, supabase_key, bucket)
+
+    async def upload(self, path: str, file: UploadFile, content_type: str) -> int:
+        return await self.uploader.upload(path, file, content_type)
+
+    async def remove(self, paths: List[str]):
+        with observe(SUPABASE_REQUEST_DURATION, operation="remove"):
+            await asyncio.to_thread(self.client.storage.from_(self.bucket).remove, paths)
+
+    def _list(self, prefix: str) -> List[str]:
+        paths = []
+        folders = [prefix]
+        while folders:
+            folder = folders.pop()
+            offset = 0
+            while True:
+                entries = self.client.storage.from_(self.bucket).list(
+                    folder, {"limit": LIST_PAGE_SIZE, "offset": offset}
+                )
+                for entry in entries:
+                    path = f"{folder}/{entry['name']}"
+                    # Folders are returned without an id
+                    if entry.get("id") is None:
+                        folders.append(path)
+                    else:
+                        paths.append(path)
+                if len(entries) < LIST_PAGE_SIZE:
+                    break
+                offset += len(entries)
+        return paths
+
+    async def list(self, prefix: str) -> List[str]:
+        with observe(SUPABASE_REQUEST_DURATION, operation="list"):
+            return await asyncio.to_thread(self._list, prefix)
+
+    def public_url(self, path: str) -> str:
+        return self.client.storage.from_(self.bucket).get_public_url(path)
+
+    def path_from_url(self, url: str) -> Optional[str]:
+        return storage_path_from_url(url, self.bucket)
+
+    def download(self, path: str, filename: str) -> Response:
+        # Supabase names the attachment after ?download= and serves ranges from its CDN
+        url = self.public_url(path).rstrip("?")
+        separator = "&" if "?" in url else "?"
+        return RedirectResponse(f"{url}{separator}download={quote(filename)}", status_code=307)
+
+
+class LocalStorage(Storage):
+    name = "local"
+
+    def __init__(self, root: str = STORAGE_LOCAL_DIR, public_url: str = STORAGE_PUBLIC_URL):
+        self.root = Path(root).resolve()
+        self.base_url = public_url.rstrip("/")
+
+    def resolve(self, path: str) -> Path:
+        """Absolute location of `path`, refusing paths that leave the root"""
+        target = (self.root / path).resolve()
+        if target == self.root or self.root not in target.parents:
+            raise HTTPException(status_code=404, detail="File not found")
+        return target
+
+    def _write(self, source, target: Path) -> int:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Written beside the target and renamed, so readers never see a partial object
+        partial = target.with_name(f".{target.name}.{uuid.uuid4().hex}.part")
+        size = 0
+        source.seek(0)
+        try:
+            with open(partial, "wb") as out:
+                while True:
+                    chunk = source.read(UPLOAD_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    out.write(chunk)
+                    size += len(chunk)
+            os.replace(partial, target)
+        finally:
+            if partial.exists():
+                partial.unlink()
+        return size
+
+    async def upload(self, path: str, file: UploadFile, content_type: str) -> int:
+        return await asyncio.to_thread(self._write, file.file, self.resolve(path))
+
+    def _remove(self, paths: List[str]):
+        for path in paths:
+            try:
+                self.resolve(path).unlink()
+            except FileNotFoundError:
+                pass
+
+    async def remove(self, paths: List[str]):
+        await asyncio.to_thread(self._remove, paths)
+
+    def _list(self, prefix: str) -> List[str]:
+        folder = self.root / prefix
+        if not folder.is_dir():
+            return []
+        return [
+            f.relative_to(self.root).as_posix() for f in folder.rglob("*")
+            if f.is_file() and not f.name.endswith(".part")
+        ]
+
+    async def list(self, prefix: str) -> List[str]:
+        return await asyncio.to_thread(self._list, prefix)
+
+    def public_url(self, path: str) -> str:
+        return f"{self.base_url}/{quote(path)}"
+
+    def path_from_url(self, url: str) -> Optional[str]:
+        prefix = f"{self.base_url}/"
+        return url[len(prefix):] if url.startswith(prefix) else None
+
+    def serve(self, path: str, filename: Optional[str] = None, media_type: Optional[str] = None) -> Response:
+        """FileResponse for the object, inline unless a download `filename` is given"""
+        target = self.resolve(path)
+        if not target.is_file():
+            raise HTTPException(status_code=404, detail="File not found")
+        # Uploads are served from the API's origin, never let them run script there
+        headers = {"Content-Security-Policy": "sandbox", "X-Content-Type-Options": "nosniff"}
+        if filename is None:
+            return FileResponse(target, media_type=media_type, headers=headers)
+        return FileResponse(
+            target, media_type=media_type, headers=headers, filename=filename, content_disposition_type="attachment"
+        )
+
+    def download(self, path: str, filename: str) -> Response:
+        return self.serve(path, filename)
+
+
+def create_storage(supabase=None, supabase_url: str = "", supabase_key: str = "", bucket: str = "") -> Storage:
+    backend = STORAGE_BACKEND or ("supabase" if supabase is not None else "local")
+    if backend == "supabase":
+        if supabase is None:
+            raise RuntimeError("STORAGE_BACKEND=supabase needs SUPABASE_URL and SUPABASE_KEY")
+        return SupabaseStorage(supabase, supabase_url, supabase_key, bucket)
+    if backend == "local":
+        return LocalStorage()
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
@@ -0,0 +1,213 @@
+"""
+Delta sync for the admin UI
+
+Every write to a synced collection stamps the record with `updated_at`
+and the next `revision`, taken from one counter shared by all of them,
+and every delete leaves a tombstone with a revision of its own.
+GET /api/sync?since=<token> returns what was written after the token
+across collections, in revision order, with the token for next time:
+
+    {changes: {projects: [...], ...}, deleted: {files: [id, ...], ...},
+     next: <token>, has_more: bool}
+
+- Revisions are taken just before the write lands, so a slow write can
+  become visible after a faster one with a higher revision. The token
+  therefore only moves past records written SYNC_SETTLE_SECONDS ago;
+  newer ones are returned again on the next call, and clients apply
+  changes by id, so repeats are harmless
+- Deleting a project deletes its messages, files and SRS documents
+  without tombstones, clients drop them along with the project
+- Tombstones expire after SYNC_TOMBSTONE_TTL_DAYS, a token older than
+  that gets 410 and the client syncs again without `since`
+- Records written before revisions existed are stamped by the
+  "sync.backfill" job queued at startup
+"""
+import asyncio
+import base64
+import binascii
+import json
+import logging
+import math
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Type
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+from pymongo import ReturnDocument, UpdateOne
+
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from serialisation import apply_defaults, model_projection
+
+SYNC_SETTLE_SECONDS = float(os.environ.get('SYNC_SETTLE_SECONDS', '5'))
+SYNC_TOMBSTONE_TTL_DAYS = int(os.environ.get('SYNC_TOMBSTONE_TTL_DAYS', '30'))
+
+REVISION_COUNTER = "sync_revision"
+BACKFILL_BATCH_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def encode_token(revision: int, issued_at: datetime) -> str:
+    raw = json.dumps([revision, int(issued_at.timestamp())], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_token(token: str) -> tuple:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        revision, issued_at = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        # json accepts Infinity, NaN and ints of any size, and bools are ints
+        if isinstance(revision, bool) or not isinstance(revision, int) or not 0 <= revision < 2 ** 63:
+            raise ValueError("revision is not a 64-bit count")
+        if isinstance(issued_at, bool) or not isinstance(issued_at, (int, float)) or not math.isfinite(issued_at):
+            raise ValueError("issued_at is not a finite number")
+        return revision, datetime.fromtimestamp(issued_at, timezone.utc)
+    except (ValueError, TypeError, OverflowError, OSError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+
+
+class SyncParams:
+    """Query parameters of GET /api/sync"""
+
+    def __init__(
+        self,
+        since: Optional[str] = Query(None, description="next token of the previous sync, omit for everything"),
+        collections: Optional[str] = Query(None, description="Comma-separated collections, default all"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    ):
+        self.since = since
+        self.collections = collections
+        self.limit = limit
+
+
+class DeltaSync:
+    def __init__(self, db, job_queue, models: Dict[str, Type[BaseModel]]):
+        self.db = db
+        self.job_queue = job_queue
+        # Synced collection -> model its records are returned as
+        self.models = models
+        job_queue.handler("sync.backfill", concurrency=1)(self._backfill)
+
+    async def reserve(self, count: int = 1) -> int:
+        """Take `count` consecutive revisions, returns the first"""
+        counter = await self.db.counters.find_one_and_update(
+            {"_id": REVISION_COUNTER},
+            {"$inc": {"value": count}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return counter["value"] - count + 1
+
+    async def stamp(self) -> dict:
+        """Fields to set on a record with any write"""
+        return {"revision": await self.reserve(), "updated_at": _now()}
+
+    async def stamp_many(self, docs: List[dict]):
+        """Stamp `docs` in place with one revision each, for batch writes"""
+        if not docs:
+            return
+        first = await self.reserve(len(docs))
+        now = _now()
+        for offset, doc in enumerate(docs):
+            doc["revision"] = first + offset
+            doc["updated_at"] = now
+
+    async def deleted(self, collection: str, record_ids: Iterable[str]):
+        """Leave tombstones for deleted records"""
+        tombstones = [{"collection": collection, "id": record_id} for record_id in record_ids]
+        await self.stamp_many(tombstones)
+        if tombstones:
+            await self.db.sync_tombstones.insert_many(tombstones)
+
+    async def changes(self, params: SyncParams) -> dict:
+        """Records and tombstones after `params.since`, at most `params.limit` of them"""
+        now = _now()
+        since = 0
+        if params.since:
+            since, issued_at = decode_token(params.since)
+            # Tombstones the client has not seen may have expired since
+            if now - issued_at > timedelta(days=SYNC_TOMBSTONE_TTL_DAYS, seconds=-SYNC_SETTLE_SECONDS):
+                raise HTTPException(status_code=410, detail="Sync token expired, sync again without since")
+        collections = list(self.models)
+        if params.collections:
+            collections = [c.strip() for c in params.collections.split(",") if c.strip()]
+            unknown = set(collections) - set(self.models)
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown collections: {', '.join(sorted(unknown))}")
+
+        # Each source's first limit + 1 contain the overall first limit + 1
+        query = {"revision": {"$gt": since}}
+        fetch = params.limit + 1
+        sources = [
+            self.db[name].find(query, model_projection(self.models[name])).sort("revision", 1).limit(fetch)
+            for name in collections
+        ]
+        sources.append(self.db.sync_tombstones.find(
+            {**query, "collection": {"$in": collections}}, {"_id": 0}
+        ).sort("revision", 1).limit(fetch))
+        results = await asyncio.gather(*(cursor.to_list(fetch) for cursor in sources))
+
+        merged = sorted(
+            [(doc["revision"], name, doc) for name, docs in zip(collections, results) for doc in docs]
+            + [(doc["revision"], None, doc) for doc in results[-1]],
+            key=lambda entry: entry[0],
+        )
+        truncated = len(merged) > params.limit
+        merged = merged[:params.limit]
+
+        changes = {name: [] for name in collections}
+        deleted = {name: [] for name in collections}
+        revision = since
+        settled = True
+        for doc_revision, name, doc in merged:
+            if name is None:
+                deleted[doc["collection"]].append(doc["id"])
+            else:
+                changes[name].append(doc)
+            updated_at = doc["updated_at"]
+            if updated_at.tzinfo is None:
+                updated_at = updated_at.replace(tzinfo=timezone.utc)
+            settled = settled and now - updated_at >= timedelta(seconds=SYNC_SETTLE_SECONDS)
+            if settled:
+                revision = doc_revision
+        for name in collections:
+            apply_defaults(self.models[name], changes[name])
+            # Only the record's latest state is returned, a tombstone beside it was for an earlier one
+            present = {doc["id"] for doc in changes[name]}
+            deleted[name] = [record_id for record_id in deleted[name] if record_id not in present]
+        return {
+            "changes": changes,
+            "deleted": deleted,
+            "next": encode_token(revision, now),
+            # A page the token cannot move through yet is fetched again by the next poll
+            "has_more": truncated and revision > since,
+        }
+
+    async def _backfill(self, payload: dict):
+        """Stamp records written before revisions existed"""
+        stamped = 0
+        for name in self.models:
+            while True:
+                docs = await self.db[name].find(
+                    {"revision": None}, {"_id": 1}
+                ).limit(BACKFILL_BATCH_SIZE).to_list(BACKFILL_BATCH_SIZE)
+                if not docs:
+                    break
+                await self.stamp_many(docs)
+                # A write stamping the record meanwhile wins
+                await self.db[name].bulk_write([
+                    UpdateOne(
+                        {"_id": doc["_id"], "revision": None},
+                        {"$set": {"revision": doc["revision"], "updated_at": doc["updated_at"]}},
+                    )
+                    for doc in docs
+                ], ordered=False)
+                stamped += len(docs)
+        if stamped:
+            logger.info(f"Stamped {stamped} records with sync revisions")
+        return {"stamped": stamped}
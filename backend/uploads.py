@@ -0,0 +1,235 @@
+"""
+Streaming uploads to Supabase Storage
+
+Uploads are sent with Supabase's resumable (TUS) endpoint in fixed-size
+chunks read straight from the spooled UploadFile, over an async HTTP
+client. At most one chunk per upload is held in memory and the event
+loop is never blocked for the duration of the transfer.
+
+Configuration (backend .env):
+- UPLOAD_MAX_BYTES: largest accepted upload, bigger files get a 413.
+  UploadLimitMiddleware enforces it on the raw request body (plus
+  FORM_OVERHEAD_BYTES for the other form fields) before the multipart
+  parser spools anything to disk, by Content-Length when sent and by
+  counting the bytes received otherwise
+- UPLOAD_CHUNK_BYTES: bytes per request, which is also the per-upload
+  memory ceiling (Supabase expects 6 MB chunks for resumable uploads)
+- UPLOAD_STAGING_DIR: where uploads wait for the "storage.upload" job,
+  must be shared with the worker when it runs as a separate process
+
+Staging also hashes the content (SHA-256) for content-addressed storage,
+see blobs.py.
+"""
+import asyncio
+import base64
+import hashlib
+import os
+import tempfile
+import uuid
+from typing import Iterable, Optional, Tuple
+
+import httpx
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+
+from metrics import SUPABASE_REQUEST_DURATION, observe
+
+UPLOAD_MAX_BYTES = int(os.environ.get('UPLOAD_MAX_BYTES', str(500 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = int(os.environ.get('UPLOAD_CHUNK_BYTES', str(6 * 1024 * 1024)))
+UPLOAD_TIMEOUT_SECONDS = float(os.environ.get('UPLOAD_TIMEOUT_SECONDS', '60'))
+UPLOAD_MAX_RETRIES = int(os.environ.get('UPLOAD_MAX_RETRIES', '3'))
+UPLOAD_STAGING_DIR = os.environ.get('UPLOAD_STAGING_DIR', os.path.join(tempfile.gettempdir(), 'projectveo-uploads'))
+
+TUS_VERSION = "1.0.0"
+# Multipart framing and the form fields sent beside the file
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadError(Exception):
+    pass
+
+
+def upload_size(file: UploadFile) -> int:
+    """Size of the spooled upload without reading it into memory"""
+    if file.size is not None:
+        return file.size
+    position = file.file.tell()
+    file.file.seek(0, os.SEEK_END)
+    size = file.file.tell()
+    file.file.seek(position)
+    return size
+
+
+def check_upload_size(file: UploadFile, max_bytes: int = UPLOAD_MAX_BYTES) -> int:
+    size = upload_size(file)
+    if size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"File too large, the limit is {max_bytes // (1024 * 1024)} MB")
+    return size
+
+
+class UploadLimitMiddleware:
+    """
+    Pure ASGI middleware answering 413 for upload requests whose body is
+    larger than `max_bytes` + FORM_OVERHEAD_BYTES, before it is parsed
+    - Only requests to `paths` are checked, other bodies are not limited
+    """
+
+    def __init__(self, app, paths: Iterable[str], max_bytes: int = UPLOAD_MAX_BYTES):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.max_bytes = max_bytes
+        self.limit = max_bytes + FORM_OVERHEAD_BYTES
+
+    @property
+    def detail(self) -> str:
+        return f"File too large, the limit is {self.max_bytes // (1024 * 1024)} MB"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        try:
+            declared = int(headers.get(b"content-length", b""))
+        except ValueError:
+            declared = None
+        if declared is not None and declared > self.limit:
+            await JSONResponse({"detail": self.detail}, status_code=413)(scope, receive, send)
+            return
+
+        received = 0
+
+        async def receive_wrapper():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                # Chunked bodies are counted as they arrive, FastAPI answers
+                # an HTTPException raised while it reads the form
+                if received > self.limit:
+                    raise HTTPException(status_code=413, detail=self.detail)
+            return message
+
+        await self.app(scope, receive_wrapper, send)
+
+
+def _copy_to_staging(source, path: str) -> str:
+    digest = hashlib.sha256()
+    source.seek(0)
+    with open(path, 'wb') as target:
+        while True:
+            chunk = source.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            digest.update(chunk)
+            target.write(chunk)
+    return digest.hexdigest()
+
+
+async def stage_upload(file: UploadFile) -> Tuple[str, str]:
+    """Copy the spooled upload to the staging directory, returns (staged path, SHA-256 hex digest)"""
+    os.makedirs(UPLOAD_STAGING_DIR, exist_ok=True)
+    path = os.path.join(UPLOAD_STAGING_DIR, uuid.uuid4().hex)
+    content_hash = await asyncio.to_thread(_copy_to_staging, file.file, path)
+    return path, content_hash
+
+
+def open_staged(path: str, filename: str) -> UploadFile:
+    return UploadFile(open(path, 'rb'), size=os.path.getsize(path), filename=filename)
+
+
+def discard_staged(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def storage_path_from_url(file_url: str, bucket: str) -> Optional[str]:
+    """Object path of a Supabase public URL, for records stored without `storage_path`"""
+    marker = f"/object/public/{bucket}/"
+    if marker not in file_url:
+        return None
+    return file_url.split(marker, 1)[1].split("?", 1)[0]
+
+
+def _metadata(**values: str) -> str:
+    return ",".join(f"{k} {base64.b64encode(v.encode('utf-8')).decode('ascii')}" for k, v in values.items())
+
+
+async def _stream(chunk: bytes):
+    yield chunk
+
+
+class SupabaseStreamingUploader:
+    """
+    Client for the Supabase Storage resumable upload endpoint
+    - One upload session per file, created with the total length
+    - Each chunk is PATCHed at the server's offset, failed chunks are
+      retried by asking the server where it stopped (HEAD)
+    """
+
+    def __init__(self, supabase_url: str, supabase_key: str, bucket: str,
+                 chunk_bytes: int = UPLOAD_CHUNK_BYTES,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.endpoint = f"{supabase_url.rstrip('/')}/storage/v1/upload/resumable"
+        self.bucket = bucket
+        self.chunk_bytes = chunk_bytes
+        self._headers = {
+            "Authorization": f"Bearer {supabase_key}",
+            "apikey": supabase_key,
+            "Tus-Resumable": TUS_VERSION,
+        }
+        self._transport = transport
+
+    def _client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(headers=self._headers, timeout=UPLOAD_TIMEOUT_SECONDS, transport=self._transport)
+
+    async def _create(self, http: httpx.AsyncClient, path: str, size: int, content_type: str) -> str:
+        response = await http.post(self.endpoint, headers={
+            "Upload-Length": str(size),
+            "Upload-Metadata": _metadata(bucketName=self.bucket, objectName=path, contentType=content_type),
+        })
+        if response.status_code != 201:
+            raise UploadError(f"Could not start upload ({response.status_code}): {response.text}")
+        return str(httpx.URL(self.endpoint).join(response.headers["Location"]))
+
+    async def _offset(self, http: httpx.AsyncClient, location: str) -> int:
+        response = await http.head(location)
+        if response.status_code != 200:
+            raise UploadError(f"Upload session lost ({response.status_code})")
+        return int(response.headers["Upload-Offset"])
+
+    async def upload(self, path: str, file: UploadFile, content_type: str) -> int:
+        """Stream `file` to `path` in the bucket, returns the number of bytes sent"""
+        size = upload_size(file)
+        with observe(SUPABASE_REQUEST_DURATION, operation="upload"):
+            return await self._upload(path, file, content_type, size)
+
+    async def _upload(self, path: str, file: UploadFile, content_type: str, size: int) -> int:
+        async with self._client() as http:
+            location = await self._create(http, path, size, content_type)
+            offset = 0
+            retries = 0
+            while offset < size:
+                await file.seek(offset)
+                chunk = await file.read(self.chunk_bytes)
+                try:
+                    # Sent as a one-shot stream so httpx does not keep the bytes on the request
+                    response = await http.patch(location, content=_stream(chunk), headers={
+                        "Upload-Offset": str(offset),
+                        "Content-Length": str(len(chunk)),
+                        "Content-Type": "application/offset+octet-stream",
+                    })
+                    response.raise_for_status()
+                    offset = int(response.headers["Upload-Offset"])
+                    retries = 0
+                except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                    retries += 1
+                    if retries > UPLOAD_MAX_RETRIES:
+                        raise UploadError(f"Upload failed at byte {offset}: {e}")
+                    offset = await self._offset(http, location)
+                finally:
+                    del chunk
+        return size
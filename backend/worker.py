@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Standalone job worker for ProjectVeo
+
+Runs the background job queue (storage uploads and removals, booking
+notifications, project deletions) without serving HTTP. Start the API
+with JOB_QUEUE_WORKER=external so it only enqueues, then:
+
+    python worker.py
+
+Staged uploads are read from UPLOAD_STAGING_DIR, so the worker needs the
+same directory as the API (same host or a shared volume).
+"""
+import asyncio
+import logging
+
+from server import job_queue, mongo
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    await mongo.open()
+    logger.info(f"Job worker {job_queue.worker_id} started")
+    try:
+        await job_queue.run_forever()
+    finally:
+        mongo.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,16 @@
+import React from 'react';
+import { Button } from '@/components/ui/button';
+
+// "Load more" under a paged list, rendered only while there is a next page
+const LoadMore = ({ hasMore, loading, onClick, testId }) => {
+  if (!hasMore) return null;
+  return (
+    <div className="text-center mt-6">
+      <Button variant="outline" onClick={onClick} disabled={loading} data-testid={testId}>
+        {loading ? 'Loading...' : 'Load more'}
+      </Button>
+    </div>
+  );
+};
+
+export default LoadMore;
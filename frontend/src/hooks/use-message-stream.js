@@ -0,0 +1,22 @@
+import { useEffect, useRef } from 'react';
+
+const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
+
+// Pushes new project messages to `onMessage` over server-sent events.
+// EventSource reconnects on its own and resumes after the last event id.
+// A fresh connect also replays the last few seconds of messages, which may
+// already be in the list; merge with appendMessage to drop the repeats.
+export const useMessageStream = (projectId, onMessage) => {
+  const handlerRef = useRef(onMessage);
+  handlerRef.current = onMessage;
+
+  useEffect(() => {
+    if (!projectId) return undefined;
+    const source = new EventSource(`${API}/messages/${projectId}/stream`);
+    source.addEventListener('message', (event) => handlerRef.current(JSON.parse(event.data)));
+    return () => source.close();
+  }, [projectId]);
+};
+
+export const appendMessage = (messages, message) =>
+  messages.some((m) => m.id === message.id) ? messages : [...messages, message];
@@ -0,0 +1,41 @@
+import { useCallback, useRef, useState } from 'react';
+import axios from 'axios';
+
+// One page of a list endpoint at a time: reload() fetches the first page,
+// loadMore() appends the next one while hasMore. Both reject on failure
+// so the caller can report it.
+export const usePagedList = (url, params) => {
+  const [items, setItems] = useState([]);
+  const [cursor, setCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const paramsRef = useRef(params);
+  paramsRef.current = params;
+
+  const fetchPage = useCallback(async (after) => {
+    const response = await axios.get(url, { params: { ...paramsRef.current, ...(after ? { after } : {}) } });
+    return response.data;
+  }, [url]);
+
+  const reload = useCallback(async () => {
+    const page = await fetchPage(null);
+    setItems(page.items);
+    setCursor(page.next_cursor);
+  }, [fetchPage]);
+
+  const loadMore = useCallback(async () => {
+    if (!cursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const page = await fetchPage(cursor);
+      setItems((prev) => {
+        const seen = new Set(prev.map((item) => item.id));
+        return [...prev, ...page.items.filter((item) => !seen.has(item.id))];
+      });
+      setCursor(page.next_cursor);
+    } finally {
+      setLoadingMore(false);
+    }
+  }, [cursor, loadingMore, fetchPage]);
+
+  return { items, setItems, hasMore: Boolean(cursor), loadingMore, reload, loadMore };
+};
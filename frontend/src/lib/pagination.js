@@ -0,0 +1,20 @@
+import axios from 'axios';
+
+// fetchAllPages never loads more than this many items, lists with more
+// are rendered a page at a time with usePagedList
+export const FETCH_ALL_MAX_ITEMS = 1000;
+
+// List endpoints return { items, next_cursor }; follow the cursor until
+// the last page (or FETCH_ALL_MAX_ITEMS) and resolve to the array of items.
+// For small lookups only, such as the clients of a select.
+export const fetchAllPages = async (url, config = {}) => {
+  const items = [];
+  let after = null;
+  do {
+    const params = { ...config.params, ...(after ? { after } : {}) };
+    const response = await axios.get(url, { ...config, params });
+    items.push(...response.data.items);
+    after = response.data.next_cursor;
+  } while (after && items.length < FETCH_ALL_MAX_ITEMS);
+  return items.slice(0, FETCH_ALL_MAX_ITEMS);
+};
@@ -6,11 +6,13 @@ import { Card } from '@/components/ui/card';
 import { Badge } from '@/components/ui/badge';
 import { toast } from 'sonner';
 import Sidebar from '@/components/Sidebar';
+import LoadMore from '@/components/LoadMore';
+import { usePagedList } from '@/hooks/use-paged-list';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
 const BookingsList = () => {
-  const [bookings, setBookings] = useState([]);
+  const { items: bookings, hasMore, loadingMore, reload, loadMore } = usePagedList(`${API}/bookings`);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
@@ -19,8 +21,7 @@ const BookingsList = () => {
 
   const fetchBookings = async () => {
     try {
-      const response = await axios.get(`${API}/bookings`);
-      setBookings(response.data);
+      await reload();
     } catch (error) {
       toast.error('Failed to fetch bookings');
     } finally {
@@ -28,6 +29,8 @@ const BookingsList = () => {
     }
   };
 
+  const handleLoadMore = () => loadMore().catch(() => toast.error('Failed to fetch bookings'));
+
   const updateStatus = async (id, status) => {
     try {
       await axios.put(`${API}/bookings/${id}/status?status=${status}`);
@@ -131,6 +134,7 @@ const BookingsList = () => {
             ))}
           </div>
         )}
+        <LoadMore hasMore={hasMore} loading={loadingMore} onClick={handleLoadMore} testId="bookings-load-more" />
       </main>
     </div>
   );
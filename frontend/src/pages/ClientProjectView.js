@@ -8,6 +8,7 @@ import { Badge } from '@/components/ui/badge';
 import { Textarea } from '@/components/ui/textarea';
 import { Button } from '@/components/ui/button';
 import { toast } from 'sonner';
+import { useMessageStream, appendMessage } from '@/hooks/use-message-stream';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
@@ -21,6 +22,10 @@ const ClientProjectView = () => {
     fetchProjectData();
   }, [shareLink]);
 
+  useMessageStream(data?.project.id, (message) =>
+    setData((prev) => ({ ...prev, messages: appendMessage(prev.messages, message) }))
+  );
+
   const fetchProjectData = async () => {
     try {
       const response = await axios.get(`${API}/projects/share/${shareLink}`);
@@ -154,9 +159,7 @@ const ClientProjectView = () => {
                   <div className="flex-1 min-w-0">
                     <p className="text-sm font-medium truncate">{file.filename}</p>
                     <a
-                      href={file.file_url}
-                      target="_blank"
-                      rel="noopener noreferrer"
+                      href={`${API}/files/${file.id}/download`}
                       className="text-xs text-primary hover:underline flex items-center gap-1"
                     >
                       <Download className="w-3 h-3" /> Download
@@ -178,7 +181,7 @@ const ClientProjectView = () => {
                     <p className="font-medium">{doc.title}</p>
                     <p className="text-sm text-muted-foreground">Version {doc.version}</p>
                   </div>
-                  <a href={doc.file_url} target="_blank" rel="noopener noreferrer">
+                  <a href={`${API}/srs/${doc.id}/download`}>
                     <Button size="sm" variant="outline">
                       <Download className="w-4 h-4 mr-2" /> Download
                     </Button>
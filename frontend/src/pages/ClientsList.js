@@ -9,11 +9,13 @@ import { Input } from '@/components/ui/input';
 import { Label } from '@/components/ui/label';
 import { toast } from 'sonner';
 import Sidebar from '@/components/Sidebar';
+import LoadMore from '@/components/LoadMore';
+import { usePagedList } from '@/hooks/use-paged-list';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
 const ClientsList = () => {
-  const [clients, setClients] = useState([]);
+  const { items: clients, hasMore, loadingMore, reload, loadMore } = usePagedList(`${API}/clients`);
   const [loading, setLoading] = useState(true);
   const [dialogOpen, setDialogOpen] = useState(false);
   const [editingClient, setEditingClient] = useState(null);
@@ -25,8 +27,7 @@ const ClientsList = () => {
 
   const fetchClients = async () => {
     try {
-      const response = await axios.get(`${API}/clients`);
-      setClients(response.data);
+      await reload();
     } catch (error) {
       toast.error('Failed to fetch clients');
     } finally {
@@ -34,6 +35,8 @@ const ClientsList = () => {
     }
   };
 
+  const handleLoadMore = () => loadMore().catch(() => toast.error('Failed to fetch clients'));
+
   const handleSubmit = async (e) => {
     e.preventDefault();
     try {
@@ -183,6 +186,7 @@ const ClientsList = () => {
             ))}
           </div>
         )}
+        <LoadMore hasMore={hasMore} loading={loadingMore} onClick={handleLoadMore} testId="clients-load-more" />
       </main>
     </div>
   );
@@ -1,15 +1,18 @@
-import React, { useEffect, useState } from 'react';
+import React, { useEffect } from 'react';
 import { Link } from 'react-router-dom';
-import axios from 'axios';
 import { ArrowRight, Code, Sparkles, Zap, CheckCircle2 } from 'lucide-react';
 import { Button } from '@/components/ui/button';
 import { Card } from '@/components/ui/card';
 import Navbar from '@/components/Navbar';
+import LoadMore from '@/components/LoadMore';
+import { usePagedList } from '@/hooks/use-paged-list';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
 const Landing = () => {
-  const [portfolioProjects, setPortfolioProjects] = useState([]);
+  const {
+    items: portfolioProjects, hasMore, loadingMore, reload, loadMore
+  } = usePagedList(`${API}/projects/portfolio`);
 
   useEffect(() => {
     fetchPortfolio();
@@ -17,13 +20,14 @@ const Landing = () => {
 
   const fetchPortfolio = async () => {
     try {
-      const response = await axios.get(`${API}/projects/portfolio`);
-      setPortfolioProjects(response.data);
+      await reload();
     } catch (error) {
       console.error('Failed to fetch portfolio:', error);
     }
   };
 
+  const handleLoadMore = () => loadMore().catch((error) => console.error('Failed to fetch portfolio:', error));
+
   const services = [
     { icon: Code, title: 'Web Development', description: 'Custom websites built with modern technologies' },
     { icon: Sparkles, title: 'UI/UX Design', description: 'Beautiful, intuitive interfaces that users love' },
@@ -141,6 +145,7 @@ const Landing = () => {
               ))}
             </div>
           )}
+          <LoadMore hasMore={hasMore} loading={loadingMore} onClick={handleLoadMore} testId="portfolio-load-more" />
         </div>
       </section>
 
@@ -16,6 +16,9 @@ import { Tabs, TabsContent, TabsList, TabsTrigger } from '@/components/ui/tabs';
 import { Switch } from '@/components/ui/switch';
 import { toast } from 'sonner';
 import Sidebar from '@/components/Sidebar';
+import LoadMore from '@/components/LoadMore';
+import { usePagedList } from '@/hooks/use-paged-list';
+import { useMessageStream, appendMessage } from '@/hooks/use-message-stream';
 
 
 
@@ -31,9 +34,16 @@ const ProjectDetail = () => {
   const navigate = useNavigate();
   const [project, setProject] = useState(null);
   const [client, setClient] = useState(null);
-  const [files, setFiles] = useState([]);
-  const [srsDocuments, setSrsDocuments] = useState([]);
-  const [messages, setMessages] = useState([]);
+  const filesList = usePagedList(`${API}/files/${id}`);
+  const srsList = usePagedList(`${API}/srs/${id}`);
+  const messagesList = usePagedList(`${API}/messages/${id}`);
+  const files = filesList.items;
+  const srsDocuments = srsList.items;
+  const setMessages = messagesList.setItems;
+  // Live messages are appended as they arrive, later pages can load after them
+  const messages = [...messagesList.items].sort((a, b) => (
+    a.created_at === b.created_at ? a.id.localeCompare(b.id) : (a.created_at < b.created_at ? -1 : 1)
+  ));
   const [loading, setLoading] = useState(true);
   
   const [newMilestone, setNewMilestone] = useState('');
@@ -44,18 +54,17 @@ const ProjectDetail = () => {
     fetchProjectData();
   }, [id]);
 
+  useMessageStream(id, (message) => setMessages((prev) => appendMessage(prev, message)));
+
   const fetchProjectData = async () => {
     try {
-      const [projectRes, filesRes, srsRes, messagesRes] = await Promise.all([
+      const [projectRes] = await Promise.all([
         axios.get(`${API}/projects/${id}`),
-        axios.get(`${API}/files/${id}`),
-        axios.get(`${API}/srs/${id}`),
-        axios.get(`${API}/messages/${id}`)
+        filesList.reload(),
+        srsList.reload(),
+        messagesList.reload()
       ]);
       setProject(projectRes.data);
-      setFiles(filesRes.data);
-      setSrsDocuments(srsRes.data);
-      setMessages(messagesRes.data);
       
       const clientRes = await axios.get(`${API}/clients/${projectRes.data.client_id}`);
       setClient(clientRes.data);
@@ -66,6 +75,8 @@ const ProjectDetail = () => {
     }
   };
 
+  const loadMore = (list) => () => list.loadMore().catch(() => toast.error('Failed to fetch project data'));
+
   const updateProject = async (updates) => {
     try {
       await axios.put(`${API}/projects/${id}`, updates);
@@ -76,23 +87,29 @@ const ProjectDetail = () => {
     }
   };
 
+  // Milestone endpoints answer with the milestones and derived progress only
+  const updateMilestones = async (request) => {
+    try {
+      const { data } = await request;
+      setProject((prev) => ({ ...prev, milestones: data.milestones, progress: data.progress }));
+      toast.success('Project updated');
+    } catch (error) {
+      toast.error('Update failed');
+    }
+  };
+
   const handleAddMilestone = () => {
     if (!newMilestone.trim()) return;
-    const updatedMilestones = [...(project.milestones || []), { id: Date.now().toString(), title: newMilestone, completed: false }];
-    updateProject({ milestones: updatedMilestones });
+    updateMilestones(axios.post(`${API}/projects/${id}/milestones`, { title: newMilestone }));
     setNewMilestone('');
   };
 
-  const toggleMilestone = (milestoneId) => {
-    const updatedMilestones = project.milestones.map(m => 
-      m.id === milestoneId ? { ...m, completed: !m.completed } : m
-    );
-    updateProject({ milestones: updatedMilestones });
+  const toggleMilestone = (milestone) => {
+    updateMilestones(axios.patch(`${API}/projects/${id}/milestones/${milestone.id}`, { completed: !milestone.completed }));
   };
 
   const deleteMilestone = (milestoneId) => {
-    const updatedMilestones = project.milestones.filter(m => m.id !== milestoneId);
-    updateProject({ milestones: updatedMilestones });
+    updateMilestones(axios.delete(`${API}/projects/${id}/milestones/${milestoneId}`));
   };
 
   const handleFileUpload = async (e, category = 'general') => {
@@ -145,9 +162,9 @@ const ProjectDetail = () => {
   const sendMessage = async () => {
     if (!newMessage.trim()) return;
     try {
-      await axios.post(`${API}/messages`, { project_id: id, message: newMessage });
+      const response = await axios.post(`${API}/messages`, { project_id: id, message: newMessage });
       setNewMessage('');
-      fetchProjectData();
+      setMessages((prev) => appendMessage(prev, response.data));
     } catch (error) {
       toast.error('Failed to send message');
     }
@@ -202,6 +219,7 @@ const ProjectDetail = () => {
               onValueChange={([value]) => updateProject({ progress: value })}
               max={100}
               step={5}
+              disabled={(project.milestones || []).length > 0}
               data-testid="progress-slider"
             />
           </Card>
@@ -298,7 +316,7 @@ const ProjectDetail = () => {
                 {(project.milestones || []).map((milestone) => (
                   <div key={milestone.id} className="flex items-center gap-3 p-3 rounded-lg border border-border" data-testid={`milestone-${milestone.id}`}>
                     <button
-                      onClick={() => toggleMilestone(milestone.id)}
+                      onClick={() => toggleMilestone(milestone)}
                       className="flex-shrink-0"
                       data-testid={`toggle-milestone-${milestone.id}`}
                     >
@@ -384,6 +402,7 @@ const ProjectDetail = () => {
                   ))}
                 </div>
               )}
+              <LoadMore hasMore={filesList.hasMore} loading={filesList.loadingMore} onClick={loadMore(filesList)} testId="files-load-more" />
             </Card>
           </TabsContent>
 
@@ -439,7 +458,7 @@ const ProjectDetail = () => {
                       </div>
                       <div className="flex items-center gap-3">
                         <Badge>{doc.status}</Badge>
-                        <a href={doc.file_url} target="_blank" rel="noopener noreferrer">
+                        <a href={`${API}/srs/${doc.id}/download`}>
                           <Button size="sm" variant="outline">
                             <Download className="w-4 h-4 mr-2" /> Download
                           </Button>
@@ -449,6 +468,7 @@ const ProjectDetail = () => {
                   ))}
                 </div>
               )}
+              <LoadMore hasMore={srsList.hasMore} loading={srsList.loadingMore} onClick={loadMore(srsList)} testId="srs-load-more" />
             </Card>
           </TabsContent>
 
@@ -468,6 +488,7 @@ const ProjectDetail = () => {
                     <p className="text-sm">{msg.message}</p>
                   </div>
                 ))}
+                <LoadMore hasMore={messagesList.hasMore} loading={messagesList.loadingMore} onClick={loadMore(messagesList)} testId="messages-load-more" />
               </div>
               <div className="flex gap-2">
                 <Textarea
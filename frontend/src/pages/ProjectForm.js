@@ -10,6 +10,7 @@ import { Card } from '@/components/ui/card';
 import { Switch } from '@/components/ui/switch';
 import { toast } from 'sonner';
 import Sidebar from '@/components/Sidebar';
+import { fetchAllPages } from '@/lib/pagination';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
@@ -33,8 +34,8 @@ const ProjectForm = () => {
 
   const fetchClients = async () => {
     try {
-      const response = await axios.get(`${API}/clients`);
-      setClients(response.data);
+      const clients = await fetchAllPages(`${API}/clients`, { params: { view: 'summary' } });
+      setClients(clients);
     } catch (error) {
       toast.error('Failed to fetch clients');
     }
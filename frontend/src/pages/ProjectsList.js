@@ -8,11 +8,16 @@ import { Progress } from '@/components/ui/progress';
 import { Badge } from '@/components/ui/badge';
 import { toast } from 'sonner';
 import Sidebar from '@/components/Sidebar';
+import LoadMore from '@/components/LoadMore';
+import { fetchAllPages } from '@/lib/pagination';
+import { usePagedList } from '@/hooks/use-paged-list';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
 const ProjectsList = () => {
-  const [projects, setProjects] = useState([]);
+  const { items: projects, hasMore, loadingMore, reload, loadMore } = usePagedList(
+    `${API}/projects`, { view: 'summary' }
+  );
   const [clients, setClients] = useState({});
   const [loading, setLoading] = useState(true);
 
@@ -22,13 +27,13 @@ const ProjectsList = () => {
 
   const fetchData = async () => {
     try {
-      const [projectsRes, clientsRes] = await Promise.all([
-        axios.get(`${API}/projects`),
-        axios.get(`${API}/clients`)
+      // Client names come from a capped lookup, projects are paged
+      const [, clientsRes] = await Promise.all([
+        reload(),
+        fetchAllPages(`${API}/clients`, { params: { view: 'summary' } })
       ]);
-      setProjects(projectsRes.data);
       const clientsMap = {};
-      clientsRes.data.forEach(c => clientsMap[c.id] = c);
+      clientsRes.forEach(c => clientsMap[c.id] = c);
       setClients(clientsMap);
     } catch (error) {
       toast.error('Failed to fetch data');
@@ -37,6 +42,8 @@ const ProjectsList = () => {
     }
   };
 
+  const handleLoadMore = () => loadMore().catch(() => toast.error('Failed to fetch data'));
+
   const getStatusColor = (status) => {
     const colors = {
       'not_started': 'bg-gray-500',
@@ -128,6 +135,7 @@ const ProjectsList = () => {
             })}
           </div>
         )}
+        <LoadMore hasMore={hasMore} loading={loadingMore} onClick={handleLoadMore} testId="projects-load-more" />
       </main>
     </div>
   );